@@ -0,0 +1,327 @@
+"""
+Process-wide registry of model clients.
+
+The RAG and report pipelines talk to the same vLLM and embedding servers.
+Clients built here share one keep-alive connection pool per endpoint, cap the
+number of in-flight requests per endpoint and retry failures with
+exponential backoff, so TCP connections are reused across both pipelines.
+Deterministic (temperature 0) chat models also share a persistent response
+cache.
+"""
+import asyncio
+import os
+import threading
+import weakref
+from pathlib import Path
+from typing import Any, Dict, Optional
+import httpx
+import yaml
+from langchain_openai import ChatOpenAI
+from langchain_openai import OpenAIEmbeddings
+from .llm_cache import SQLiteLLMCache
+from tracing import TracingCallbackHandler, span
+
+config_path = Path(__file__).parent / "clients.yaml"
+if not config_path.exists():
+    raise FileNotFoundError(f"Configuration file not found at: {config_path}")
+
+with open(config_path, "r") as f:
+    config = yaml.safe_load(f)
+
+
+# Environment variables overriding model config, e.g. to point every pipeline
+# at the local stand-in servers used by the benchmarks
+ENV_OVERRIDES = {
+    "llm": {
+        "api_base": "MODALX_LLM_API_BASE",
+        "model": "MODALX_LLM_MODEL",
+    },
+    "embeddings": {
+        "base_url": "MODALX_EMBEDDINGS_BASE_URL",
+        "model": "MODALX_EMBEDDINGS_MODEL",
+        "check_embedding_ctx_length": "MODALX_EMBEDDINGS_CHECK_CTX_LENGTH",
+    },
+    "llm_cache": {
+        "enabled": "MODALX_LLM_CACHE",
+        "path": "MODALX_LLM_CACHE_PATH",
+    },
+    "report_cache": {
+        "enabled": "MODALX_REPORT_CACHE",
+    },
+}
+
+
+def apply_env_overrides(section: str, section_config: Dict[str, Any]) -> Dict[str, Any]:
+    """Copy of a model config section with environment overrides applied."""
+    overridden = dict(section_config)
+    for key, env_name in ENV_OVERRIDES[section].items():
+        value = os.environ.get(env_name)
+        if value is not None:
+            overridden[key] = yaml.safe_load(value)
+    return overridden
+
+
+class _ReleasingStream(httpx.SyncByteStream):
+    """Response body that calls `release` once it is closed."""
+
+    def __init__(self, stream: httpx.SyncByteStream, release) -> None:
+        self._stream = stream
+        self._release = release
+
+    def __iter__(self):
+        yield from self._stream
+
+    def close(self) -> None:
+        try:
+            self._stream.close()
+        finally:
+            release, self._release = self._release, None
+            if release is not None:
+                release()
+
+
+class _AsyncReleasingStream(httpx.AsyncByteStream):
+    """Async response body that calls `release` once it is closed."""
+
+    def __init__(self, stream: httpx.AsyncByteStream, release) -> None:
+        self._stream = stream
+        self._release = release
+
+    async def __aiter__(self):
+        async for chunk in self._stream:
+            yield chunk
+
+    async def aclose(self) -> None:
+        try:
+            await self._stream.aclose()
+        finally:
+            release, self._release = self._release, None
+            if release is not None:
+                release()
+
+
+class _LimitedTransport(httpx.HTTPTransport):
+    """
+    HTTP transport allowing at most `max_concurrency` requests in flight.
+
+    A request holds its slot until its response body has been read and
+    closed, so streamed completions count against the limit too.
+    """
+
+    def __init__(self, max_concurrency: int, **kwargs):
+        super().__init__(**kwargs)
+        self._semaphore = threading.BoundedSemaphore(max_concurrency)
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        self._semaphore.acquire()
+        try:
+            response = super().handle_request(request)
+        except BaseException:
+            self._semaphore.release()
+            raise
+        response.stream = _ReleasingStream(response.stream,
+                                           self._semaphore.release)
+        return response
+
+
+class _LimitedAsyncTransport(httpx.AsyncBaseTransport):
+    """
+    Async HTTP transport allowing at most `max_concurrency` requests in
+    flight per event loop.
+
+    Connection pools and asyncio semaphores belong to the loop that first
+    uses them, but the AsyncClient holding this transport is shared by
+    models awaited from different loops (the ASGI server's, and
+    `asyncio.run` in worker threads). Each loop therefore gets its own
+    pool and semaphore. As in _LimitedTransport, a slot is held until the
+    response body is closed.
+    """
+
+    def __init__(self, max_concurrency: int, **kwargs):
+        self.max_concurrency = max_concurrency
+        self._transport_kwargs = kwargs
+        self._lock = threading.Lock()
+        self._loops = weakref.WeakKeyDictionary()
+
+    def _for_loop(self):
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            if loop not in self._loops:
+                self._loops[loop] = (
+                    httpx.AsyncHTTPTransport(**self._transport_kwargs),
+                    asyncio.Semaphore(self.max_concurrency))
+            return self._loops[loop]
+
+    async def handle_async_request(self,
+                                   request: httpx.Request) -> httpx.Response:
+        transport, semaphore = self._for_loop()
+        await semaphore.acquire()
+        try:
+            response = await transport.handle_async_request(request)
+        except BaseException:
+            semaphore.release()
+            raise
+        response.stream = _AsyncReleasingStream(response.stream,
+                                                semaphore.release)
+        return response
+
+    async def aclose(self) -> None:
+        with self._lock:
+            entry = self._loops.pop(asyncio.get_running_loop(), None)
+        if entry is not None:
+            await entry[0].aclose()
+
+
+class TracedOpenAIEmbeddings(OpenAIEmbeddings):
+    """OpenAIEmbeddings recording each embedding call as an "embedding" span."""
+
+    def embed_documents(self, texts, chunk_size=0):
+        with span("embedding", "embed_documents", count=len(texts)):
+            return super().embed_documents(texts, chunk_size)
+
+    def embed_query(self, text):
+        with span("embedding", "embed_query"):
+            return super().embed_query(text)
+
+    async def aembed_documents(self, texts, chunk_size=0):
+        with span("embedding", "embed_documents", count=len(texts)):
+            return await super().aembed_documents(texts, chunk_size)
+
+    async def aembed_query(self, text):
+        with span("embedding", "embed_query"):
+            return await super().aembed_query(text)
+
+
+class ModelClientRegistry:
+    """Builds and caches HTTP clients and LangChain model wrappers per endpoint."""
+
+    def __init__(self, client_config: Dict[str, Any]):
+        self.defaults = client_config.get("defaults", {})
+        self.endpoints = client_config.get("endpoints") or {}
+        self.cache_config = apply_env_overrides(
+            "llm_cache", client_config.get("llm_cache") or {})
+        self._llm_cache = None
+        self._lock = threading.Lock()
+        self._http_clients = {}
+        self._async_http_clients = {}
+        self._models = {}
+
+    def settings(self, base_url: str) -> Dict[str, Any]:
+        """Pool settings for an endpoint: defaults overridden per base URL."""
+        return {**self.defaults, **self.endpoints.get(base_url.rstrip("/"), {})}
+
+    def _pool_kwargs(self, settings: Dict[str, Any]) -> Dict[str, Any]:
+        return {
+            "limits":
+            httpx.Limits(
+                max_connections=settings["max_connections"],
+                max_keepalive_connections=settings[
+                    "max_keepalive_connections"],
+                keepalive_expiry=settings["keepalive_expiry"]),
+            "timeout":
+            httpx.Timeout(settings["timeout"],
+                          connect=settings["connect_timeout"]),
+        }
+
+    def http_client(self, base_url: str) -> httpx.Client:
+        """Shared sync client for an endpoint."""
+        with self._lock:
+            if base_url not in self._http_clients:
+                settings = self.settings(base_url)
+                pool = self._pool_kwargs(settings)
+                self._http_clients[base_url] = httpx.Client(
+                    transport=_LimitedTransport(
+                        settings["max_concurrency"],
+                        limits=pool["limits"],
+                        retries=settings["max_retries"]),
+                    timeout=pool["timeout"])
+            return self._http_clients[base_url]
+
+    def async_http_client(self, base_url: str) -> httpx.AsyncClient:
+        """Shared async client for an endpoint; its transport keeps a pool per event loop."""
+        with self._lock:
+            if base_url not in self._async_http_clients:
+                settings = self.settings(base_url)
+                pool = self._pool_kwargs(settings)
+                self._async_http_clients[base_url] = httpx.AsyncClient(
+                    transport=_LimitedAsyncTransport(
+                        settings["max_concurrency"],
+                        limits=pool["limits"],
+                        retries=settings["max_retries"]),
+                    timeout=pool["timeout"])
+            return self._async_http_clients[base_url]
+
+    def llm_cache(self) -> Optional[SQLiteLLMCache]:
+        """Shared response cache for deterministic chat models, if enabled."""
+        if not self.cache_config.get("enabled"):
+            return None
+        with self._lock:
+            if self._llm_cache is None:
+                self._llm_cache = SQLiteLLMCache(
+                    self.cache_config["path"],
+                    ttl=self.cache_config.get("ttl"),
+                    max_entries=self.cache_config.get("max_entries"))
+            return self._llm_cache
+
+    def chat_model(self, llm_config: Dict[str, Any]) -> ChatOpenAI:
+        """Chat model for an `llm` config section, shared between identical configs."""
+        llm_config = apply_env_overrides("llm", llm_config)
+        base_url = llm_config["api_base"]
+        key = ("chat", base_url, llm_config["model"], llm_config["api_key"],
+               llm_config["temperature"])
+        if key not in self._models:
+            settings = self.settings(base_url)
+            # Sampled completions differ between calls, so only cache at temperature 0
+            cache = self.llm_cache() if llm_config["temperature"] == 0 else None
+            model = ChatOpenAI(
+                openai_api_base=base_url,
+                model=llm_config["model"],
+                openai_api_key=llm_config["api_key"],
+                temperature=llm_config["temperature"],
+                timeout=settings["timeout"],
+                max_retries=settings["max_retries"],
+                http_client=self.http_client(base_url),
+                http_async_client=self.async_http_client(base_url),
+                callbacks=[TracingCallbackHandler()],
+                cache=cache,
+            )
+            with self._lock:
+                model = self._models.setdefault(key, model)
+        return self._models[key]
+
+    def embeddings(self, embeddings_config: Dict[str,
+                                                 Any]) -> OpenAIEmbeddings:
+        """Embeddings client for an `embeddings` config section, shared between identical configs."""
+        embeddings_config = apply_env_overrides("embeddings",
+                                                embeddings_config)
+        base_url = embeddings_config["base_url"]
+        check_ctx_length = embeddings_config.get("check_embedding_ctx_length",
+                                                 True)
+        key = ("embeddings", base_url, embeddings_config["model"],
+               embeddings_config["api_key"], check_ctx_length)
+        if key not in self._models:
+            settings = self.settings(base_url)
+            model = TracedOpenAIEmbeddings(
+                model=embeddings_config["model"],
+                base_url=base_url,
+                api_key=embeddings_config["api_key"],
+                check_embedding_ctx_length=check_ctx_length,
+                timeout=settings["timeout"],
+                max_retries=settings["max_retries"],
+                http_client=self.http_client(base_url),
+                http_async_client=self.async_http_client(base_url),
+            )
+            with self._lock:
+                model = self._models.setdefault(key, model)
+        return self._models[key]
+
+
+registry = ModelClientRegistry(config)
+
+
+def get_chat_model(llm_config: Dict[str, Any]) -> ChatOpenAI:
+    return registry.chat_model(llm_config)
+
+
+def get_embeddings(embeddings_config: Dict[str, Any]) -> OpenAIEmbeddings:
+    return registry.embeddings(embeddings_config)
@@ -0,0 +1,127 @@
+"""
+Persistent cache of chat model responses.
+
+Chat models at temperature 0 return the same completion for the same
+request, so the registry gives them this cache: LangChain looks up every
+call by (serialized message list, llm string) before sending it. The llm
+string covers the model name, sampling parameters and any bound tools or
+response format, so structured-output graders with different schemas never
+share an entry. Entries expire after `ttl` seconds and the least recently
+used ones are evicted beyond `max_entries`.
+"""
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Optional
+from langchain_core.caches import RETURN_VAL_TYPE, BaseCache
+from langchain_core.load import dumps, loads
+from tracing import LLM_CACHE_LOOKUPS, current_span
+
+
+class SQLiteLLMCache(BaseCache):
+    """LangChain LLM cache in a SQLite file, with TTL and LRU size eviction."""
+
+    def __init__(self,
+                 path: str,
+                 ttl: Optional[float] = None,
+                 max_entries: Optional[int] = None) -> None:
+        """
+        Args:
+            path: SQLite database file, created if missing
+            ttl: Seconds an entry stays valid; None keeps entries until evicted
+            max_entries: Entries kept before the least recently used are
+                evicted; None disables size eviction
+        """
+        self.path = path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("CREATE TABLE IF NOT EXISTS responses ("
+                               "key TEXT PRIMARY KEY, value TEXT NOT NULL, "
+                               "created_at REAL NOT NULL, "
+                               "accessed_at REAL NOT NULL)")
+            self._conn.execute("CREATE INDEX IF NOT EXISTS responses_accessed "
+                               "ON responses (accessed_at)")
+
+    @staticmethod
+    def _key(prompt: str, llm_string: str) -> str:
+        return hashlib.sha256(
+            f"{llm_string}\0{prompt}".encode("utf-8")).hexdigest()
+
+    def _expired(self, created_at: float, now: float) -> bool:
+        return self.ttl is not None and now - created_at > self.ttl
+
+    def _record(self, hit: bool) -> None:
+        # Attributed to the stage (graph node) making the call, like LLM tokens
+        parent = current_span()
+        LLM_CACHE_LOOKUPS.labels(parent.name if parent else "chat",
+                                 "hit" if hit else "miss").inc()
+
+    def lookup(self, prompt: str, llm_string: str) -> Optional[RETURN_VAL_TYPE]:
+        key = self._key(prompt, llm_string)
+        now = time.time()
+        with self._lock, self._conn:
+            row = self._conn.execute(
+                "SELECT value, created_at FROM responses WHERE key = ?",
+                (key, )).fetchone()
+            if row is not None and self._expired(row[1], now):
+                self._conn.execute("DELETE FROM responses WHERE key = ?",
+                                   (key, ))
+                row = None
+            if row is not None:
+                self._conn.execute(
+                    "UPDATE responses SET accessed_at = ? WHERE key = ?",
+                    (now, key))
+                self.hits += 1
+            else:
+                self.misses += 1
+        self._record(row is not None)
+        if row is None:
+            return None
+        return [loads(generation) for generation in json.loads(row[0])]
+
+    def update(self, prompt: str, llm_string: str,
+               return_val: RETURN_VAL_TYPE) -> None:
+        value = json.dumps([dumps(generation) for generation in return_val])
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?)",
+                (self._key(prompt, llm_string), value, now, now))
+            if self.ttl is not None:
+                self._conn.execute(
+                    "DELETE FROM responses WHERE created_at < ?",
+                    (now - self.ttl, ))
+            if self.max_entries is not None:
+                self._conn.execute(
+                    "DELETE FROM responses WHERE key IN (SELECT key FROM "
+                    "responses ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)",
+                    (self.max_entries, ))
+
+    def clear(self, **kwargs: Any) -> None:
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM responses")
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counts since start-up and current number of entries."""
+        with self._lock:
+            entries = self._conn.execute(
+                "SELECT COUNT(*) FROM responses").fetchone()[0]
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "entries": entries,
+            }
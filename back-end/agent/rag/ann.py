@@ -0,0 +1,494 @@
+import json
+import os
+import sqlite3
+import threading
+import uuid
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+import faiss
+import numpy as np
+from langchain.schema import Document
+from langchain_core.embeddings import Embeddings
+from langchain_core.vectorstores import VectorStore as LangChainVectorStore
+
+# Files inside a FaissVectorStore directory
+INDEX_FILE = "index.faiss"
+VECTORS_FILE = "vectors.f32"
+DOCSTORE_FILE = "docstore.sqlite3"
+META_FILE = "meta.json"
+
+# Rows added to the index per call when (re)building it from stored vectors
+ADD_BLOCK_SIZE = 65536
+
+# Vector encodings at the end of a factory string that `quantization` replaces
+STORAGE_PREFIXES = ("Flat", "SQ", "PQ")
+
+
+def quantized_factory(index_factory: str, quantization: str = "none",
+                      pq_m: int = 32) -> str:
+    """
+    Swap the vector encoding of a FAISS factory string.
+
+    Args:
+        index_factory: e.g. "HNSW32,Flat" or "IVF4096,Flat"
+        quantization: "none", "int8" (SQ8, 1 byte per dimension) or "pq"
+            (product quantization, `pq_m` bytes per vector)
+        pq_m: PQ sub-quantizers; must divide the embedding dimension
+
+    Returns:
+        str: e.g. "HNSW32,SQ8" or "IVF4096,PQ32"
+    """
+    if quantization in (None, "none"):
+        return index_factory
+    encodings = {"int8": "SQ8", "pq": f"PQ{pq_m}"}
+    if quantization not in encodings:
+        raise ValueError(f"Unknown quantization: {quantization}")
+    parts = index_factory.split(",")
+    if parts[-1].startswith(STORAGE_PREFIXES):
+        parts = parts[:-1]
+    return ",".join(parts + [encodings[quantization]])
+
+
+def matches_filter(metadata: Dict[str, Any], where: Optional[Dict[str, Any]]) -> bool:
+    """Evaluate a Chroma-style `where` clause (as built by VectorStore.build_filter) on metadata."""
+    if not where:
+        return True
+    if "$and" in where:
+        return all(matches_filter(metadata, clause) for clause in where["$and"])
+    if "$or" in where:
+        return any(matches_filter(metadata, clause) for clause in where["$or"])
+    for key, condition in where.items():
+        value = metadata.get(key)
+        if not isinstance(condition, dict):
+            condition = {"$eq": condition}
+        for op, expected in condition.items():
+            if op == "$eq" and value != expected:
+                return False
+            if op == "$ne" and value == expected:
+                return False
+            if op == "$in" and value not in expected:
+                return False
+            if op == "$nin" and value in expected:
+                return False
+            if op in ("$gt", "$gte", "$lt", "$lte"):
+                if value is None:
+                    return False
+                if op == "$gt" and not value > expected:
+                    return False
+                if op == "$gte" and not value >= expected:
+                    return False
+                if op == "$lt" and not value < expected:
+                    return False
+                if op == "$lte" and not value <= expected:
+                    return False
+    return True
+
+
+class _ReadWriteLock:
+    """Lets searches run concurrently while adds and training run alone."""
+
+    def __init__(self):
+        self._cond = threading.Condition()
+        self._readers = 0
+        self._writing = False
+
+    def acquire_read(self):
+        with self._cond:
+            while self._writing:
+                self._cond.wait()
+            self._readers += 1
+
+    def release_read(self):
+        with self._cond:
+            self._readers -= 1
+            if not self._readers:
+                self._cond.notify_all()
+
+    def acquire_write(self):
+        with self._cond:
+            while self._writing or self._readers:
+                self._cond.wait()
+            self._writing = True
+
+    def release_write(self):
+        with self._cond:
+            self._writing = False
+            self._cond.notify_all()
+
+
+class FaissVectorStore(LangChainVectorStore):
+    """
+    In-process ANN vector store backed by a FAISS index.
+
+    The index type comes from a FAISS factory string, e.g. "HNSW32,Flat"
+    or "IVF1024,PQ32", over normalized vectors with inner-product search.
+    Raw vectors are appended to a float32 file that is memory-mapped for
+    reading; indexes that need training (IVF, PQ) are searched exactly
+    over it until `train_size` vectors exist, then trained and filled from
+    it. Texts and metadata live in SQLite; metadata filters are applied
+    after the ANN search, over-fetching until enough results match.
+
+    With `quantization` the index keeps int8 or PQ codes instead of
+    float32 vectors, shrinking it 4x or more; the top `rescore` x k
+    candidates are then re-ranked by exact inner product with the
+    full-precision vectors, read from the memory-mapped file (only the
+    candidates' pages are touched). Whether an index is quantized is read
+    from the loaded index itself, so re-scoring is skipped for indexes that
+    already hold full-precision vectors.
+
+    Scores are squared L2 distances between the unit vectors (lower is
+    closer), the same as Chroma's default, so callers can switch backends.
+    """
+
+    def __init__(self,
+                 path: str,
+                 embedding: Embeddings,
+                 index_factory: str = "HNSW32,Flat",
+                 train_size: int = 50000,
+                 search_params: Optional[Dict[str, Any]] = None,
+                 mmap: bool = True,
+                 overfetch: int = 4,
+                 quantization: str = "none",
+                 pq_m: int = 32,
+                 rescore: int = 0) -> None:
+        """
+        Args:
+            path: Directory holding the index, vectors and docstore
+            embedding: Embeddings client
+            index_factory: FAISS index factory string
+            train_size: Vectors collected before a trainable index is trained
+            search_params: FAISS search parameters, e.g. {"efSearch": 64}
+                for HNSW or {"nprobe": 16} for IVF
+            mmap: Memory-map the index file when loading it (supported for
+                IVF inverted lists; other index types are read into memory)
+            overfetch: Candidates fetched per result when filtering
+            quantization: "none", "int8" or "pq"; replaces the vector
+                encoding of `index_factory` for new indexes
+            pq_m: Bytes per vector for "pq"
+            rescore: Candidates per result re-ranked with full-precision
+                vectors when the index is quantized; 0 keeps the index's
+                own ranking
+        """
+        self.path = path
+        self.embedding = embedding
+        self.index_factory = quantized_factory(index_factory, quantization,
+                                               pq_m)
+        self.train_size = train_size
+        self.search_params = search_params or {}
+        self.mmap = mmap
+        self.overfetch = overfetch
+        self.rescore = rescore
+        self._rw = _ReadWriteLock()
+        self._index = None
+        self._mapped = False
+        self._vectors = None
+        self.dim = None
+
+        os.makedirs(path, exist_ok=True)
+        self._db = sqlite3.connect(os.path.join(path, DOCSTORE_FILE),
+                                   check_same_thread=False)
+        self._db_lock = threading.Lock()
+        self._db.execute("CREATE TABLE IF NOT EXISTS chunks ("
+                         "id INTEGER PRIMARY KEY, doc_id TEXT UNIQUE, "
+                         "text TEXT, metadata TEXT)")
+        self._db.commit()
+
+        meta_path = os.path.join(path, META_FILE)
+        if os.path.exists(meta_path):
+            with open(meta_path, "r", encoding="utf-8") as f:
+                meta = json.load(f)
+            self.dim = meta["dim"]
+            self.index_factory = meta["index_factory"]
+            self._load_index()
+
+    @property
+    def embeddings(self) -> Embeddings:
+        return self.embedding
+
+    @property
+    def count(self) -> int:
+        """Number of stored vectors."""
+        vectors_path = os.path.join(self.path, VECTORS_FILE)
+        if self.dim is None or not os.path.exists(vectors_path):
+            return 0
+        return os.path.getsize(vectors_path) // (4 * self.dim)
+
+    def _load_index(self) -> None:
+        index_path = os.path.join(self.path, INDEX_FILE)
+        if os.path.exists(index_path):
+            flags = faiss.IO_FLAG_MMAP if self.mmap else 0
+            self._index = faiss.read_index(index_path, flags)
+            self._mapped = self.mmap
+        else:
+            self._index = faiss.index_factory(self.dim, self.index_factory,
+                                              faiss.METRIC_INNER_PRODUCT)
+            self._mapped = False
+        self._apply_search_params()
+
+    def _code_size(self) -> Optional[int]:
+        """Bytes per vector in the loaded index, None before it exists."""
+        if self._index is None:
+            return None
+        index = faiss.downcast_index(self._index)
+        # HNSW keeps its vectors in a separate storage index
+        storage = getattr(index, "storage", None)
+        if storage is not None:
+            index = faiss.downcast_index(storage)
+        return getattr(index, "code_size", None)
+
+    @property
+    def quantized(self) -> bool:
+        """Whether the loaded index stores codes smaller than float32 vectors."""
+        code_size = self._code_size()
+        return code_size is not None and code_size < 4 * self.dim
+
+    def _apply_search_params(self) -> None:
+        space = faiss.ParameterSpace()
+        for name, value in self.search_params.items():
+            space.set_index_parameter(self._index, name, value)
+
+    def _vector_map(self) -> np.ndarray:
+        """Memory-mapped view of all stored vectors."""
+        n = self.count
+        if self._vectors is None or len(self._vectors) != n:
+            self._vectors = np.memmap(os.path.join(self.path, VECTORS_FILE),
+                                      dtype=np.float32,
+                                      mode="r",
+                                      shape=(n, self.dim)) if n else \
+                np.zeros((0, self.dim or 0), dtype=np.float32)
+        return self._vectors
+
+    @staticmethod
+    def _normalize(vectors) -> np.ndarray:
+        vectors = np.asarray(vectors, dtype=np.float32)
+        if vectors.ndim == 1:
+            vectors = vectors[None, :]
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return np.ascontiguousarray(vectors / norms)
+
+    def add_texts(self,
+                  texts: Iterable[str],
+                  metadatas: Optional[List[dict]] = None,
+                  ids: Optional[List[str]] = None,
+                  **kwargs: Any) -> List[str]:
+        texts = list(texts)
+        if not texts:
+            return []
+        vectors = self.embedding.embed_documents(texts)
+        return self.add_embeddings(texts, vectors, metadatas, ids, **kwargs)
+
+    def add_embeddings(self,
+                       texts: List[str],
+                       vectors,
+                       metadatas: Optional[List[dict]] = None,
+                       ids: Optional[List[str]] = None,
+                       persist: bool = True) -> List[str]:
+        """
+        Add texts with precomputed embeddings.
+
+        Args:
+            texts: Chunk texts
+            vectors: Their embeddings, one row per text
+            metadatas: Optional metadata per text
+            ids: Optional document ids, generated when omitted
+            persist: Write the index file afterwards; pass False while bulk
+                loading and call save() at the end
+
+        Returns:
+            List[str]: Document ids
+        """
+        vectors = self._normalize(vectors)
+        metadatas = metadatas or [{} for _ in texts]
+        ids = ids or [uuid.uuid4().hex for _ in texts]
+
+        self._rw.acquire_write()
+        try:
+            if self.dim is None:
+                self.dim = vectors.shape[1]
+                with open(os.path.join(self.path, META_FILE), "w",
+                          encoding="utf-8") as f:
+                    json.dump({"dim": self.dim,
+                               "index_factory": self.index_factory}, f)
+                self._load_index()
+            if self._mapped:
+                # Memory-mapped indexes are read-only; load a writable copy
+                self._index = faiss.read_index(
+                    os.path.join(self.path, INDEX_FILE))
+                self._mapped = False
+                self._apply_search_params()
+
+            start = self.count
+            vectors_path = os.path.join(self.path, VECTORS_FILE)
+            with self._db_lock:
+                try:
+                    # Rows first: a rejected insert (e.g. a duplicate doc_id)
+                    # must not leave vectors behind, since row ids are
+                    # positions in the vectors file
+                    self._db.executemany(
+                        "INSERT INTO chunks (id, doc_id, text, metadata) "
+                        "VALUES (?, ?, ?, ?)",
+                        [(start + i, ids[i], texts[i],
+                          json.dumps(metadatas[i] or {}, ensure_ascii=False))
+                         for i in range(len(texts))])
+                    with open(vectors_path, "ab") as f:
+                        f.write(vectors.tobytes())
+                except BaseException:
+                    self._db.rollback()
+                    if os.path.exists(vectors_path):
+                        os.truncate(vectors_path, start * 4 * self.dim)
+                    raise
+                self._db.commit()
+
+            if self._index.is_trained:
+                self._index.add(vectors)
+            elif self.count >= self.train_size:
+                self._train()
+            if persist:
+                self._write_index()
+        finally:
+            self._rw.release_write()
+        return ids
+
+    def _train(self) -> None:
+        """Train the index on the stored vectors and add all of them."""
+        vectors = self._vector_map()
+        sample = vectors[:self.train_size] if len(vectors) > self.train_size \
+            else vectors
+        self._index.train(np.ascontiguousarray(sample))
+        for start in range(0, len(vectors), ADD_BLOCK_SIZE):
+            self._index.add(
+                np.ascontiguousarray(vectors[start:start + ADD_BLOCK_SIZE]))
+
+    def _write_index(self) -> None:
+        index_path = os.path.join(self.path, INDEX_FILE)
+        tmp_path = f"{index_path}.tmp"
+        faiss.write_index(self._index, tmp_path)
+        os.replace(tmp_path, index_path)
+
+    def save(self) -> None:
+        """Write the index file."""
+        self._rw.acquire_write()
+        try:
+            if self._index is not None and not self._mapped:
+                self._write_index()
+        finally:
+            self._rw.release_write()
+
+    def _candidates(self, query: np.ndarray, fetch: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Ids and inner products of the `fetch` nearest stored vectors."""
+        if self._index.is_trained and self._index.ntotal:
+            if not self.rescore or not self.quantized:
+                scores, ids = self._index.search(query, fetch)
+                return ids[0], scores[0]
+            _, ids = self._index.search(
+                query, min(self.count, fetch * self.rescore))
+            ids = np.sort(ids[0][ids[0] >= 0])
+            # Exact scores from the full-precision vectors, in file order
+            scores = self._vector_map()[ids] @ query[0]
+            top = np.argsort(-scores)[:fetch]
+            return ids[top], scores[top]
+        # Not trained yet: exact search over the stored vectors
+        vectors = self._vector_map()
+        scores = vectors @ query[0]
+        top = np.argsort(-scores)[:fetch]
+        return top, scores[top]
+
+    def _fetch_documents(self, ids: List[int]) -> Dict[int, Document]:
+        placeholders = ",".join("?" * len(ids))
+        with self._db_lock:
+            rows = self._db.execute(
+                f"SELECT id, text, metadata FROM chunks WHERE id IN ({placeholders})",
+                ids).fetchall()
+        return {
+            row[0]: Document(page_content=row[1], metadata=json.loads(row[2]))
+            for row in rows
+        }
+
+    def similarity_search_by_vector_with_score(
+            self,
+            embedding: List[float],
+            k: int = 4,
+            filter: Optional[Dict[str, Any]] = None) -> List[Tuple[Document, float]]:
+        if self.dim is None:
+            return []
+        query = self._normalize(embedding)
+        self._rw.acquire_read()
+        try:
+            total = self.count
+            fetch = min(total, k * self.overfetch if filter else k)
+            while True:
+                ids, scores = self._candidates(query, fetch)
+                hits = [(int(i), float(s)) for i, s in zip(ids, scores)
+                        if i >= 0]
+                documents = self._fetch_documents([i for i, _ in hits]) \
+                    if hits else {}
+                results = [(documents[i], 2.0 - 2.0 * s) for i, s in hits
+                           if i in documents and matches_filter(
+                               documents[i].metadata, filter)]
+                # Widen the search until enough candidates pass the filter
+                if len(results) >= k or fetch >= total:
+                    return results[:k]
+                fetch = min(total, fetch * 4)
+        finally:
+            self._rw.release_read()
+
+    def similarity_search_with_score(self,
+                                     query: str,
+                                     k: int = 4,
+                                     filter: Optional[Dict[str, Any]] = None,
+                                     **kwargs: Any) -> List[Tuple[Document, float]]:
+        return self.similarity_search_by_vector_with_score(
+            self.embedding.embed_query(query), k, filter)
+
+    def similarity_search_by_vector(self,
+                                    embedding: List[float],
+                                    k: int = 4,
+                                    filter: Optional[Dict[str, Any]] = None,
+                                    **kwargs: Any) -> List[Document]:
+        return [
+            doc for doc, _ in self.similarity_search_by_vector_with_score(
+                embedding, k, filter)
+        ]
+
+    def similarity_search(self,
+                          query: str,
+                          k: int = 4,
+                          filter: Optional[Dict[str, Any]] = None,
+                          **kwargs: Any) -> List[Document]:
+        return [
+            doc for doc, _ in self.similarity_search_with_score(query, k, filter)
+        ]
+
+    def memory_stats(self) -> Dict[str, Any]:
+        """Sizes of the ANN index and of the full-precision vectors, in bytes."""
+        index_path = os.path.join(self.path, INDEX_FILE)
+        index_bytes = os.path.getsize(index_path) if os.path.exists(
+            index_path) else 0
+        vector_bytes = self.count * (self.dim or 0) * 4
+        return {
+            "vectors": self.count,
+            # Factory the index on disk was created with, and what the
+            # loaded index actually holds
+            "index_factory": self.index_factory,
+            "index_type": type(faiss.downcast_index(self._index)).__name__
+            if self._index is not None else None,
+            "bytes_per_vector": self._code_size(),
+            "quantized": self.quantized,
+            "index_bytes": index_bytes,
+            "full_precision_bytes": vector_bytes,
+        }
+
+    def _select_relevance_score_fn(self):
+        # Squared L2 between unit vectors lies in [0, 4]
+        return lambda distance: 1.0 - distance / 4.0
+
+    @classmethod
+    def from_texts(cls,
+                   texts: List[str],
+                   embedding: Embeddings,
+                   metadatas: Optional[List[dict]] = None,
+                   path: str = "./faiss_db",
+                   **kwargs: Any) -> "FaissVectorStore":
+        store = cls(path, embedding, **kwargs)
+        store.add_texts(texts, metadatas)
+        return store
@@ -1,8 +1,10 @@
-from .data_model import GradeDocuments, GradeHallucinations, GradeAnswer
+from .data_model import GradeDocuments, GradeHallucinations, GradeAnswer, GradeGeneration
 from .model import llm
 from langchain_core.prompts import ChatPromptTemplate
+from langchain_core.runnables import RunnableLambda
 from langchain import hub
 from langchain_core.output_parsers import StrOutputParser
+from openai import BadRequestError
 import yaml
 from pathlib import Path
 import sys
@@ -19,40 +21,107 @@ except yaml.YAMLError as e:
     print(f"Error parsing config file: {e}")
     sys.exit(1)
 
-# LLM with function call
+BINARY_CHOICES = ["yes", "no"]
 
 
-def build_retrieval_grader_chain():
-    structured_llm_grader = llm.with_structured_output(GradeDocuments)
+def parse_binary_score(text):
+    """'yes' or 'no' from the start of a completion, None if it is neither."""
+    answer = text.strip().strip("'\"").lower()
+    if answer.startswith(("y", "是")):
+        return "yes"
+    if answer.startswith(("n", "否", "不")):
+        return "no"
+    return None
+
+
+def build_binary_grader(prompt, schema, fast=None):
+    """
+    Grader returning `schema(binary_score=...)` for a yes/no question.
+
+    In fast mode (`grading.fast_binary`) the model is asked for a single
+    token, restricted to yes/no with vLLM's guided_choice, and the token is
+    parsed directly. If it cannot be parsed, or the server rejects guided
+    decoding, the grade falls back to structured output (function calling).
+
+    Args:
+        prompt: Grader prompt template
+        schema: Pydantic model with a `binary_score` field
+        fast: Overrides `grading.fast_binary` from config.yaml
+    """
+    structured_grader = prompt | llm.with_structured_output(schema)
+    if fast is None:
+        fast = config['grading']['fast_binary']
+    if not fast:
+        return structured_grader
+    single_token_grader = prompt | llm.bind(
+        max_tokens=1,
+        extra_body={"guided_choice": BINARY_CHOICES}) | StrOutputParser()
+
+    def grade(inputs):
+        try:
+            score = parse_binary_score(single_token_grader.invoke(inputs))
+        except BadRequestError:
+            score = None
+        if score is None:
+            return structured_grader.invoke(inputs)
+        return schema(binary_score=score)
+
+    async def agrade(inputs):
+        try:
+            score = parse_binary_score(await single_token_grader.ainvoke(inputs))
+        except BadRequestError:
+            score = None
+        if score is None:
+            return await structured_grader.ainvoke(inputs)
+        return schema(binary_score=score)
+
+    return RunnableLambda(grade, afunc=agrade)
+
+
+def build_retrieval_grader_chain(fast=None):
     grade_prompt = ChatPromptTemplate.from_messages([
         ("system", config['prompts']['retrieval_grader']),
-        ("human", "Retrieved document: \n\n {document} \n\n User question: {question}"),
+        # Question before document: the documents graded for one question share the prefix
+        ("human", "User question: {question} \n\n Retrieved document: \n\n {document}"),
     ])
-    return grade_prompt | structured_llm_grader
+    return build_binary_grader(grade_prompt, GradeDocuments, fast)
 
 
 def build_rag_chain():
-    prompt = hub.pull("rlm/rag-prompt")
+    try:
+        prompt = hub.pull("rlm/rag-prompt")
+    except Exception:
+        # Offline: use the local copy of the same prompt
+        prompt = ChatPromptTemplate.from_messages([
+            ("human", config['prompts']['rag']),
+        ])
     rag_chain = prompt | llm | StrOutputParser()
     return rag_chain
 
 
-def build_hallucination_grader_chain():
-    structured_llm_grader = llm.with_structured_output(GradeHallucinations)
+def build_hallucination_grader_chain(fast=None):
     hallucination_prompt = ChatPromptTemplate.from_messages([
         ("system", config['prompts']['hallucination_grader']),
         ("human", "Set of facts: \n\n {documents} \n\n LLM generation: {generation}"),
     ])
-    return hallucination_prompt | structured_llm_grader
+    return build_binary_grader(hallucination_prompt, GradeHallucinations, fast)
 
 
-def build_answer_grader_chain():
-    structured_llm_grader = llm.with_structured_output(GradeAnswer)
+def build_answer_grader_chain(fast=None):
     answer_prompt = ChatPromptTemplate.from_messages([
         ("system", config['prompts']['answer_grader']),
         ("human", "User question: \n\n {question} \n\n LLM generation: {generation}"),
     ])
-    return answer_prompt | structured_llm_grader
+    return build_binary_grader(answer_prompt, GradeAnswer, fast)
+
+
+def build_generation_grader_chain():
+    structured_llm_grader = llm.with_structured_output(GradeGeneration)
+    generation_prompt = ChatPromptTemplate.from_messages([
+        ("system", config['prompts']['generation_grader']),
+        ("human", "Set of facts: \n\n {documents} \n\n User question: \n\n {question} \n\n LLM generation: {generation}"),
+    ])
+    return generation_prompt | structured_llm_grader
 
 
 def build_question_rewriter_chain():
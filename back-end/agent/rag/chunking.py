@@ -0,0 +1,203 @@
+import math
+import re
+from pathlib import Path
+from typing import Any, Dict, List
+import yaml
+from langchain.schema import Document
+
+# 读取配置文件
+config_path = Path(__file__).parent / "config.yaml"
+if not config_path.exists():
+    raise FileNotFoundError(f"Configuration file not found at: {config_path}")
+
+with open(config_path, "r", encoding="utf-8") as f:
+    config = yaml.safe_load(f)
+
+# Sentence ends: Chinese full-width punctuation (with any closing quotes or
+# brackets), English terminal punctuation followed by whitespace, newlines
+SENTENCE_END = re.compile(r'(?<=[。！？；…][”’」』）)])|(?<=[。！？；…])(?![。！？；…”’」』）)])'
+                          r'|(?<=[.!?])\s+|\n+')
+MARKDOWN_HEADING = re.compile(r'^#{1,6}\s', re.MULTILINE)
+CJK_CHAR = re.compile(r'[　-〿㐀-䶿一-鿿＀-￯]')
+
+
+def split_sentences(text: str) -> List[str]:
+    """Split Chinese/English text into sentences, keeping their punctuation."""
+    return [s.strip() for s in SENTENCE_END.split(text) if s and s.strip()]
+
+
+def join_sentences(sentences: List[str]) -> str:
+    """Inverse of split_sentences: spaces between Latin text, none for CJK."""
+    text = ""
+    for sentence in sentences:
+        if text.lstrip().startswith("#") and "\n" not in text:
+            text += "\n"
+        elif text and not (CJK_CHAR.match(text[-1])
+                           or CJK_CHAR.match(sentence[0])):
+            text += " "
+        text += sentence
+    return text
+
+
+class TokenCounter:
+    """
+    Counts tokens for chunk sizing.
+
+    Uses tiktoken when `tokenizer` names one of its encodings and the
+    package is installed; otherwise a heuristic of one token per CJK
+    character and one per four other characters.
+    """
+
+    def __init__(self, tokenizer: str = "heuristic") -> None:
+        self.encoding = None
+        if tokenizer != "heuristic":
+            try:
+                import tiktoken
+                self.encoding = tiktoken.get_encoding(tokenizer)
+            except ImportError:
+                print("tiktoken not installed, using heuristic token counts")
+
+    def __call__(self, text: str) -> int:
+        if self.encoding is not None:
+            return len(self.encoding.encode(text))
+        cjk = len(CJK_CHAR.findall(text))
+        return cjk + math.ceil((len(text) - cjk) / 4)
+
+
+class Chunker:
+    """
+    Token-sized, structure-aware chunker for one profile.
+
+    Text is cut into blocks (markdown sections, paragraphs, or none) and
+    then sentences; sentences are packed greedily up to `chunk_tokens`.
+    Chunks never span two markdown sections, and prefer to end at a
+    paragraph once they are half full. Overlap is counted in whole
+    sentences, up to `overlap_tokens`.
+    """
+
+    def __init__(self,
+                 name: str,
+                 chunk_tokens: int,
+                 overlap_tokens: int = 0,
+                 split_on: str = "sentence",
+                 count_tokens: TokenCounter = None) -> None:
+        """
+        Args:
+            name: Profile name, recorded in chunk metadata
+            chunk_tokens: Maximum tokens per chunk
+            overlap_tokens: Tokens of trailing sentences repeated in the next chunk
+            split_on: "heading", "paragraph" or "sentence"
+            count_tokens: Token counter
+        """
+        self.name = name
+        self.chunk_tokens = chunk_tokens
+        self.overlap_tokens = overlap_tokens
+        self.split_on = split_on
+        self.count_tokens = count_tokens or TokenCounter()
+
+    def _blocks(self, text: str) -> List[str]:
+        if self.split_on == "heading":
+            starts = [m.start() for m in MARKDOWN_HEADING.finditer(text)]
+            bounds = [0] + [s for s in starts if s > 0] + [len(text)]
+            return [text[a:b] for a, b in zip(bounds, bounds[1:])]
+        if self.split_on == "paragraph":
+            return re.split(r'\n\s*\n|\n', text)
+        return [text]
+
+    def _hard_split(self, sentence: str) -> List[str]:
+        """Cut a sentence longer than a chunk into chunk-sized pieces."""
+        pieces = []
+        current = ""
+        for char in sentence:
+            if current and self.count_tokens(current + char) > self.chunk_tokens:
+                pieces.append(current)
+                current = ""
+            current += char
+        if current:
+            pieces.append(current)
+        return pieces
+
+    def split_text(self, text: str) -> List[str]:
+        chunks = []
+        # Sentences of the chunk being built, with their token counts
+        current: List[tuple] = []
+        # Whether `current` holds anything beyond carried-over overlap
+        fresh = False
+
+        def size():
+            return sum(tokens for _, tokens in current)
+
+        def flush(keep_overlap=True):
+            nonlocal current, fresh
+            if fresh:
+                chunks.append(join_sentences([s for s, _ in current]))
+            carried, carried_tokens = [], 0
+            if keep_overlap:
+                for sentence, tokens in reversed(current):
+                    if carried_tokens + tokens > self.overlap_tokens:
+                        break
+                    carried.insert(0, (sentence, tokens))
+                    carried_tokens += tokens
+            current, fresh = carried, False
+
+        for block in self._blocks(text):
+            sentences = split_sentences(block)
+            if not sentences:
+                continue
+            if self.split_on == "heading":
+                flush(keep_overlap=False)
+            elif self.split_on == "paragraph" and size() >= self.chunk_tokens // 2:
+                flush()
+            for sentence in sentences:
+                pieces = [sentence] \
+                    if self.count_tokens(sentence) <= self.chunk_tokens \
+                    else self._hard_split(sentence)
+                for piece in pieces:
+                    tokens = self.count_tokens(piece)
+                    if fresh and size() + tokens > self.chunk_tokens:
+                        flush()
+                    # Drop overlap that would not leave room for the piece
+                    while current and size() + tokens > self.chunk_tokens:
+                        current.pop(0)
+                    current.append((piece, tokens))
+                    fresh = True
+        flush(keep_overlap=False)
+        return chunks
+
+    def split_documents(self, documents: List[Document]) -> List[Document]:
+        chunks = []
+        for doc in documents:
+            for i, text in enumerate(self.split_text(doc.page_content)):
+                chunks.append(
+                    Document(page_content=text,
+                             metadata={
+                                 **doc.metadata, "chunk_index": i,
+                                 "chunk_profile": self.name
+                             }))
+        return chunks
+
+
+class ChunkingEngine:
+    """Selects a chunking profile per document source type."""
+
+    def __init__(self, chunking_config: Dict[str, Any] = None) -> None:
+        chunking_config = chunking_config or config["chunking"]
+        count_tokens = TokenCounter(chunking_config.get("tokenizer",
+                                                        "heuristic"))
+        self.profiles = {
+            name: Chunker(name, count_tokens=count_tokens, **settings)
+            for name, settings in chunking_config["profiles"].items()
+        }
+        self.source_profiles = chunking_config["source_profiles"]
+        self.default_profile = chunking_config["default_profile"]
+
+    def profile_for(self, document: Document) -> Chunker:
+        name = self.source_profiles.get(document.metadata.get("source"),
+                                        self.default_profile)
+        return self.profiles[name]
+
+    def split_documents(self, documents: List[Document]) -> List[Document]:
+        chunks = []
+        for doc in documents:
+            chunks.extend(self.profile_for(doc).split_documents([doc]))
+        return chunks
@@ -21,3 +21,12 @@ class GradeAnswer(BaseModel):
 
     binary_score: str = Field(
         description="Answer addresses the question, 'yes' or 'no'")
+
+
+class GradeGeneration(BaseModel):
+    """Both generation checks, for graders that score them in one call."""
+
+    grounded_score: str = Field(
+        description="Answer is grounded in the facts, 'yes' or 'no'")
+    answer_score: str = Field(
+        description="Answer addresses the question, 'yes' or 'no'")
@@ -1,7 +1,22 @@
-from .chains import build_answer_grader_chain, build_hallucination_grader_chain
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from .chains import (build_answer_grader_chain, build_generation_grader_chain,
+                     build_hallucination_grader_chain)
+from .model import config
 
 answer_grader = build_answer_grader_chain()
 hallucination_grader = build_hallucination_grader_chain()
+generation_grader = build_generation_grader_chain()
+
+GRADING_MODES = ("serial", "parallel", "combined")
+grading_mode = config["grading"]["mode"]
+if grading_mode not in GRADING_MODES:
+    raise ValueError(f"Unknown grading mode: {grading_mode!r}, "
+                     f"expected one of {GRADING_MODES}")
+
+# Runs the speculative answer grade while the hallucination grade is in flight
+grading_executor = ThreadPoolExecutor(max_workers=4,
+                                      thread_name_prefix="grader")
 
 
 def decide_to_generate(state):
@@ -32,10 +47,28 @@ def decide_to_generate(state):
         return "generate"
 
 
+def _not_supported():
+    print("---DECISION: GENERATION IS NOT GROUNDED IN DOCUMENTS, RE-TRY---")
+    return "not supported"
+
+
+def _addresses_question(grade):
+    if grade == "yes":
+        print("---DECISION: GENERATION ADDRESSES QUESTION---")
+        return "useful"
+    print("---DECISION: GENERATION DOES NOT ADDRESS QUESTION---")
+    return "not useful"
+
+
 def grade_generation_v_documents_and_question(state):
     """
     Determines whether the generation is grounded in the document and answers question.
 
+    With `grading.mode` "serial" the answer grader only runs once the
+    generation is known to be grounded. "parallel" starts it alongside the
+    hallucination grader and discards its result if the generation is not
+    grounded; "combined" asks for both scores in one structured call.
+
     Args:
         state (dict): The current graph state
 
@@ -44,33 +77,92 @@ def grade_generation_v_documents_and_question(state):
     """
 
     print("---CHECK HALLUCINATIONS---")
-    question = state["question"]
-    documents = state["documents"]
-    generation = state["generation"]
+    inputs = {
+        "question": state["question"],
+        "documents": state["documents"],
+        "generation": state["generation"]
+    }
 
-    score = hallucination_grader.invoke({
-        "documents": documents,
-        "generation": generation
-    })
-    grade = score.binary_score
+    if grading_mode == "combined":
+        score = generation_grader.invoke(inputs)
+        if score.grounded_score != "yes":
+            return _not_supported()
+        print("---DECISION: GENERATION IS GROUNDED IN DOCUMENTS---")
+        return _addresses_question(score.answer_score)
+
+    answer = None
+    if grading_mode == "parallel":
+        answer = grading_executor.submit(answer_grader.invoke, inputs)
+    try:
+        grade = hallucination_grader.invoke(inputs).binary_score
+    except Exception:
+        if answer is not None:
+            answer.cancel()
+        raise
 
     # Check hallucination
-    if grade == "yes":
+    if grade != "yes":
+        if answer is not None:
+            answer.cancel()
+        return _not_supported()
+    print("---DECISION: GENERATION IS GROUNDED IN DOCUMENTS---")
+    # Check question-answering
+    print("---GRADE GENERATION vs QUESTION---")
+    if answer is not None:
+        score = answer.result()
+    else:
+        score = answer_grader.invoke(inputs)
+    return _addresses_question(score.binary_score)
+
+
+async def agrade_generation_v_documents_and_question(state):
+    """
+    Async variant of grade_generation_v_documents_and_question.
+
+    In "parallel" mode the answer grade is a task that is cancelled as soon
+    as the generation turns out not to be grounded.
+
+    Args:
+        state (dict): The current graph state
+
+    Returns:
+        str: Decision for next node to call
+    """
+
+    print("---CHECK HALLUCINATIONS---")
+    inputs = {
+        "question": state["question"],
+        "documents": state["documents"],
+        "generation": state["generation"]
+    }
+
+    if grading_mode == "combined":
+        score = await generation_grader.ainvoke(inputs)
+        if score.grounded_score != "yes":
+            return _not_supported()
         print("---DECISION: GENERATION IS GROUNDED IN DOCUMENTS---")
-        # Check question-answering
-        print("---GRADE GENERATION vs QUESTION---")
-        score = answer_grader.invoke({
-            "question": question,
-            "generation": generation
-        })
-        grade = score.binary_score
-        if grade == "yes":
-            print("---DECISION: GENERATION ADDRESSES QUESTION---")
-            return "useful"
-        else:
-            print("---DECISION: GENERATION DOES NOT ADDRESS QUESTION---")
-            return "not useful"
+        return _addresses_question(score.answer_score)
+
+    answer = None
+    if grading_mode == "parallel":
+        answer = asyncio.ensure_future(answer_grader.ainvoke(inputs))
+    try:
+        grade = (await hallucination_grader.ainvoke(inputs)).binary_score
+    except BaseException:
+        if answer is not None:
+            answer.cancel()
+        raise
+
+    # Check hallucination
+    if grade != "yes":
+        if answer is not None:
+            answer.cancel()
+        return _not_supported()
+    print("---DECISION: GENERATION IS GROUNDED IN DOCUMENTS---")
+    # Check question-answering
+    print("---GRADE GENERATION vs QUESTION---")
+    if answer is not None:
+        score = await answer
     else:
-        print(
-            "---DECISION: GENERATION IS NOT GROUNDED IN DOCUMENTS, RE-TRY---")
-        return "not supported"
+        score = await answer_grader.ainvoke(inputs)
+    return _addresses_question(score.binary_score)
@@ -1,10 +1,12 @@
 from typing import List
 from typing_extensions import TypedDict
+from langchain_core.runnables import RunnableLambda
 from langgraph.graph import END, StateGraph, START
 from .nodes import RAGNodes
-from .edges import decide_to_generate, grade_generation_v_documents_and_question
+from .edges import decide_to_generate, grade_generation_v_documents_and_question, agrade_generation_v_documents_and_question
 from .chains import build_retrieval_grader_chain, build_rag_chain, build_question_rewriter_chain
 from .tools import VectorStore
+from tracing import traced
 
 
 class GraphState(TypedDict):
@@ -23,25 +25,39 @@ class GraphState(TypedDict):
 
 class RAGGraph:
 
-    def __init__(self, vector_store: VectorStore):
-        """Initialize the RAG graph with nodes"""
+    def __init__(self, vector_store: VectorStore, search_filter=None):
+        """Initialize the RAG graph with nodes
+
+        Args:
+            vector_store: Vector store to retrieve from
+            search_filter: Optional Chroma `where` clause applied to retrieval
+        """
         self.rag_chain = build_rag_chain()
         self.vector_store = vector_store
         self.question_rewriter = build_question_rewriter_chain()
         self.retrieval_grader = build_retrieval_grader_chain()
-        self.nodes = RAGNodes(self.vector_store.get_retriever(),
+        self.nodes = RAGNodes(self.vector_store.get_retriever(search_filter),
                               self.rag_chain, self.question_rewriter,
                               self.retrieval_grader)
         self.workflow = StateGraph(GraphState)
         self._build_graph()
 
+    def _node(self, name: str) -> RunnableLambda:
+        """Wrap a node's sync and async implementations in one traced runnable"""
+        stage = f"rag.{name}"
+        return RunnableLambda(
+            traced("node", stage)(getattr(self.nodes, name)),
+            afunc=traced("node", stage)(getattr(self.nodes, f"a{name}")))
+
     def _build_graph(self):
         """Build the graph with nodes and edges"""
-        # Define the nodes
-        self.workflow.add_node("retrieve", self.nodes.retrieve)
-        self.workflow.add_node("grade_documents", self.nodes.grade_documents)
-        self.workflow.add_node("generate", self.nodes.generate)
-        self.workflow.add_node("transform_query", self.nodes.transform_query)
+        # Define the nodes (sync for invoke/stream, async for ainvoke/astream)
+        self.workflow.add_node("retrieve", self._node("retrieve"))
+        self.workflow.add_node("grade_documents",
+                               self._node("grade_documents"))
+        self.workflow.add_node("generate", self._node("generate"))
+        self.workflow.add_node("transform_query",
+                               self._node("transform_query"))
 
         # Build graph
         self.workflow.add_edge(START, "retrieve")
@@ -57,7 +73,11 @@ class RAGGraph:
         self.workflow.add_edge("transform_query", "retrieve")
         self.workflow.add_conditional_edges(
             "generate",
-            grade_generation_v_documents_and_question,
+            RunnableLambda(
+                traced("node", "rag.grade_generation")(
+                    grade_generation_v_documents_and_question),
+                afunc=traced("node", "rag.grade_generation")(
+                    agrade_generation_v_documents_and_question)),
             {
                 "not supported": "generate",
                 "useful": END,
@@ -0,0 +1,281 @@
+import json
+import os
+import re
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set
+from langchain_community.vectorstores import Chroma
+from ..clients import get_embeddings
+from .model import config
+from tracing import span
+
+# Written into the persist directory; names the collection searches use and
+# the embedding model its vectors came from
+ACTIVE_COLLECTION_FILE = "active_collection.json"
+
+# Collection langchain's Chroma wrapper uses when none is named
+DEFAULT_COLLECTION = "langchain"
+
+# Embedding settings that change the vectors a collection holds
+EMBEDDING_IDENTITY_KEYS = ("model", "base_url")
+
+
+def embedding_identity(embeddings_config: Dict[str, Any]) -> Dict[str, Any]:
+    """The parts of an `embeddings` config section that identify its vectors."""
+    return {key: embeddings_config.get(key) for key in EMBEDDING_IDENTITY_KEYS}
+
+
+def read_active_collection(persist_directory: str) -> Optional[Dict[str, Any]]:
+    """Active collection record of a persist directory, None before the first migration."""
+    try:
+        with open(os.path.join(persist_directory, ACTIVE_COLLECTION_FILE),
+                  "r", encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+
+def write_active_collection(persist_directory: str, collection: str,
+                            embeddings_config: Dict[str, Any]) -> None:
+    """Atomically point a persist directory at a collection."""
+    os.makedirs(persist_directory, exist_ok=True)
+    path = os.path.join(persist_directory, ACTIVE_COLLECTION_FILE)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(
+            {
+                "collection": collection,
+                "embeddings": embedding_identity(embeddings_config),
+                "switched_at": int(time.time()),
+            }, f)
+    os.replace(tmp_path, path)
+
+
+class IndexMigrator:
+    """
+    Re-embeds VectorStores into new collections in the background.
+
+    Chunks are paged out of a store's active collection and re-embedded
+    with the target embedding model in throttled batches, while searches
+    keep using the active collection. Catch-up passes then copy chunks added
+    in the meantime; the last one runs under the store's write lock,
+    together with the switch to the new collection and the rewrite of the
+    active collection file. The old collection is kept, so a switch can be
+    undone by editing that file. The shared store and every tenant shard
+    are migrated one after another, each into a collection of the same name
+    in its own persist directory.
+    """
+
+    def __init__(self,
+                 vector_store,
+                 batch_size: int = None,
+                 batch_interval: float = None,
+                 tenant_stores: Callable[[], List[Any]] = None) -> None:
+        """
+        Args:
+            vector_store: agent.rag.tools.VectorStore to migrate
+            batch_size: Chunks re-embedded per request to the embedding model
+            batch_interval: Seconds to pause between batches
+            tenant_stores: Returns the other stores to migrate along with
+                `vector_store` (e.g. TenantRouter.tenant_stores), called when
+                a migration starts
+        """
+        migration_config = config.get("migration", {})
+        self.vector_store = vector_store
+        self.tenant_stores = tenant_stores or (lambda: [])
+        self.batch_size = batch_size or migration_config.get("batch_size", 64)
+        self.batch_interval = (batch_interval if batch_interval is not None
+                               else migration_config.get("batch_interval", 0.5))
+        self._lock = threading.Lock()
+        self._thread = None
+        self._status = {"state": "idle"}
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def stores(self) -> List[Any]:
+        """Every store a migration covers, the shared one first."""
+        return [self.vector_store] + list(self.tenant_stores())
+
+    def status(self) -> Dict[str, Any]:
+        """Progress of the current or last migration."""
+        with self._lock:
+            status = dict(self._status)
+        total = status.get("total")
+        if total:
+            status["progress"] = round(status["migrated"] / total, 4)
+        status["active_collection"] = self.vector_store.collection_name
+        status["needs_migration"] = any(store.needs_migration
+                                        for store in self.stores())
+        return status
+
+    def _update(self, **values) -> None:
+        with self._lock:
+            self._status.update(values)
+
+    def start(self,
+              embeddings_config: Optional[Dict[str, Any]] = None,
+              collection_name: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Start a migration on a background thread.
+
+        Args:
+            embeddings_config: Target `embeddings` section, defaults to config.yaml
+            collection_name: Target collection, defaults to one named after
+                the model and the current time
+
+        Returns:
+            dict: Initial status
+
+        Raises:
+            RuntimeError: If a migration is already running
+            ValueError: If the target collection is the active one of a
+                store, or a store does not use the chroma backend
+        """
+        with self._lock:
+            if self.running:
+                raise RuntimeError("Index migration already in progress")
+            embeddings_config = {
+                **config["embeddings"],
+                **(embeddings_config or {})
+            }
+            collection_name = collection_name or self.collection_name_for(
+                embeddings_config["model"])
+            stores = self.stores()
+            if any(store.collection_name == collection_name
+                   for store in stores):
+                raise ValueError("Target collection is the active collection")
+            if any(store.backend != "chroma" for store in stores):
+                raise ValueError("Index migration supports the chroma backend only")
+            self._status = {
+                "state": "running",
+                "source_collection": self.vector_store.collection_name,
+                "target_collection": collection_name,
+                "embedding_model": embeddings_config["model"],
+                "stores": len(stores),
+                "stores_migrated": 0,
+                "total": None,
+                "migrated": 0,
+                "started_at": int(time.time()),
+                "finished_at": None,
+                "error": None,
+            }
+            self._thread = threading.Thread(target=self._run,
+                                            args=(stores, embeddings_config,
+                                                  collection_name),
+                                            name="index-migration",
+                                            daemon=True)
+            self._thread.start()
+        return self.status()
+
+    def wait(self, timeout: Optional[float] = None) -> Dict[str, Any]:
+        """Block until the running migration finishes, then return its status."""
+        if self._thread is not None:
+            self._thread.join(timeout)
+        return self.status()
+
+    @staticmethod
+    def collection_name_for(model: str) -> str:
+        # Chroma names: 3-63 characters of [a-zA-Z0-9._-], alphanumeric at both ends
+        slug = re.sub(r"[^a-zA-Z0-9]+", "-", model).strip("-")[:40] or "index"
+        return f"{slug}-{time.strftime('%Y%m%d%H%M%S')}"
+
+    def _run(self, stores: List[Any], embeddings_config: Dict[str, Any],
+             collection_name: str) -> None:
+        try:
+            target_embeddings = get_embeddings(embeddings_config)
+            self._update(total=sum(store.index._collection.count()
+                                   for store in stores
+                                   if store.index is not None))
+            with span("vectorstore", "migration", collection=collection_name):
+                for store in stores:
+                    self._migrate(store, target_embeddings, embeddings_config,
+                                  collection_name)
+                    with self._lock:
+                        self._status["stores_migrated"] += 1
+            self._update(state="completed", finished_at=int(time.time()))
+            print(f"Index migrated to collection {collection_name}")
+        except Exception as e:
+            print(f"Index migration failed: {str(e)}")
+            self._update(state="failed",
+                         error=str(e),
+                         finished_at=int(time.time()))
+
+    def _migrate(self, store, target_embeddings,
+                 embeddings_config: Dict[str, Any],
+                 collection_name: str) -> None:
+        """Copy one store into a new collection and switch it over."""
+        source = store.index
+        target = None
+        with self._lock:
+            done_before = self._status["migrated"]
+        try:
+            target = Chroma(collection_name=collection_name,
+                            embedding_function=target_embeddings,
+                            persist_directory=store.path)
+            copied: Set[str] = set()
+            if source is not None:
+                self._copy(source, target, self._pages(source), copied,
+                           done_before)
+                # Chunks added while the bulk pass ran, without blocking writers
+                self._copy(source, target, self._missing(source, copied),
+                           copied, done_before)
+
+            # Final catch-up and switch-over with writers held off
+            with store.lock:
+                if source is not None:
+                    self._copy(source, target, self._missing(source, copied),
+                               copied, done_before)
+                self._update(state="switching")
+                store.switch_index(target, collection_name, target_embeddings,
+                                   embeddings_config)
+            self._update(state="running")
+        except Exception:
+            if target is not None and store.index is not target:
+                target.delete_collection()
+            raise
+
+    def _pages(self, source: Chroma) -> Iterable[Dict[str, List]]:
+        """Batches of the source collection in storage order."""
+        offset = 0
+        while True:
+            page = source._collection.get(limit=self.batch_size,
+                                          offset=offset,
+                                          include=["documents", "metadatas"])
+            if not page["ids"]:
+                return
+            yield page
+            offset += len(page["ids"])
+
+    def _missing(self, source: Chroma,
+                 copied: Set[str]) -> Iterable[Dict[str, List]]:
+        """Batches of source chunks that have not been copied yet."""
+        ids = [i for i in source._collection.get(include=[])["ids"]
+               if i not in copied]
+        for start in range(0, len(ids), self.batch_size):
+            yield source._collection.get(ids=ids[start:start +
+                                                 self.batch_size],
+                                         include=["documents", "metadatas"])
+
+    def _copy(self, source: Chroma, target: Chroma,
+              pages: Iterable[Dict[str, List]], copied: Set[str],
+              done_before: int = 0) -> None:
+        for page in pages:
+            ids = [i for i in page["ids"] if i not in copied]
+            if not ids:
+                continue
+            rows = [(i, text, metadata or {}) for i, text, metadata in zip(
+                page["ids"], page["documents"], page["metadatas"])
+                    if i not in copied]
+            # Keep ids so the catch-up passes can tell what is done
+            target.add_texts([text for _, text, _ in rows],
+                             metadatas=[metadata for _, _, metadata in rows],
+                             ids=[i for i, _, _ in rows])
+            copied.update(ids)
+            with self._lock:
+                self._status["migrated"] = done_before + len(copied)
+                if (self._status["total"] is not None
+                        and self._status["migrated"] > self._status["total"]):
+                    self._status["total"] = self._status["migrated"]
+            time.sleep(self.batch_interval)
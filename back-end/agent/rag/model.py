@@ -1,7 +1,6 @@
-from langchain_openai import ChatOpenAI
-from langchain_openai import OpenAIEmbeddings
 import yaml
 from pathlib import Path
+from ..clients import get_chat_model, get_embeddings
 
 # 读取配置文件
 config_path = Path(__file__).parent / "config.yaml"
@@ -11,15 +10,8 @@ if not config_path.exists():
 with open(config_path, "r") as f:
     config = yaml.safe_load(f)
 
-llm = ChatOpenAI(
-    openai_api_base=config["llm"]["api_base"],
-    model=config["llm"]["model"],
-    openai_api_key=config["llm"]["api_key"],
-    temperature=config["llm"]["temperature"],
-)
+# Clients come from the shared registry, so both pipelines reuse the same
+# connection pools when they point at the same endpoints
+llm = get_chat_model(config["llm"])
 
-embeddings = OpenAIEmbeddings(
-    model=config["embeddings"]["model"],
-    base_url=config["embeddings"]["base_url"],
-    api_key=config["embeddings"]["api_key"],
-)
+embeddings = get_embeddings(config["embeddings"])
@@ -1,3 +1,4 @@
+import asyncio
 from typing import Dict, Any
 
 
@@ -59,3 +60,60 @@ class RAGNodes:
             else:
                 print("---GRADE: DOCUMENT NOT RELEVANT---")
         return {"documents": filtered_docs, "question": question}
+
+    # Async variants used when the graph runs under an event loop (ASGI
+    # serving). They mirror the sync nodes above but await the async client.
+
+    async def aretrieve(self, state: Dict[str, Any]) -> Dict[str, Any]:
+        """Retrieve documents"""
+        print("---RETRIEVE---")
+        question = state["question"]
+        documents = await self.retriever.ainvoke(question)
+        return {"documents": documents, "question": question}
+
+    async def agenerate(self, state: Dict[str, Any]) -> Dict[str, Any]:
+        """Generate answer"""
+        print("---GENERATE---")
+        question = state["question"]
+        documents = state["documents"]
+        generation = await self.rag_chain.ainvoke({
+            "context": documents,
+            "question": question
+        })
+        return {
+            "documents": documents,
+            "question": question,
+            "generation": generation
+        }
+
+    async def atransform_query(self, state: Dict[str,
+                                                Any]) -> Dict[str, Any]:
+        """Transform the query to produce a better question"""
+        print("---TRANSFORM QUERY---")
+        question = state["question"]
+        documents = state["documents"]
+        better_question = await self.question_rewriter.ainvoke(
+            {"question": question})
+        return {"documents": documents, "question": better_question}
+
+    async def agrade_documents(self, state: Dict[str,
+                                                Any]) -> Dict[str, Any]:
+        """Determines whether the retrieved documents are relevant, grading all documents concurrently"""
+        print("---CHECK DOCUMENT RELEVANCE TO QUESTION---")
+        question = state["question"]
+        documents = state["documents"]
+
+        scores = await asyncio.gather(*[
+            self.retrieval_grader.ainvoke({
+                "question": question,
+                "document": d.page_content
+            }) for d in documents
+        ])
+        filtered_docs = []
+        for d, score in zip(documents, scores):
+            if score.binary_score == "yes":
+                print("---GRADE: DOCUMENT RELEVANT---")
+                filtered_docs.append(d)
+            else:
+                print("---GRADE: DOCUMENT NOT RELEVANT---")
+        return {"documents": filtered_docs, "question": question}
@@ -1,10 +1,12 @@
 from .tools import VectorStore
 from .graph import RAGGraph
 from pprint import pprint
+from tracing import traced
 
 
-def get_rag_answer(query, vector_store):
-    graph = RAGGraph(vector_store)
+@traced("pipeline", "rag")
+def get_rag_answer(query, vector_store, search_filter=None):
+    graph = RAGGraph(vector_store, search_filter)
     app = graph.compile()
     # Run
     inputs = {"question": query}
@@ -15,4 +17,17 @@ def get_rag_answer(query, vector_store):
     return value["generation"]
 
 
+@traced("pipeline", "rag")
+async def aget_rag_answer(query, vector_store, search_filter=None):
+    graph = RAGGraph(vector_store, search_filter)
+    app = graph.compile()
+    # Run with async nodes so LLM calls do not block the event loop
+    inputs = {"question": query}
+    async for output in app.astream(inputs):
+        for key, value in output.items():
+            pprint(f"Node '{key}':")
+        pprint("\n---\n")
+    return value["generation"]
+
+
 # Final generation
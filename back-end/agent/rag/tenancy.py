@@ -0,0 +1,214 @@
+import asyncio
+import os
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+from langchain.schema import Document
+from langchain_core.callbacks import (AsyncCallbackManagerForRetrieverRun,
+                                      CallbackManagerForRetrieverRun)
+from langchain_core.retrievers import BaseRetriever
+from .model import config
+from .tools import VectorStore
+from tracing import traced
+
+tenancy_config = config["tenancy"]
+
+# Shared by every tenant's fan-out searches
+fanout_executor = ThreadPoolExecutor(max_workers=tenancy_config["max_workers"],
+                                     thread_name_prefix="shard-search")
+
+
+def _safe_name(name: str) -> str:
+    return re.sub(r"[^a-zA-Z0-9_-]", "_", str(name)) or "default"
+
+
+def _routed_value(search_filter: Optional[Dict[str, Any]],
+                  key: str) -> Optional[str]:
+    """Value a filter requires for `key`, if it pins it to exactly one."""
+    if not search_filter:
+        return None
+    clauses = search_filter.get("$and", [search_filter])
+    for clause in clauses:
+        value = clause.get(key)
+        if isinstance(value, dict):
+            value = value.get("$eq")
+        if value is not None and not isinstance(value, dict):
+            return value
+    return None
+
+
+class ShardedVectorStore(VectorStore):
+    """
+    One tenant's documents, split into shards by a metadata key.
+
+    Each shard is a VectorStore with its own persist directory under
+    `path`, keyed by the document's `shard_by` metadata (the source type
+    by default). A search whose filter pins that key goes to one shard;
+    otherwise every shard of the tenant is searched in parallel and the
+    results are merged by score, so search cost follows the tenant's own
+    data.
+    """
+
+    def __init__(self, path: str, shard_by: str = None) -> None:
+        super().__init__()
+        self.path = path
+        self.shard_by = shard_by or tenancy_config["shard_by"]
+        self.shards: Dict[str, VectorStore] = {}
+        self._shards_lock = threading.Lock()
+        os.makedirs(path, exist_ok=True)
+        for name in sorted(os.listdir(path)):
+            if os.path.isdir(os.path.join(path, name)):
+                self.shards[name] = VectorStore(os.path.join(path, name))
+
+    def _shard(self, key: Any) -> VectorStore:
+        name = _safe_name(key if key is not None else "default")
+        with self._shards_lock:
+            if name not in self.shards:
+                self.shards[name] = VectorStore(os.path.join(self.path, name))
+            return self.shards[name]
+
+    def all_shards(self) -> List[VectorStore]:
+        with self._shards_lock:
+            return list(self.shards.values())
+
+    def _shards_for(self, search_filter: Optional[Dict[str, Any]]) -> List[VectorStore]:
+        value = _routed_value(search_filter, self.shard_by)
+        with self._shards_lock:
+            if value is None:
+                return list(self.shards.values())
+            shard = self.shards.get(_safe_name(value))
+            return [shard] if shard is not None else []
+
+    @traced("vectorstore", "shards.add")
+    def create_index(self, documents: List[Document], split: bool = True):
+        groups: Dict[Any, List[Document]] = {}
+        for doc in documents:
+            groups.setdefault(doc.metadata.get(self.shard_by), []).append(doc)
+        for key, docs in groups.items():
+            self._shard(key).create_index(docs, split)
+        return self
+
+    @staticmethod
+    def _merge(results: List[List[Tuple[Document, float]]],
+               k: int) -> List[Tuple[Document, float]]:
+        # Scores are distances, lower is closer
+        merged = [pair for shard_results in results for pair in shard_results]
+        return sorted(merged, key=lambda pair: pair[1])[:k]
+
+    def search_with_score(self,
+                          query: str,
+                          k: int = 5,
+                          filter: Optional[Dict[str, Any]] = None
+                          ) -> List[Tuple[Document, float]]:
+        shards = [s for s in self._shards_for(filter) if s.index is not None]
+        if len(shards) == 1:
+            return shards[0].index.similarity_search_with_score(query,
+                                                                k=k,
+                                                                filter=filter)
+        futures = [
+            fanout_executor.submit(shard.index.similarity_search_with_score,
+                                   query,
+                                   k=k,
+                                   filter=filter) for shard in shards
+        ]
+        return self._merge([future.result() for future in futures], k)
+
+    async def asearch_with_score(self,
+                                 query: str,
+                                 k: int = 5,
+                                 filter: Optional[Dict[str, Any]] = None
+                                 ) -> List[Tuple[Document, float]]:
+        shards = [s for s in self._shards_for(filter) if s.index is not None]
+        results = await asyncio.gather(*[
+            shard.index.asimilarity_search_with_score(query, k=k, filter=filter)
+            for shard in shards
+        ])
+        return self._merge(results, k)
+
+    @traced("vectorstore", "shards.search")
+    def search(self,
+               query: str,
+               k: int = 5,
+               filter: Optional[Dict[str, Any]] = None) -> List[Document]:
+        return [doc for doc, _ in self.search_with_score(query, k, filter)]
+
+    @traced("vectorstore", "shards.search")
+    async def asearch(self,
+                      query: str,
+                      k: int = 5,
+                      filter: Optional[Dict[str, Any]] = None) -> List[Document]:
+        return [
+            doc for doc, _ in await self.asearch_with_score(query, k, filter)
+        ]
+
+    @traced("vectorstore", "shards.search_list")
+    def search_list(self,
+                    query_list: List[str],
+                    filter: Optional[Dict[str, Any]] = None) -> List[Document]:
+        return [
+            self.search_with_score(query, k=5, filter=filter)
+            for query in query_list
+        ]
+
+    def get_retriever(self, filter: Optional[Dict[str, Any]] = None):
+        return ShardedRetriever(store=self, search_filter=filter)
+
+
+class ShardedRetriever(BaseRetriever):
+    """Retriever over all relevant shards of a ShardedVectorStore."""
+
+    store: Any
+    search_filter: Optional[Dict[str, Any]] = None
+    k: int = 4
+
+    def _get_relevant_documents(
+            self, query: str, *,
+            run_manager: CallbackManagerForRetrieverRun) -> List[Document]:
+        return self.store.search(query, k=self.k, filter=self.search_filter)
+
+    async def _aget_relevant_documents(
+            self, query: str, *,
+            run_manager: AsyncCallbackManagerForRetrieverRun) -> List[Document]:
+        return await self.store.asearch(query,
+                                        k=self.k,
+                                        filter=self.search_filter)
+
+
+class TenantRouter:
+    """Maps a tenant (a user's workspace) to its own sharded vector store."""
+
+    def __init__(self, base_path: str, default_store: VectorStore) -> None:
+        """
+        Args:
+            base_path: Directory holding one sub-directory per tenant
+            default_store: Store used for requests without a tenant
+        """
+        self.base_path = base_path
+        self.default_store = default_store
+        self._stores: Dict[str, ShardedVectorStore] = {}
+        self._lock = threading.Lock()
+
+    def store_for(self, tenant: Optional[str]) -> VectorStore:
+        if not tenant:
+            return self.default_store
+        name = _safe_name(tenant)
+        with self._lock:
+            if name not in self._stores:
+                self._stores[name] = ShardedVectorStore(
+                    os.path.join(self.base_path, name))
+            return self._stores[name]
+
+    def tenant_stores(self) -> List[VectorStore]:
+        """
+        Every shard of every tenant with a directory under `base_path`,
+        including tenants no request has touched since startup, so index
+        migration covers them all.
+        """
+        if os.path.isdir(self.base_path):
+            for name in sorted(os.listdir(self.base_path)):
+                if os.path.isdir(os.path.join(self.base_path, name)):
+                    self.store_for(name)
+        with self._lock:
+            stores = list(self._stores.values())
+        return [shard for store in stores for shard in store.all_shards()]
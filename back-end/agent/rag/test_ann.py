@@ -0,0 +1,174 @@
+import sqlite3
+import tempfile
+import unittest
+from unittest.mock import Mock, patch
+import numpy as np
+from ann import FaissVectorStore, matches_filter, quantized_factory
+
+
+def one_hot(i, dim=8):
+    vector = np.zeros(dim, dtype=np.float32)
+    vector[i % dim] = 1.0
+    return vector
+
+
+class TestMatchesFilter(unittest.TestCase):
+
+    def test_build_filter_clauses(self):
+        metadata = {"source": "audio", "speaker": "speaker_0", "ingest_time": 100}
+        self.assertTrue(matches_filter(metadata, None))
+        self.assertTrue(matches_filter(metadata, {"source": "audio"}))
+        self.assertFalse(matches_filter(metadata, {"source": "text"}))
+        self.assertTrue(
+            matches_filter(
+                metadata, {
+                    "$and": [{
+                        "speaker": "speaker_0"
+                    }, {
+                        "ingest_time": {
+                            "$gte": 50
+                        }
+                    }, {
+                        "ingest_time": {
+                            "$lte": 100
+                        }
+                    }]
+                }))
+        self.assertFalse(matches_filter(metadata, {"ingest_time": {"$gt": 100}}))
+        self.assertFalse(matches_filter({}, {"ingest_time": {"$gte": 0}}))
+
+
+class TestQuantizedFactory(unittest.TestCase):
+
+    def test_replaces_vector_encoding(self):
+        self.assertEqual(quantized_factory("HNSW32,Flat"), "HNSW32,Flat")
+        self.assertEqual(quantized_factory("HNSW32,Flat", "int8"),
+                         "HNSW32,SQ8")
+        self.assertEqual(quantized_factory("IVF64,Flat", "pq", 16),
+                         "IVF64,PQ16")
+        self.assertEqual(quantized_factory("Flat", "int8"), "SQ8")
+        with self.assertRaises(ValueError):
+            quantized_factory("HNSW32,Flat", "int4")
+
+
+class TestFaissVectorStore(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        # 用 one-hot 向量作为嵌入, 结果可预测
+        self.embedding = Mock()
+        self.embedding.embed_documents.side_effect = lambda texts: [
+            one_hot(int(t.split()[1])) for t in texts
+        ]
+        self.embedding.embed_query.side_effect = lambda text: one_hot(
+            int(text.split()[1]))
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def create(self, **kwargs):
+        return FaissVectorStore(self.tmp.name, self.embedding, **kwargs)
+
+    def test_search_returns_nearest_with_chroma_distance(self):
+        store = self.create(index_factory="HNSW8,Flat")
+        store.add_texts([f"chunk {i}" for i in range(8)],
+                        [{"n": i} for i in range(8)])
+        results = store.similarity_search_with_score("query 3", k=1)
+        self.assertEqual(results[0][0].page_content, "chunk 3")
+        self.assertAlmostEqual(results[0][1], 0.0, places=5)
+
+    def test_filter_widens_search(self):
+        store = self.create(index_factory="HNSW8,Flat", overfetch=1)
+        store.add_texts([f"chunk {i}" for i in range(32)],
+                        [{"source": "audio" if i == 30 else "text"}
+                         for i in range(32)])
+        results = store.similarity_search("query 3", k=1,
+                                          filter={"source": "audio"})
+        self.assertEqual([d.page_content for d in results], ["chunk 30"])
+
+    def test_reloads_from_disk(self):
+        store = self.create(index_factory="HNSW8,Flat")
+        store.add_texts([f"chunk {i}" for i in range(8)])
+        reloaded = self.create()
+        self.assertEqual(reloaded.count, 8)
+        self.assertEqual(
+            reloaded.similarity_search("query 5", k=1)[0].page_content,
+            "chunk 5")
+        # 内存映射加载后仍可写入
+        reloaded.add_texts(["chunk 6"])
+        self.assertEqual(reloaded.count, 9)
+
+    def test_failed_insert_keeps_ids_aligned(self):
+        """重复的 doc_id 插入失败后, 向量文件和索引不能错位"""
+        store = self.create(index_factory="HNSW8,Flat")
+        store.add_texts(["chunk 0", "chunk 1"], ids=["a", "b"])
+        with self.assertRaises(sqlite3.IntegrityError):
+            store.add_texts(["chunk 2", "chunk 3"], ids=["c", "a"])
+        self.assertEqual(store.count, 2)
+
+        store.add_texts(["chunk 3"], ids=["d"])
+        self.assertEqual(store.count, 3)
+        self.assertEqual(store._index.ntotal, 3)
+        results = store.similarity_search_with_score("query 3", k=1)
+        self.assertEqual(results[0][0].page_content, "chunk 3")
+        self.assertAlmostEqual(results[0][1], 0.0, places=5)
+
+    def test_untrained_index_searches_exactly_until_trained(self):
+        store = self.create(index_factory="IVF2,Flat", train_size=16)
+        store.add_texts([f"chunk {i}" for i in range(8)])
+        self.assertFalse(store._index.is_trained)
+        self.assertEqual(
+            store.similarity_search("query 2", k=1)[0].page_content, "chunk 2")
+        store.add_texts([f"chunk {i}" for i in range(8, 16)])
+        self.assertTrue(store._index.is_trained)
+        self.assertEqual(store._index.ntotal, 16)
+
+    def test_quantized_index_rescored_at_full_precision(self):
+        rng = np.random.default_rng(0)
+        vectors = rng.standard_normal((64, 16)).astype(np.float32)
+        vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+        store = self.create(index_factory="HNSW8,Flat",
+                            quantization="int8",
+                            train_size=64,
+                            rescore=4)
+        store.add_embeddings([f"chunk {i}" for i in range(64)], vectors)
+        self.assertEqual(store.index_factory, "HNSW8,SQ8")
+        self.assertTrue(store._index.is_trained)
+
+        results = store.similarity_search_by_vector_with_score(vectors[7], k=3)
+        self.assertEqual(results[0][0].page_content, "chunk 7")
+        # 重新打分后的距离是精确值
+        self.assertAlmostEqual(results[0][1], 0.0, places=5)
+        stats = store.memory_stats()
+        self.assertEqual(stats["vectors"], 64)
+        self.assertEqual(stats["full_precision_bytes"], 64 * 16 * 4)
+        self.assertTrue(stats["quantized"])
+        self.assertEqual(stats["bytes_per_vector"], 16)
+
+    def test_full_precision_index_is_not_rescored(self):
+        """未量化的索引不做重新打分, 不读取全精度向量"""
+        store = self.create(index_factory="HNSW8,Flat", rescore=4)
+        store.add_texts([f"chunk {i}" for i in range(8)])
+        self.assertFalse(store.quantized)
+        with patch.object(store, '_vector_map') as vector_map:
+            results = store.similarity_search("query 3", k=1)
+        vector_map.assert_not_called()
+        self.assertEqual(results[0].page_content, "chunk 3")
+
+    def test_memory_stats_describe_loaded_index(self):
+        """重新打开时按磁盘上的索引报告, 而不是当前配置"""
+        store = self.create(index_factory="HNSW8,Flat")
+        store.add_texts([f"chunk {i}" for i in range(8)])
+        store.save()
+
+        reloaded = self.create(index_factory="HNSW8,Flat",
+                               quantization="int8")
+        stats = reloaded.memory_stats()
+        self.assertEqual(stats["index_factory"], "HNSW8,Flat")
+        self.assertEqual(stats["index_type"], "IndexHNSWFlat")
+        self.assertEqual(stats["bytes_per_vector"], 8 * 4)
+        self.assertFalse(stats["quantized"])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,20 +1,30 @@
+import os
+import sys
 import unittest
 from unittest.mock import Mock, patch
-from chains import (
+from langchain_core.messages import AIMessage
+from langchain_core.runnables import RunnableLambda
+
+# chains.py uses relative imports, so import it through the package
+sys.path.insert(
+    0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", ".."))
+from agent.rag.chains import (
     build_retrieval_grader_chain,
     build_rag_chain,
     build_hallucination_grader_chain,
     build_answer_grader_chain,
     build_question_rewriter_chain,
+    build_generation_grader_chain,
+    parse_binary_score,
 )
-from data_model import GradeDocuments, GradeHallucinations, GradeAnswer
+from agent.rag.data_model import GradeDocuments, GradeHallucinations, GradeAnswer, GradeGeneration
 
 class TestChains(unittest.TestCase):
     def setUp(self):
         self.mock_llm = Mock()
         self.mock_llm.with_structured_output.return_value = Mock()
 
-    @patch('chains.llm')
+    @patch('agent.rag.chains.llm')
     def test_build_retrieval_grader_chain(self, mock_llm):
         # Arrange
         mock_llm.with_structured_output.return_value = Mock()
@@ -26,8 +36,8 @@ class TestChains(unittest.TestCase):
         self.assertIsNotNone(chain)
         mock_llm.with_structured_output.assert_called_once_with(GradeDocuments)
 
-    @patch('chains.hub')
-    @patch('chains.llm')
+    @patch('agent.rag.chains.hub')
+    @patch('agent.rag.chains.llm')
     def test_build_rag_chain(self, mock_llm, mock_hub):
         # Arrange
         mock_hub.pull.return_value = Mock()
@@ -39,7 +49,7 @@ class TestChains(unittest.TestCase):
         self.assertIsNotNone(chain)
         mock_hub.pull.assert_called_once_with("rlm/rag-prompt")
 
-    @patch('chains.llm')
+    @patch('agent.rag.chains.llm')
     def test_build_hallucination_grader_chain(self, mock_llm):
         # Arrange
         mock_llm.with_structured_output.return_value = Mock()
@@ -51,7 +61,7 @@ class TestChains(unittest.TestCase):
         self.assertIsNotNone(chain)
         mock_llm.with_structured_output.assert_called_once_with(GradeHallucinations)
 
-    @patch('chains.llm')
+    @patch('agent.rag.chains.llm')
     def test_build_answer_grader_chain(self, mock_llm):
         # Arrange
         mock_llm.with_structured_output.return_value = Mock()
@@ -63,7 +73,27 @@ class TestChains(unittest.TestCase):
         self.assertIsNotNone(chain)
         mock_llm.with_structured_output.assert_called_once_with(GradeAnswer)
 
-    @patch('chains.llm')
+    @patch('agent.rag.chains.llm')
+    def test_build_generation_grader_chain(self, mock_llm):
+        """测试合并评分: 一次调用同时返回幻觉和答案两个评分"""
+        # Arrange
+        grade = GradeGeneration(grounded_score="yes", answer_score="no")
+        mock_llm.with_structured_output.return_value = RunnableLambda(
+            lambda _: grade)
+
+        # Act
+        chain = build_generation_grader_chain()
+        result = chain.invoke({
+            "documents": "d",
+            "question": "q",
+            "generation": "g"
+        })
+
+        # Assert
+        self.assertEqual(result, grade)
+        mock_llm.with_structured_output.assert_called_once_with(GradeGeneration)
+
+    @patch('agent.rag.chains.llm')
     def test_build_question_rewriter_chain(self, mock_llm):
         # Arrange
         mock_llm.return_value = Mock()
@@ -74,6 +104,42 @@ class TestChains(unittest.TestCase):
         # Assert
         self.assertIsNotNone(chain)
 
+    def test_parse_binary_score(self):
+        self.assertEqual(parse_binary_score(" Yes"), "yes")
+        self.assertEqual(parse_binary_score("'no'"), "no")
+        self.assertEqual(parse_binary_score("是"), "yes")
+        self.assertIsNone(parse_binary_score("maybe"))
+        self.assertIsNone(parse_binary_score(""))
+
+    @patch('agent.rag.chains.llm')
+    def test_fast_binary_grader_parses_single_token(self, mock_llm):
+        """测试快速模式: 单个 token 直接解析, 不走结构化输出"""
+        structured = Mock(side_effect=lambda _: GradeDocuments(binary_score="no"))
+        mock_llm.with_structured_output.return_value = RunnableLambda(structured)
+        mock_llm.bind.return_value = RunnableLambda(
+            lambda _: AIMessage(content="yes"))
+
+        chain = build_retrieval_grader_chain(fast=True)
+        result = chain.invoke({"question": "q", "document": "d"})
+
+        self.assertEqual(result, GradeDocuments(binary_score="yes"))
+        mock_llm.bind.assert_called_once_with(
+            max_tokens=1, extra_body={"guided_choice": ["yes", "no"]})
+        structured.assert_not_called()
+
+    @patch('agent.rag.chains.llm')
+    def test_fast_binary_grader_falls_back(self, mock_llm):
+        """测试快速模式: 无法解析时回退到结构化输出"""
+        mock_llm.with_structured_output.return_value = RunnableLambda(
+            lambda _: GradeAnswer(binary_score="no"))
+        mock_llm.bind.return_value = RunnableLambda(
+            lambda _: AIMessage(content="The"))
+
+        chain = build_answer_grader_chain(fast=True)
+        result = chain.invoke({"question": "q", "generation": "g"})
+
+        self.assertEqual(result, GradeAnswer(binary_score="no"))
+
     # Integration tests
     def test_retrieval_grader_chain_integration(self):
         chain = build_retrieval_grader_chain()
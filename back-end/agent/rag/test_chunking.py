@@ -0,0 +1,114 @@
+import os
+import sys
+import unittest
+from langchain.schema import Document
+
+sys.path.insert(
+    0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", ".."))
+from agent.rag.chunking import Chunker, ChunkingEngine, TokenCounter
+
+# 启发式计数: 每个中文字符和全角标点各算一个 token, 下列句子各 5 个 token
+A, B, C, D = "一二三四。", "五六七八。", "甲乙丙丁。", "春夏秋冬。"
+
+
+def chunker(split_on="sentence", chunk_tokens=10, overlap_tokens=0):
+    return Chunker("test",
+                   chunk_tokens=chunk_tokens,
+                   overlap_tokens=overlap_tokens,
+                   split_on=split_on,
+                   count_tokens=TokenCounter("heuristic"))
+
+
+class TestChunker(unittest.TestCase):
+
+    def test_sentence_mode_packs_whole_sentences(self):
+        """测试按句子切分时整句打包, 不超过 chunk_tokens"""
+        self.assertEqual(chunker().split_text(A + B + C + D),
+                         [A + B, C + D])
+        self.assertEqual(chunker().split_text("One two. Three four."),
+                         ["One two. Three four."])
+
+    def test_overlap_repeats_trailing_sentences(self):
+        """测试重叠按整句计算, 恰好等于 overlap_tokens 的句子会被带入下一块"""
+        self.assertEqual(
+            chunker(overlap_tokens=5).split_text(A + B + C + D),
+            [A + B, B + C, C + D])
+
+    def test_overlap_smaller_than_a_sentence_is_dropped(self):
+        """测试 overlap_tokens 小于一个句子时不重叠"""
+        self.assertEqual(
+            chunker(overlap_tokens=4).split_text(A + B + C + D),
+            [A + B, C + D])
+
+    def test_overlap_never_overflows_a_chunk(self):
+        """测试带入的重叠放不下新句子时被丢弃"""
+        long = "子丑寅卯辰巳午。"
+        chunks = chunker(overlap_tokens=10).split_text(A + B + long)
+        self.assertEqual(chunks, [A + B, long])
+
+    def test_long_sentence_is_hard_split(self):
+        """测试超过 chunk_tokens 的句子被切成块大小的片段"""
+        chunks = chunker(chunk_tokens=4).split_text("一二三四五六七八九。")
+        self.assertEqual(chunks, ["一二三四", "五六七八", "九。"])
+
+    def test_paragraph_mode_ends_half_full_chunks_at_paragraphs(self):
+        """测试按段落切分: 块已过半时新段落另起一块, 否则继续打包"""
+        split = chunker("paragraph", chunk_tokens=20).split_text
+        self.assertEqual(split(A + B + "\n\n" + C), [A + B, C])
+        self.assertEqual(split(A + "\n\n" + C), [A + C])
+
+    def test_heading_mode_never_mixes_sections(self):
+        """测试按标题切分: 块不会跨越两个 markdown 章节, 章节之间不重叠"""
+        text = f"# 第一章\n{A}\n# 第二章\n{B}"
+        chunks = chunker("heading", chunk_tokens=50,
+                         overlap_tokens=20).split_text(text)
+        self.assertEqual(chunks, [f"# 第一章\n{A}", f"# 第二章\n{B}"])
+
+    def test_empty_text(self):
+        self.assertEqual(chunker().split_text(" \n\n "), [])
+
+
+class TestChunkingEngine(unittest.TestCase):
+
+    def setUp(self):
+        self.engine = ChunkingEngine({
+            "tokenizer": "heuristic",
+            "default_profile": "web",
+            "source_profiles": {
+                "audio": "transcript"
+            },
+            "profiles": {
+                "web": {
+                    "chunk_tokens": 10,
+                    "split_on": "paragraph"
+                },
+                "transcript": {
+                    "chunk_tokens": 5,
+                    "overlap_tokens": 5,
+                    "split_on": "sentence"
+                },
+            },
+        })
+
+    def test_profile_follows_source(self):
+        """测试按文档来源选择分块配置, 未知来源使用默认配置"""
+        profile = lambda source: self.engine.profile_for(
+            Document(page_content="", metadata={"source": source})).name
+        self.assertEqual(profile("audio"), "transcript")
+        self.assertEqual(profile("text"), "web")
+        self.assertEqual(profile(None), "web")
+
+    def test_split_documents_records_profile_and_index(self):
+        chunks = self.engine.split_documents([
+            Document(page_content=A + B, metadata={"source": "audio"}),
+            Document(page_content=A + B, metadata={"source": "text"}),
+        ])
+        self.assertEqual([(c.page_content, c.metadata["chunk_profile"],
+                           c.metadata["chunk_index"]) for c in chunks],
+                         [(A, "transcript", 0), (B, "transcript", 1),
+                          (A + B, "web", 0)])
+        self.assertEqual(chunks[0].metadata["source"], "audio")
+
+
+if __name__ == '__main__':
+    unittest.main()
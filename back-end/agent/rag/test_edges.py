@@ -0,0 +1,83 @@
+import asyncio
+import os
+import sys
+import unittest
+from unittest.mock import AsyncMock, Mock, patch
+
+# edges.py uses relative imports, so import it through the package
+sys.path.insert(
+    0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", ".."))
+from agent.rag import edges
+from agent.rag.edges import (agrade_generation_v_documents_and_question,
+                             grade_generation_v_documents_and_question)
+
+STATE = {"question": "q", "documents": ["d"], "generation": "g"}
+
+
+def grader(score):
+    """Grader stand-in returning a binary score, sync and async."""
+    mock = Mock()
+    mock.invoke.return_value = Mock(binary_score=score)
+    mock.ainvoke = AsyncMock(return_value=Mock(binary_score=score))
+    return mock
+
+
+class TestGradeGeneration(unittest.TestCase):
+
+    def grade(self, mode, grounded, answers, run_async=False):
+        self.hallucination = grader(grounded)
+        self.answer = grader(answers)
+        with patch('agent.rag.edges.grading_mode', mode), \
+                patch('agent.rag.edges.hallucination_grader', self.hallucination), \
+                patch('agent.rag.edges.answer_grader', self.answer):
+            if run_async:
+                return asyncio.run(
+                    agrade_generation_v_documents_and_question(STATE))
+            return grade_generation_v_documents_and_question(STATE)
+
+    def test_serial_skips_answer_grade_when_not_grounded(self):
+        """测试串行模式: 幻觉检查失败时不调用答案评分"""
+        self.assertEqual(self.grade("serial", "no", "yes"), "not supported")
+        self.answer.invoke.assert_not_called()
+        self.assertEqual(self.grade("serial", "yes", "no"), "not useful")
+
+    def test_parallel_runs_both_graders(self):
+        """测试并行模式: 两个评分同时发出, 结果与串行一致"""
+        for run_async in (False, True):
+            self.assertEqual(self.grade("parallel", "yes", "yes", run_async),
+                             "useful")
+            self.assertEqual(self.grade("parallel", "yes", "no", run_async),
+                             "not useful")
+            # 幻觉检查失败时丢弃答案评分
+            self.assertEqual(self.grade("parallel", "no", "yes", run_async),
+                             "not supported")
+
+    def test_combined_uses_one_call(self):
+        """测试合并模式: 一次结构化调用返回两个分数"""
+        combined = Mock()
+        combined.invoke.return_value = Mock(grounded_score="yes",
+                                            answer_score="no")
+        with patch.object(edges, 'generation_grader', combined):
+            self.assertEqual(self.grade("combined", "no", "yes"),
+                             "not useful")
+        combined.invoke.assert_called_once_with(STATE)
+        self.hallucination.invoke.assert_not_called()
+        self.answer.invoke.assert_not_called()
+
+    def test_combined_async_and_not_grounded(self):
+        """测试合并模式: 异步调用同样只发一次请求, 未被文档支持时不看答案分数"""
+        for grounded, answers, expected in (("yes", "yes", "useful"),
+                                            ("no", "yes", "not supported")):
+            combined = Mock()
+            combined.ainvoke = AsyncMock(return_value=Mock(
+                grounded_score=grounded, answer_score=answers))
+            with patch.object(edges, 'generation_grader', combined):
+                self.assertEqual(self.grade("combined", "no", "no", True),
+                                 expected)
+            combined.ainvoke.assert_awaited_once_with(STATE)
+            self.hallucination.ainvoke.assert_not_awaited()
+            self.answer.ainvoke.assert_not_awaited()
+
+
+if __name__ == '__main__':
+    unittest.main()
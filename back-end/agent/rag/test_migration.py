@@ -0,0 +1,169 @@
+import os
+import sys
+import tempfile
+import threading
+import unittest
+from unittest.mock import Mock, patch
+
+# migration.py uses relative imports, so import it through the package
+sys.path.insert(
+    0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", ".."))
+from agent.rag.migration import (IndexMigrator, read_active_collection,
+                                 write_active_collection)
+
+
+class FakeCollection:
+    """In-memory stand-in for a Chroma collection."""
+
+    def __init__(self, rows=None):
+        self.rows = dict(rows or {})
+
+    def count(self):
+        return len(self.rows)
+
+    def get(self, ids=None, limit=None, offset=0, include=None):
+        keys = list(self.rows) if ids is None else ids
+        if limit is not None:
+            keys = keys[offset:offset + limit]
+        return {
+            "ids": keys,
+            "documents": [self.rows[k][0] for k in keys],
+            "metadatas": [self.rows[k][1] for k in keys],
+        }
+
+
+class TestIndexMigrator(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        # 旧索引中的三个片段
+        self.source = Mock()
+        self.source._collection = FakeCollection({
+            f"id{i}": (f"text {i}", {"source": "text"})
+            for i in range(3)
+        })
+        self.target = Mock()
+        self.added = {}
+        self.target.add_texts.side_effect = lambda texts, metadatas, ids: \
+            self.added.update(zip(ids, texts))
+
+        self.store = self.fake_store(self.tmp.name, self.source)
+
+        self.patches = [
+            patch('agent.rag.migration.Chroma', return_value=self.target),
+            patch('agent.rag.migration.get_embeddings')
+        ]
+        for patcher in self.patches:
+            patcher.start()
+
+    @staticmethod
+    def fake_store(path, index):
+        store = Mock()
+        store.path = path
+        store.index = index
+        store.collection_name = "langchain"
+        store.backend = "chroma"
+        store.needs_migration = True
+        store.lock = threading.RLock()
+        return store
+
+    def tearDown(self):
+        for patcher in self.patches:
+            patcher.stop()
+        self.tmp.cleanup()
+
+    def test_migrates_all_chunks_and_switches(self):
+        """测试所有片段被重新嵌入, 并切换到新集合"""
+        migrator = IndexMigrator(self.store, batch_size=2, batch_interval=0)
+        migrator.start({"model": "new-model"}, "new-model-1")
+        status = migrator.wait(5)
+
+        self.assertEqual(status["state"], "completed")
+        self.assertEqual(status["migrated"], 3)
+        self.assertEqual(set(self.added), {"id0", "id1", "id2"})
+        self.store.switch_index.assert_called_once()
+        args = self.store.switch_index.call_args[0]
+        self.assertIs(args[0], self.target)
+        self.assertEqual(args[1], "new-model-1")
+
+    def test_catches_up_on_chunks_added_during_migration(self):
+        """测试迁移期间新增的片段也会被迁移"""
+        rows = self.source._collection.rows
+
+        def add_texts(texts, metadatas, ids):
+            self.added.update(zip(ids, texts))
+            rows.setdefault("late", ("late text", {}))
+
+        self.target.add_texts.side_effect = add_texts
+        migrator = IndexMigrator(self.store, batch_size=2, batch_interval=0)
+        migrator.start({"model": "new-model"}, "new-model-1")
+        migrator.wait(5)
+
+        self.assertIn("late", self.added)
+
+    def test_failure_keeps_old_index(self):
+        """测试失败时保留旧索引并删除未完成的新集合"""
+        self.target.add_texts.side_effect = RuntimeError("embedding down")
+        migrator = IndexMigrator(self.store, batch_size=2, batch_interval=0)
+        migrator.start({"model": "new-model"}, "new-model-1")
+        status = migrator.wait(5)
+
+        self.assertEqual(status["state"], "failed")
+        self.assertIn("embedding down", status["error"])
+        self.store.switch_index.assert_not_called()
+        self.target.delete_collection.assert_called_once()
+
+    def test_migrates_tenant_shards(self):
+        """测试租户分片与共享索引一起迁移, 并计入迁移状态"""
+        shard_source = Mock()
+        shard_source._collection = FakeCollection(
+            {"shard0": ("shard text", {"source": "audio"})})
+        shard = self.fake_store(os.path.join(self.tmp.name, "alice"),
+                                shard_source)
+        migrator = IndexMigrator(self.store,
+                                 batch_size=2,
+                                 batch_interval=0,
+                                 tenant_stores=lambda: [shard])
+        self.assertTrue(migrator.status()["needs_migration"])
+
+        migrator.start({"model": "new-model"}, "new-model-1")
+        status = migrator.wait(5)
+
+        self.assertEqual(status["state"], "completed")
+        self.assertEqual((status["migrated"], status["total"]), (4, 4))
+        self.assertEqual(status["stores_migrated"], 2)
+        self.assertIn("shard0", self.added)
+        self.store.switch_index.assert_called_once()
+        shard.switch_index.assert_called_once()
+
+    def test_tenant_shard_needing_migration_is_reported(self):
+        shard = self.fake_store(self.tmp.name, None)
+        self.store.needs_migration = False
+        migrator = IndexMigrator(self.store, tenant_stores=lambda: [shard])
+        self.assertTrue(migrator.status()["needs_migration"])
+        shard.needs_migration = False
+        self.assertFalse(migrator.status()["needs_migration"])
+
+    def test_rejects_active_collection_as_target(self):
+        migrator = IndexMigrator(self.store)
+        with self.assertRaises(ValueError):
+            migrator.start(collection_name="langchain")
+
+    def test_active_collection_file(self):
+        self.assertIsNone(read_active_collection(self.tmp.name))
+        write_active_collection(self.tmp.name, "new-model-1", {
+            "model": "new-model",
+            "base_url": "http://localhost/v1",
+            "api_key": "secret"
+        })
+        active = read_active_collection(self.tmp.name)
+        self.assertEqual(active["collection"], "new-model-1")
+        # 只记录模型身份, 不写入密钥
+        self.assertNotIn("api_key", active["embeddings"])
+        self.assertFalse(
+            os.path.exists(
+                os.path.join(self.tmp.name, "active_collection.json.tmp")))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,100 @@
+import os
+import sys
+import tempfile
+import unittest
+from unittest.mock import Mock, patch
+from langchain.schema import Document
+
+# tenancy.py uses relative imports, so import it through the package
+sys.path.insert(
+    0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", ".."))
+from agent.rag.tenancy import ShardedVectorStore, TenantRouter, _routed_value
+
+
+def fake_shard(path):
+    """VectorStore stand-in whose index returns (doc, distance) pairs."""
+    shard = Mock()
+    shard.path = path
+    name = os.path.basename(path)
+    shard.index.similarity_search_with_score.side_effect = \
+        lambda query, k, filter: [
+            (Document(page_content=f"{name} {i}"), float(i) + (0.5 if name == "text" else 0))
+            for i in range(k)
+        ]
+    return shard
+
+
+class TestShardedVectorStore(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.patcher = patch('agent.rag.tenancy.VectorStore', side_effect=fake_shard)
+        self.patcher.start()
+        self.store = ShardedVectorStore(self.tmp.name, shard_by="source")
+        self.store.create_index([
+            Document(page_content="a", metadata={"source": "audio"}),
+            Document(page_content="t", metadata={"source": "text"}),
+        ])
+
+    def tearDown(self):
+        self.patcher.stop()
+        self.tmp.cleanup()
+
+    def test_documents_go_to_their_shard(self):
+        """测试文档按来源写入对应分片"""
+        self.assertEqual(set(self.store.shards), {"audio", "text"})
+        added = self.store.shards["audio"].create_index.call_args[0][0]
+        self.assertEqual([d.page_content for d in added], ["a"])
+
+    def test_filter_on_shard_key_searches_one_shard(self):
+        """测试过滤条件指定来源时只查询一个分片"""
+        docs = self.store.search("q", k=2, filter={"source": "audio"})
+        self.assertEqual([d.page_content for d in docs], ["audio 0", "audio 1"])
+        self.store.shards["text"].index.similarity_search_with_score.assert_not_called()
+
+    def test_fan_out_merges_by_score(self):
+        """测试跨分片并行查询并按距离合并 top-k"""
+        docs = self.store.search("q", k=3)
+        self.assertEqual([d.page_content for d in docs],
+                         ["audio 0", "text 0", "audio 1"])
+
+    def test_routed_value(self):
+        self.assertEqual(_routed_value({"source": "audio"}, "source"), "audio")
+        self.assertEqual(
+            _routed_value({"$and": [{"speaker": "s"}, {"source": "text"}]},
+                          "source"), "text")
+        self.assertIsNone(_routed_value({"speaker": "s"}, "source"))
+        self.assertIsNone(_routed_value(None, "source"))
+
+
+class TestTenantRouter(unittest.TestCase):
+
+    def test_tenants_get_separate_stores(self):
+        with tempfile.TemporaryDirectory() as tmp, \
+                patch('agent.rag.tenancy.VectorStore', side_effect=fake_shard):
+            default = Mock()
+            router = TenantRouter(tmp, default)
+            self.assertIs(router.store_for(None), default)
+            alice = router.store_for("alice")
+            self.assertIs(router.store_for("alice"), alice)
+            self.assertIsNot(router.store_for("bob"), alice)
+            # 租户名不能逃出基础目录
+            self.assertEqual(
+                os.path.dirname(router.store_for("../evil").path), tmp)
+
+    def test_tenant_stores_include_tenants_on_disk(self):
+        """测试索引迁移能拿到磁盘上所有租户的分片, 包括未加载的租户"""
+        with tempfile.TemporaryDirectory() as tmp, \
+                patch('agent.rag.tenancy.VectorStore', side_effect=fake_shard):
+            os.makedirs(os.path.join(tmp, "alice", "audio"))
+            os.makedirs(os.path.join(tmp, "bob", "text"))
+            router = TenantRouter(tmp, Mock())
+            shards = router.tenant_stores()
+            self.assertEqual(sorted(shard.path for shard in shards), [
+                os.path.join(tmp, "alice", "audio"),
+                os.path.join(tmp, "bob", "text")
+            ])
+
+
+if __name__ == '__main__':
+    unittest.main()
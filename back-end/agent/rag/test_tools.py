@@ -0,0 +1,106 @@
+import os
+import sys
+import unittest
+from unittest.mock import MagicMock, Mock, patch
+
+# tools.py uses relative imports, so import it through the package
+sys.path.insert(
+    0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", ".."))
+from agent.rag.tools import VectorStore
+
+
+def segment(start, speaker, text):
+    return {"start": start, "end": start + 1, "speaker": speaker, "text": text}
+
+
+class TestSegmentDocuments(unittest.TestCase):
+
+    def setUp(self):
+        self.store = VectorStore()
+
+    def test_merges_consecutive_segments_of_a_speaker(self):
+        """测试同一说话人的连续片段合并, 并保留起止时间"""
+        docs = self.store.create_segment_documents([
+            segment(0, "speaker_0", "Hello there."),
+            segment(1, "speaker_0", "How are you?"),
+            segment(2, "speaker_1", "Fine."),
+            segment(3, "speaker_0", " "),
+        ], origin="talk.wav")
+
+        self.assertEqual([d.page_content for d in docs],
+                         ["Hello there. How are you?", "Fine."])
+        self.assertEqual([(d.metadata["start"], d.metadata["end"])
+                          for d in docs], [(0, 2), (2, 3)])
+        self.assertEqual(docs[0].metadata["speaker"], "speaker_0")
+        self.assertEqual(docs[0].metadata["origin"], "talk.wav")
+
+    def test_cjk_segments_are_joined_without_space(self):
+        """测试中文片段之间不加空格, 中英文相邻时也不加"""
+        docs = self.store.create_segment_documents([
+            segment(0, "speaker_0", "大家好。"),
+            segment(1, "speaker_0", "今天讨论"),
+            segment(2, "speaker_0", "GPU 调度"),
+        ])
+        self.assertEqual(docs[0].page_content, "大家好。今天讨论GPU 调度")
+
+    def test_max_chars_starts_a_new_document(self):
+        """测试合并后超过 max_chars 时另起一个文档"""
+        docs = self.store.create_segment_documents([
+            segment(0, "speaker_0", "a" * 6),
+            segment(1, "speaker_0", "b" * 4),
+        ], max_chars=10)
+        self.assertEqual([d.page_content for d in docs], ["a" * 6, "b" * 4])
+
+    def test_named_speaker_keeps_diarized_turns(self):
+        """测试上传时指定的说话人记为 uploader, 不合并不同说话人的片段"""
+        docs = self.store.create_segment_documents([
+            segment(0, "speaker_0", "One."),
+            segment(1, "speaker_1", "Two."),
+            segment(2, None, "Three."),
+        ], speaker="Alice", language="en")
+        self.assertEqual([(d.page_content, d.metadata["speaker"])
+                          for d in docs], [("One.", "speaker_0"),
+                                           ("Two.", "speaker_1"),
+                                           ("Three.", "Alice")])
+        self.assertEqual({d.metadata["uploader"] for d in docs}, {"Alice"})
+        self.assertEqual(docs[0].metadata["language"], "en")
+
+class TestBackendSpans(unittest.TestCase):
+
+    def test_spans_are_named_after_the_backend(self):
+        """测试向量库的 tracing span 按实际后端命名"""
+        store = VectorStore()
+        store.backend = "faiss"
+        store.index = Mock()
+        with patch('agent.rag.tools.span', MagicMock()) as span:
+            store.create_index([], split=False)
+            store.search("q")
+            store.search_list(["q"])
+        self.assertEqual([c.args for c in span.call_args_list],
+                         [("vectorstore", "faiss.add"),
+                          ("vectorstore", "faiss.search"),
+                          ("vectorstore", "faiss.search_list")])
+
+
+
+class TestBuildFilter(unittest.TestCase):
+
+    def test_time_bounds(self):
+        """测试时间范围过滤: ISO-8601 字符串和时间戳都可使用"""
+        where = VectorStore.build_filter(source="audio",
+                                         since="1970-01-02T00:00:00+00:00",
+                                         until=172800)
+        self.assertEqual(where, {"$and": [
+            {"source": "audio"},
+            {"ingest_time": {"$gte": 86400}},
+            {"ingest_time": {"$lte": 172800}},
+        ]})
+
+    def test_malformed_time_names_the_field(self):
+        """测试无效的时间: ValueError 指明是哪个字段"""
+        with self.assertRaisesRegex(ValueError, "'until'"):
+            VectorStore.build_filter(since=0, until="last week")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,40 +1,296 @@
 from langchain_community.vectorstores import Chroma
-from langchain.text_splitter import RecursiveCharacterTextSplitter
-from .model import embeddings
-from typing import List
+from ..clients import get_embeddings
+from .chunking import CJK_CHAR, ChunkingEngine
+from .migration import (DEFAULT_COLLECTION, embedding_identity,
+                        read_active_collection, write_active_collection)
+from .model import config, embeddings
+from typing import Any, Dict, List, Optional, Union
+from datetime import datetime
 from langchain.schema import Document
+import os
+import threading
+import time
+from tracing import span
+
+# Metadata keys that can be matched exactly through build_filter
+FILTERABLE_KEYS = ("source", "origin", "speaker", "language")
+
+
+def _to_timestamp(value: Union[int, float, str, datetime]) -> int:
+    """Convert an epoch number, ISO-8601 string or datetime to epoch seconds."""
+    if isinstance(value, datetime):
+        return int(value.timestamp())
+    if isinstance(value, str):
+        return int(datetime.fromisoformat(value).timestamp())
+    return int(value)
+
+
+def _time_bound(name: str, value: Union[int, float, str, datetime]) -> int:
+    """_to_timestamp for a filter bound, naming the bound when it is malformed."""
+    try:
+        return _to_timestamp(value)
+    except (TypeError, ValueError):
+        raise ValueError(
+            f"Invalid '{name}': expected epoch seconds or an ISO-8601 time, "
+            f"got {value!r}")
 
 
 class VectorStore():
 
     def __init__(self, path: str = None):
+        self.path = path
         self.index = None
+        # "chroma" or "faiss" (in-process ANN index, see ann.py)
+        self.backend = config["vectorstore"]["backend"]
+        self.chunker = ChunkingEngine()
+        # Held by writers and by IndexMigrator while it switches collections
+        self.lock = threading.RLock()
+        self.collection_name = DEFAULT_COLLECTION
+        self.embeddings = embeddings
+        # Identity of the embedding model the active collection was built with
+        self.embedding_identity = embedding_identity(config["embeddings"])
         if path is not None:
-            self.index = Chroma(embedding_function=embeddings,
-                                persist_directory=path)
+            active = read_active_collection(path)
+            if active is not None:
+                # Keep querying with the model the collection was built with
+                # until it is migrated to the configured one
+                self.collection_name = active["collection"]
+                self.embedding_identity = active["embeddings"]
+                self.embeddings = get_embeddings({
+                    **config["embeddings"],
+                    **active["embeddings"]
+                })
+            self.index = self._open_index(path)
+
+    def _open_index(self, persist_directory: str):
+        """Open the active collection with the configured backend."""
+        if self.backend == "faiss":
+            # Imported here so the Chroma backend does not need faiss installed
+            from .ann import FaissVectorStore
+            return FaissVectorStore(
+                os.path.join(persist_directory, "faiss", self.collection_name),
+                self.embeddings, **config["vectorstore"]["faiss"])
+        return Chroma(collection_name=self.collection_name,
+                      embedding_function=self.embeddings,
+                      persist_directory=persist_directory)
+
+    @property
+    def needs_migration(self) -> bool:
+        """Whether the configured embedding model differs from the active collection's."""
+        return self.embedding_identity != embedding_identity(
+            config["embeddings"])
+
+    def switch_index(self, index: Chroma, collection_name: str,
+                     index_embeddings, embeddings_config: Dict[str,
+                                                               Any]) -> None:
+        """
+        Serve searches from another collection from now on.
+
+        Args:
+            index: Chroma index of the new collection
+            collection_name: Its collection name
+            index_embeddings: Embeddings client its vectors were built with
+            embeddings_config: `embeddings` config section of that client
+        """
+        with self.lock:
+            if self.path is not None:
+                write_active_collection(self.path, collection_name,
+                                        embeddings_config)
+            self.index = index
+            self.collection_name = collection_name
+            self.embeddings = index_embeddings
+            self.embedding_identity = embedding_identity(embeddings_config)
+
+    def create_index(self,
+                     documents: List[Document],
+                     split: bool = True):
+        """
+        Add documents to the index.
+
+        Args:
+            documents: Documents to embed and store
+            split: Chunk documents first, with the chunking profile of each
+                document's source; pass False for documents that are already
+                chunk-sized, e.g. from create_segment_documents
+        """
+        if split:
+            doc_splits = self.chunker.split_documents(documents)
+        else:
+            doc_splits = documents
+
+        # Spans are named after the backend, e.g. "faiss.add"
+        with span("vectorstore", f"{self.backend}.add"), self.lock:
+            if self.index is None:
+                self.index = self._open_index(self.path or "./chroma_db")
+            self.index.add_documents(doc_splits)
+            return self.index
+
+    def create_document(self,
+                        content: str,
+                        source: str,
+                        origin: Optional[str] = None,
+                        speaker: Optional[str] = None,
+                        language: Optional[str] = None,
+                        ingest_time: Optional[Union[int, float, str,
+                                                    datetime]] = None,
+                        **extra: Any) -> Document:
+        """
+        Create a document from text content with filterable metadata.
+
+        Args:
+            content: Text content of the document
+            source: Source type, e.g. "audio" or "text"
+            origin: Origin URL or uploaded filename
+            speaker: Speaker label for transcripts
+            language: Language code of the content
+            ingest_time: Ingest time, defaults to now (stored as epoch seconds)
+            **extra: Additional scalar metadata
+
+        Returns:
+            Document: Document carrying only the metadata values that are set
+        """
+        metadata = {
+            "source": source,
+            "origin": origin,
+            "speaker": speaker,
+            "language": language,
+            "ingest_time": _to_timestamp(ingest_time)
+            if ingest_time is not None else int(time.time()),
+            **extra,
+        }
+        # Chroma only accepts scalar metadata values
+        metadata = {k: v for k, v in metadata.items() if v is not None}
+        return Document(page_content=content, metadata=metadata)
+
+    def create_segment_documents(self,
+                                 segments: List[Dict[str, Any]],
+                                 source: str = "audio",
+                                 max_chars: int = 300,
+                                 speaker: Optional[str] = None,
+                                 **metadata: Any) -> List[Document]:
+        """
+        Create segment-aligned documents from a diarized transcript.
+
+        Consecutive segments from the same speaker are merged up to
+        `max_chars`, so each document is a short span with its own
+        start/end time (seconds) and speaker. Merged Latin text is joined
+        with a space, CJK text without one.
+
+        Args:
+            segments: ASR segments with 'start', 'end', 'speaker' and 'text'
+            source: Source type
+            max_chars: Maximum characters per merged document
+            speaker: Speaker named by the uploader; kept as the `uploader`
+                metadata of every span, and used as the speaker of segments
+                without a diarized speaker id
+            **metadata: Metadata shared by all documents (origin, language, ...)
+
+        Returns:
+            List[Document]: One document per merged span, ready for
+            create_index(..., split=False)
+        """
+        spans = []
+        for segment in segments:
+            text = segment['text'].strip()
+            if not text:
+                continue
+            segment = {**segment, 'text': text}
+            if not segment.get('speaker'):
+                segment['speaker'] = speaker
+            last = spans[-1] if spans else None
+            if last and last['speaker'] == segment['speaker']:
+                separator = "" if (CJK_CHAR.match(last['text'][-1])
+                                   or CJK_CHAR.match(text[0])) else " "
+                if len(last['text']) + len(separator) + len(text) <= max_chars:
+                    last['text'] += separator + text
+                    last['end'] = segment['end']
+                    continue
+            spans.append(segment)
+
+        return [
+            self.create_document(merged['text'],
+                                 source,
+                                 speaker=merged['speaker'],
+                                 start=merged['start'],
+                                 end=merged['end'],
+                                 uploader=speaker,
+                                 **metadata) for merged in spans
+        ]
+
+    @staticmethod
+    def build_filter(source: Optional[str] = None,
+                     origin: Optional[str] = None,
+                     speaker: Optional[str] = None,
+                     language: Optional[str] = None,
+                     since: Optional[Union[int, float, str, datetime]] = None,
+                     until: Optional[Union[int, float, str, datetime]] = None
+                     ) -> Optional[Dict[str, Any]]:
+        """
+        Build a Chroma `where` clause from metadata constraints.
+
+        Args:
+            source, origin, speaker, language: Exact metadata matches
+            since: Only include documents ingested at or after this time
+            until: Only include documents ingested at or before this time
+
+        Returns:
+            A `where` dict, or None when no constraint is given
+
+        Raises:
+            ValueError: If `since` or `until` is not a valid time
+        """
+        values = {
+            "source": source,
+            "origin": origin,
+            "speaker": speaker,
+            "language": language
+        }
+        clauses = [{k: v} for k, v in values.items() if v is not None]
+        if since is not None:
+            clauses.append({"ingest_time": {"$gte": _time_bound("since", since)}})
+        if until is not None:
+            clauses.append({"ingest_time": {"$lte": _time_bound("until", until)}})
 
-    def create_index(self, documents: List[Document]) -> Chroma:
-        text_splitter = RecursiveCharacterTextSplitter(chunk_size=1000,
-                                                       chunk_overlap=200)
-        doc_splits = text_splitter.split_documents(documents)
+        if not clauses:
+            return None
+        if len(clauses) == 1:
+            return clauses[0]
+        return {"$and": clauses}
 
-        vectorstore = Chroma.from_documents(doc_splits,
-                                            embeddings,
-                                            persist_directory="./chroma_db")
-        self.index = vectorstore
+    def search(self,
+               query: str,
+               k: int = 5,
+               filter: Optional[Dict[str, Any]] = None) -> List[Document]:
+        with span("vectorstore", f"{self.backend}.search"):
+            return self.index.similarity_search(query, k=k, filter=filter)
 
-    def create_document(self, content: str, source: str) -> Document:
-        """Create a list of documents from an text content."""
-        return Document(page_content=content, metadata={"source": source})
+    async def asearch(self,
+                      query: str,
+                      k: int = 5,
+                      filter: Optional[Dict[str, Any]] = None) -> List[Document]:
+        with span("vectorstore", f"{self.backend}.search"):
+            return await self.index.asimilarity_search(query,
+                                                       k=k,
+                                                       filter=filter)
 
-    def search(self, query: str) -> List[Document]:
-        return self.index.similarity_search(query, k=5)
+    def search_filtered(self, query: str, k: int = 5,
+                        **constraints: Any) -> List[Document]:
+        """Search only documents matching the given build_filter constraints."""
+        return self.search(query, k=k, filter=self.build_filter(**constraints))
 
-    def search_list(self, query_list: List[str]) -> List[Document]:
+    def search_list(self,
+                    query_list: List[str],
+                    filter: Optional[Dict[str, Any]] = None) -> List[Document]:
         docs = []
-        for query in query_list:
-            docs.append(self.index.similarity_search_with_score(query, k=5))
+        with span("vectorstore", f"{self.backend}.search_list"):
+            for query in query_list:
+                docs.append(
+                    self.index.similarity_search_with_score(query,
+                                                            k=5,
+                                                            filter=filter))
         return docs
 
-    def get_retriever(self):
-        return self.index.as_retriever()
+    def get_retriever(self, filter: Optional[Dict[str, Any]] = None):
+        if filter is None:
+            return self.index.as_retriever()
+        return self.index.as_retriever(search_kwargs={"filter": filter})
@@ -0,0 +1,86 @@
+import asyncio
+import os
+import sys
+import unittest
+from unittest.mock import patch
+import httpx
+
+# clients.py uses relative imports, so import it through the package
+sys.path.insert(
+    0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from agent.clients import _LimitedAsyncTransport, _LimitedTransport
+
+
+def ok(*args, **kwargs):
+    return httpx.Response(200, stream=httpx.ByteStream(b"body"))
+
+
+async def slow_ok(*args, **kwargs):
+    # 让出事件循环, 使并发请求真正争用信号量
+    await asyncio.sleep(0)
+    return ok()
+
+
+class TestLimitedTransport(unittest.TestCase):
+
+    def test_slot_held_until_body_is_closed(self):
+        """测试同步传输在响应体读完并关闭后才释放并发名额"""
+        transport = _LimitedTransport(1)
+        with patch.object(httpx.HTTPTransport, 'handle_request',
+                          side_effect=ok), \
+                httpx.Client(transport=transport) as client:
+            with client.stream("GET", "http://llm/v1/models") as response:
+                self.assertFalse(transport._semaphore.acquire(blocking=False))
+                self.assertEqual(response.read(), b"body")
+            self.assertTrue(transport._semaphore.acquire(blocking=False))
+
+    def test_slot_released_on_error(self):
+        transport = _LimitedTransport(1)
+        with patch.object(httpx.HTTPTransport, 'handle_request',
+                          side_effect=httpx.ConnectError("down")), \
+                httpx.Client(transport=transport) as client:
+            with self.assertRaises(httpx.ConnectError):
+                client.get("http://llm/v1/models")
+        self.assertTrue(transport._semaphore.acquire(blocking=False))
+
+
+class TestLimitedAsyncTransport(unittest.TestCase):
+
+    def setUp(self):
+        self.transport = _LimitedAsyncTransport(1)
+        self.client = httpx.AsyncClient(transport=self.transport)
+        self.patcher = patch.object(httpx.AsyncHTTPTransport,
+                                    'handle_async_request',
+                                    side_effect=slow_ok)
+        self.patcher.start()
+
+    def tearDown(self):
+        self.patcher.stop()
+
+    async def requests(self):
+        responses = await asyncio.gather(
+            *[self.client.get("http://llm/v1/models") for _ in range(3)])
+        return [r.text for r in responses], self.transport._for_loop()[1]
+
+    def test_shared_client_works_across_event_loops(self):
+        """测试同一个 AsyncClient 在多个事件循环中使用, 每个循环有自己的信号量"""
+        first_texts, first = asyncio.run(self.requests())
+        second_texts, second = asyncio.run(self.requests())
+        self.assertEqual(first_texts + second_texts, ["body"] * 6)
+        self.assertIsNot(first, second)
+
+    def test_slot_held_until_body_is_closed(self):
+        """测试异步传输在响应体关闭后才释放并发名额"""
+
+        async def stream():
+            semaphore = self.transport._for_loop()[1]
+            async with self.client.stream("GET", "http://llm/") as response:
+                held = semaphore.locked()
+                await response.aread()
+            return held, semaphore.locked()
+
+        self.assertEqual(asyncio.run(stream()), (True, False))
+
+
+if __name__ == '__main__':
+    unittest.main()
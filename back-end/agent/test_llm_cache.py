@@ -0,0 +1,69 @@
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+from langchain_core.messages import AIMessage
+from langchain_core.outputs import ChatGeneration
+from llm_cache import SQLiteLLMCache
+
+
+def generation(text):
+    return [ChatGeneration(message=AIMessage(content=text))]
+
+
+class TestSQLiteLLMCache(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "cache", "llm.sqlite3")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_hit_after_update(self):
+        """测试写入后相同请求命中, 不同模型参数不命中"""
+        cache = SQLiteLLMCache(self.path)
+        self.assertIsNone(cache.lookup("prompt", "model-a"))
+        cache.update("prompt", "model-a", generation("yes"))
+        cached = cache.lookup("prompt", "model-a")
+        self.assertEqual(cached[0].message.content, "yes")
+        # 结构化输出的 schema 属于 llm_string, 不同 schema 不共享
+        self.assertIsNone(cache.lookup("prompt", "model-a+schema"))
+        self.assertEqual(cache.stats(), {
+            "hits": 1,
+            "misses": 2,
+            "hit_rate": 1 / 3,
+            "entries": 1
+        })
+
+    def test_persists_across_instances(self):
+        SQLiteLLMCache(self.path).update("prompt", "m", generation("yes"))
+        cached = SQLiteLLMCache(self.path).lookup("prompt", "m")
+        self.assertEqual(cached[0].message.content, "yes")
+
+    def test_entries_expire_after_ttl(self):
+        """测试超过 TTL 的条目失效"""
+        cache = SQLiteLLMCache(self.path, ttl=60)
+        with patch('llm_cache.time.time', return_value=1000.0):
+            cache.update("prompt", "m", generation("yes"))
+        with patch('llm_cache.time.time', return_value=1059.0):
+            self.assertIsNotNone(cache.lookup("prompt", "m"))
+        with patch('llm_cache.time.time', return_value=1061.0):
+            self.assertIsNone(cache.lookup("prompt", "m"))
+        self.assertEqual(cache.stats()["entries"], 0)
+
+    def test_evicts_least_recently_used(self):
+        """测试超出容量时淘汰最久未使用的条目"""
+        cache = SQLiteLLMCache(self.path, max_entries=2)
+        with patch('llm_cache.time.time', side_effect=[1.0, 2.0, 3.0, 4.0]):
+            cache.update("a", "m", generation("a"))
+            cache.update("b", "m", generation("b"))
+            cache.lookup("a", "m")
+            cache.update("c", "m", generation("c"))
+        self.assertIsNotNone(cache.lookup("a", "m"))
+        self.assertIsNone(cache.lookup("b", "m"))
+        self.assertIsNotNone(cache.lookup("c", "m"))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -41,21 +41,23 @@ class ReportState(TypedDict):
     report_structure: str  # Report structure
     number_of_queries: int  # Number web search queries to perform per section
     sections: list[Section]  # List of report sections
-    completed_sections: Annotated[list, operator.add]  # Send() API key
-    report_sections_from_research: str  # String of any completed sections from research to write final sections
+    completed_sections: Annotated[list[int], operator.add]  # Send() API key, IDs of written sections in the SectionStore
+    research_sections: list[int]  # IDs of the researched sections, context for writing final sections
     final_report: str  # Final report
 
 
 class SectionState(TypedDict):
+    topic: str  # Report topic, part of the section cache key
     number_of_queries: int  # Number web search queries to perform per section
+    section_id: int  # Index of the section in the plan, its ID in the SectionStore
     section: Section  # Report section
     search_queries: list[SearchQuery]  # List of search queries
     source_str: str  # String of formatted source content from web search
-    report_sections_from_research: str  # String of any completed sections from research to write final sections
+    research_sections: list[int]  # IDs of the researched sections, context for writing final sections
     completed_sections: list[
-        Section]  # Final key we duplicate in outer state for Send() API
+        int]  # Final key we duplicate in outer state for Send() API
 
 
 class SectionOutputState(TypedDict):
     completed_sections: list[
-        Section]  # Final key we duplicate in outer state for Send() API
+        int]  # Final key we duplicate in outer state for Send() API
@@ -3,6 +3,7 @@ from .node import ReportNodes
 from .vectorDB import VectorStore
 from .data_model import ReportState, ReportStateInput, ReportStateOutput
 from langgraph.graph import START, END, StateGraph
+from tracing import traced
 
 
 class ReportMasitroGraph:
@@ -15,13 +16,18 @@ class ReportMasitroGraph:
                                   output=ReportStateOutput)
         self._build_graph()
 
+    def _node(self, name: str):
+        """Report node method wrapped in a tracing span"""
+        return traced("node", f"report.{name}")(getattr(self.report_nodes,
+                                                        name))
+
     def _build_graph(self):
         section_builder = StateGraph(SectionState, output=SectionOutputState)
         section_builder.add_node("generate_queries",
-                                 self.report_nodes.generate_queries)
-        section_builder.add_node("search_web", self.report_nodes.search_web)
+                                 self._node("generate_queries"))
+        section_builder.add_node("search_web", self._node("search_web"))
         section_builder.add_node("write_section",
-                                 self.report_nodes.write_section)
+                                 self._node("write_section"))
 
         section_builder.add_edge(START, "generate_queries")
         section_builder.add_edge("generate_queries", "search_web")
@@ -30,15 +36,15 @@ class ReportMasitroGraph:
 
         self.builder = StateGraph(ReportState, output=ReportStateOutput)
         self.builder.add_node("generate_report_plan",
-                              self.report_nodes.generate_report_plan)
+                              self._node("generate_report_plan"))
         self.builder.add_node("build_section_with_web_research",
                               section_builder.compile())
         self.builder.add_node("gather_completed_sections",
-                              self.report_nodes.gather_completed_sections)
+                              self._node("gather_completed_sections"))
         self.builder.add_node("write_final_sections",
-                              self.report_nodes.write_final_sections)
+                              self._node("write_final_sections"))
         self.builder.add_node("compile_final_report",
-                              self.report_nodes.compile_final_report)
+                              self._node("compile_final_report"))
         self.builder.add_edge(START, "generate_report_plan")
         self.builder.add_conditional_edges(
             "generate_report_plan", self.report_nodes.initiate_section_writing,
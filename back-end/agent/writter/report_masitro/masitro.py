@@ -1,8 +1,18 @@
+from typing import Any, AsyncIterator, Dict, Iterator, List, Tuple
 from .graph import ReportMasitroGraph
+from .section_store import SectionStore
 from .text_processor import TextProcessor
+from tracing import traced
 
+# Graph nodes whose updates carry written sections
+SECTION_NODES = ("build_section_with_web_research", "write_final_sections")
 
-def get_report_masitro(title: str, vectorstore, config: str = None) -> str:
+
+@traced("pipeline", "report")
+def get_report_masitro(title: str,
+                       vectorstore,
+                       config: str = None,
+                       number_of_queries: int = 2) -> str:
     """
     Generate a report based on title and configuration.
     
@@ -10,6 +20,7 @@ def get_report_masitro(title: str, vectorstore, config: str = None) -> str:
         title: The report title
         vectorstore: The vector store for retrieving relevant information
         config: Optional configuration string specifying report structure
+        number_of_queries: Search queries for planning and, at most, per section
     
     Returns:
         str: The generated report content
@@ -21,7 +32,7 @@ def get_report_masitro(title: str, vectorstore, config: str = None) -> str:
         report = report_graph.invoke({
             "topic": title,
             "report_structure": config,
-            "number_of_queries": 2
+            "number_of_queries": number_of_queries
         })
 
         # 使用文本处理器处理输出
@@ -34,5 +45,161 @@ def get_report_masitro(title: str, vectorstore, config: str = None) -> str:
         raise Exception(f"Error generating report: {str(e)}")
 
 
+@traced("pipeline", "report")
+async def aget_report_masitro(title: str,
+                              vectorstore,
+                              config: str = None,
+                              number_of_queries: int = 2) -> str:
+    """
+    Async variant of get_report_masitro for ASGI serving.
+
+    Sync graph nodes are run by LangGraph on its executor, so the event loop
+    stays free while sections are researched and written.
+    """
+    try:
+        graph = ReportMasitroGraph(vectorstore)
+        report_graph = graph.compile()
+
+        report = await report_graph.ainvoke({
+            "topic": title,
+            "report_structure": config,
+            "number_of_queries": number_of_queries
+        })
+
+        processor = TextProcessor()
+        return processor.process_text(report['final_report'])
+
+    except Exception as e:
+        raise Exception(f"Error generating report: {str(e)}")
+
+
+class SectionStream:
+    """
+    Turns the report graph's update stream into report events.
+
+    Events are ("plan", {"sections": [{"index", "name", "research"}]}) as
+    soon as the outline exists, then ("section", {"index", "name",
+    "content"}) for each written section, then ("done", {"content"}) with
+    the whole report as get_report_masitro returns it.
+
+    Researched sections are written in parallel and finish in any order;
+    they are buffered and emitted in plan order. Synthesis sections
+    (introduction, conclusion) can only be written after every researched
+    section, so each is emitted as soon as it is done; the index tells the
+    client where it goes.
+    """
+
+    def __init__(self, store: SectionStore) -> None:
+        """
+        Args:
+            store: The report graph's SectionStore, which holds the content
+                of the section IDs found in its updates
+        """
+        self.store = store
+        self.processor = TextProcessor()
+        self.plan = []
+        self.written = {}
+        self.next_research = 0
+
+    def _section_event(self, index: int) -> Tuple[str, Dict[str, Any]]:
+        return "section", {
+            "index": index,
+            "name": self.plan[index].name,
+            "content": self.written[index]
+        }
+
+    def events(self, chunk: Dict[str, Any]) -> List[Tuple[str, Dict[str, Any]]]:
+        """Events for one `stream_mode="updates"` chunk of the graph."""
+        events = []
+        for node, update in chunk.items():
+            if not update:
+                continue
+            if node == "generate_report_plan":
+                self.plan = update["sections"]
+                events.append(("plan", {
+                    "sections": [{
+                        "index": i,
+                        "name": s.name,
+                        "research": s.research
+                    } for i, s in enumerate(self.plan)]
+                }))
+            elif node in SECTION_NODES:
+                for index in update["completed_sections"]:
+                    self.written[index] = self.processor.process_text(
+                        self.store.content(index))
+                    if not self.plan[index].research:
+                        events.append(self._section_event(index))
+                research = [
+                    i for i, s in enumerate(self.plan) if s.research
+                ]
+                while (self.next_research < len(research)
+                       and research[self.next_research] in self.written):
+                    events.append(
+                        self._section_event(research[self.next_research]))
+                    self.next_research += 1
+            elif node == "compile_final_report":
+                events.append(("done", {
+                    "content":
+                    self.processor.process_text(update["final_report"])
+                }))
+        return events
+
+
+def stream_report_masitro(
+        title: str,
+        vectorstore,
+        config: str = None,
+        number_of_queries: int = 2) -> Iterator[Tuple[str, Dict[str, Any]]]:
+    """
+    Generate a report, yielding (event, data) pairs as sections are written.
+
+    See SectionStream for the events. A failure ends the stream with an
+    ("error", {"error"}) event.
+
+    Args:
+        title: The report title
+        vectorstore: The vector store for retrieving relevant information
+        config: Optional configuration string specifying report structure
+        number_of_queries: Search queries for planning and, at most, per section
+    """
+    try:
+        graph = ReportMasitroGraph(vectorstore)
+        report_graph = graph.compile()
+        sections = SectionStream(graph.report_nodes.store)
+        for chunk in report_graph.stream(
+            {
+                "topic": title,
+                "report_structure": config,
+                "number_of_queries": number_of_queries
+            },
+                stream_mode="updates"):
+            yield from sections.events(chunk)
+    except Exception as e:
+        yield "error", {"error": f"Error generating report: {str(e)}"}
+
+
+async def astream_report_masitro(
+        title: str,
+        vectorstore,
+        config: str = None,
+        number_of_queries: int = 2) -> AsyncIterator[Tuple[str, Dict[str, Any]]]:
+    """Async variant of stream_report_masitro for ASGI serving."""
+    try:
+        graph = ReportMasitroGraph(vectorstore)
+        report_graph = graph.compile()
+        sections = SectionStream(graph.report_nodes.store)
+        async for chunk in report_graph.astream(
+            {
+                "topic": title,
+                "report_structure": config,
+                "number_of_queries": number_of_queries
+            },
+                stream_mode="updates"):
+            for event in sections.events(chunk):
+                yield event
+    except Exception as e:
+        yield "error", {"error": f"Error generating report: {str(e)}"}
+
+
 # vdb = VectorStore(path="./chroma_db")
 # get_rag_answer("论中美人工智能的竞争", vdb)
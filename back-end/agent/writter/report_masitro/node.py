@@ -1,20 +1,64 @@
-from .data_model import ReportState, Queries, Sections, SectionState
+from .data_model import ReportState, Queries, Section, Sections, SectionState
 from langchain_core.runnables import RunnableConfig
-from .model import llm
-from .utilities import deduplicate_and_format_sources, format_sections
-from .prompt import (report_planner_instructions,
+from .model import config, llm
+from ...clients import apply_env_overrides
+from .report_cache import ReportCache, fingerprint, source_fingerprint
+from .retrieval_pool import QueryBudget, RetrievalPool, count_relevant
+from .section_store import SectionStore
+from .utilities import deduplicate_and_format_sources
+from .prompt import (report_planner_instructions, report_planner_input,
                      report_planner_query_writer_instructions,
-                     query_writer_instructions, section_writer_instructions,
-                     final_section_writer_instructions)
+                     report_planner_query_writer_input,
+                     query_writer_instructions, query_writer_input,
+                     section_writer_instructions, section_writer_input,
+                     final_section_writer_instructions,
+                     final_section_writer_input)
 from langchain_core.messages import HumanMessage, SystemMessage
 from .vectorDB import VectorStore
 from langgraph.constants import Send
 
+cache_config = apply_env_overrides("report_cache", config["report_cache"])
+report_cache = ReportCache(
+    cache_config["path"],
+    ttl=cache_config.get("ttl")) if cache_config["enabled"] else None
+
+QUERY_MODES = ("fixed", "adaptive")
+query_config = config["queries"]
+if query_config["mode"] not in QUERY_MODES:
+    raise ValueError(f"Unknown query mode: {query_config['mode']!r}, "
+                     f"expected one of {QUERY_MODES}")
+
 
 class ReportNodes:
 
-    def __init__(self, vectorDB: VectorStore):
+    def __init__(self, vectorDB: VectorStore, cache: ReportCache = report_cache):
+        """
+        A ReportNodes (and its graph) researches one report: the planner and
+        every section search through the same RetrievalPool, sections
+        share one QueryBudget for follow-up queries in adaptive mode, and
+        written sections are kept in one SectionStore.
+
+        Args:
+            vectorDB: Vector store the report is researched from
+            cache: Plans and sections of earlier reports; None disables reuse
+        """
         self.vectorDB = vectorDB
+        self.cache = cache
+        self.retrieval = RetrievalPool(vectorDB)
+        self.query_budget = QueryBudget(query_config["extra_query_budget"])
+        self.store = SectionStore()
+
+    def _cached_content(self, key: str, write) -> str:
+        """Section content for `key` from the cache, or from `write()`"""
+        if self.cache is not None:
+            content = self.cache.get_section(key)
+            if content is not None:
+                print("---SECTION: CACHED---")
+                return content
+        content = write()
+        if self.cache is not None:
+            self.cache.put_section(key, content)
+        return content
 
     def generate_report_plan(self, state: ReportState):
         """ Generate the report plan """
@@ -24,61 +68,65 @@ class ReportNodes:
         number_of_queries = state["number_of_queries"]
         structured_llm = llm.with_structured_output(Queries)
 
-        system_instructions_query = report_planner_query_writer_instructions.format(
-            topic=topic,
-            report_organization=report_structure,
-            number_of_queries=number_of_queries)
-
+        # Static instructions first, variables last, so the prefix is cacheable
         results = structured_llm.invoke([
-            SystemMessage(content=system_instructions_query)
-        ] + [
-            HumanMessage(
-                content=
-                "Generate search queries that will help with planning the sections of the report in Chinese."
-            )
+            SystemMessage(content=report_planner_query_writer_instructions),
+            HumanMessage(content=report_planner_query_writer_input.format(
+                topic=topic,
+                report_organization=report_structure,
+                number_of_queries=number_of_queries))
         ])
 
         query_list = [query.search_query for query in results.queries]
         print(query_list)
-        search_docs = self.vectorDB.search_list(query_list)
+        search_docs = self.retrieval.search_list(query_list)
+
+        # Same topic, structure and sources as an earlier run: reuse its plan
+        plan_key = fingerprint("plan", llm.model_name, topic, report_structure,
+                               source_fingerprint(search_docs))
+        if self.cache is not None:
+            cached_sections = self.cache.get_plan(plan_key)
+            if cached_sections is not None:
+                print("---REPORT PLAN: CACHED---")
+                return {
+                    "sections":
+                    [Section(**section) for section in cached_sections]
+                }
 
         source_str = deduplicate_and_format_sources(search_docs,
                                                     max_tokens_per_source=2000,
                                                     include_raw_content=False)
 
-        system_instructions_sections = report_planner_instructions.format(
+        planner_input = report_planner_input.format(
             topic=topic,
             report_organization=report_structure,
             context=source_str)
-        print(system_instructions_sections)
+        print(planner_input)
         structured_llm = llm.with_structured_output(Sections)
         report_sections = structured_llm.invoke([
-            SystemMessage(content=system_instructions_sections)
-        ] + [
-            HumanMessage(
-                content=
-                "Generate the sections of the report. Your response must include a 'sections' field containing a list of sections. Each section must have: name, description, plan, research, and content fields."
-            )
+            SystemMessage(content=report_planner_instructions),
+            HumanMessage(content=planner_input)
         ])
 
+        if self.cache is not None:
+            self.cache.put_plan(
+                plan_key,
+                [section.model_dump() for section in report_sections.sections])
         return {"sections": report_sections.sections}
 
     def generate_queries(self, state: SectionState, config: RunnableConfig):
         """ Generate search queries for a report section """
         # 原generate_queries函数的内容...
         section = state["section"]
-        number_of_queries = 2
+        number_of_queries = state["number_of_queries"]
 
         structured_llm = llm.with_structured_output(Queries)
-        system_instructions = query_writer_instructions.format(
-            section_topic=section.description,
-            number_of_queries=number_of_queries)
-
-        queries = structured_llm.invoke(
-            [SystemMessage(content=system_instructions)] + [
-                HumanMessage(
-                    content="Generate search queries on the provided topic.")
-            ])
+        queries = structured_llm.invoke([
+            SystemMessage(content=query_writer_instructions),
+            HumanMessage(content=query_writer_input.format(
+                section_topic=section.description,
+                number_of_queries=number_of_queries))
+        ])
 
         return {"search_queries": queries.queries}
 
@@ -88,7 +136,11 @@ class ReportNodes:
         search_queries = state["search_queries"]
 
         query_list = [query.search_query for query in search_queries]
-        search_docs = self.vectorDB.search_list(query_list)
+        if query_config["mode"] == "adaptive":
+            search_docs = self._adaptive_search(query_list)
+        else:
+            # Queries already searched by the planner or another section are reused
+            search_docs = self.retrieval.search_list(query_list)
 
         source_str = deduplicate_and_format_sources(search_docs,
                                                     max_tokens_per_source=5000,
@@ -96,87 +148,106 @@ class ReportNodes:
 
         return {"source_str": source_str}
 
+    def _adaptive_search(self, query_list):
+        """
+        Search the first query, then the next ones only while the results
+        found so far have too few relevant chunks and the report's budget
+        for follow-up queries lasts
+        """
+        search_docs = self.retrieval.search_list(query_list[:1])
+        for query in query_list[1:]:
+            if count_relevant(search_docs, query_config["max_distance"]
+                              ) >= query_config["min_relevant"]:
+                break
+            if not self.query_budget.take():
+                print("---SECTION SEARCH: QUERY BUDGET SPENT---")
+                break
+            search_docs += self.retrieval.search_list([query])
+        print(f"---SECTION SEARCH: {len(search_docs)} OF "
+              f"{len(query_list)} QUERIES---")
+        return search_docs
+
     def write_section(self, state: SectionState):
         """ Write a section of the report """
         # 原write_section函数的内容...
         section = state["section"]
         source_str = state["source_str"]
 
-        system_instructions = section_writer_instructions.format(
-            section_title=section.name,
-            section_topic=section.description,
-            context=source_str)
-
-        section_content = llm.invoke([
-            SystemMessage(content=system_instructions)
-        ] + [
-            HumanMessage(
-                content=
-                "Generate a report section based on the provided sources in Chinese."
-            )
-        ])
-
-        section.content = section_content.content
-        return {"completed_sections": [section]}
+        key = fingerprint("section", llm.model_name, state["topic"],
+                          section.name, section.description, source_str)
+        content = self._cached_content(
+            key, lambda: llm.invoke([
+                SystemMessage(content=section_writer_instructions),
+                HumanMessage(content=section_writer_input.format(
+                    section_topic=section.description, context=source_str))
+            ]).content)
+        self.store.put(state["section_id"], section, content)
+        return {"completed_sections": [state["section_id"]]}
 
     def write_final_sections(self, state: SectionState):
         """ Write final sections of the report, which do not require web search and use the completed sections as context """
         # 原write_final_sections函数的内容...
         section = state["section"]
-        completed_report_sections = state["report_sections_from_research"]
-
-        system_instructions = final_section_writer_instructions.format(
-            section_title=section.name,
-            section_topic=section.description,
-            context=completed_report_sections)
-
-        section_content = llm.invoke([
-            SystemMessage(content=system_instructions)
-        ] + [
-            HumanMessage(
-                content=
-                "根据提供的资料生成报告章节。禁止使用过渡词，如'然而'、'但是'、'因此'、'所以'、'此外'、'总之'、'不仅'、'例如'，'特别是'等中英文过渡词。不要夸大其词。忠实原文内容，使内容简洁、清晰、流畅。不要将总结放到每个章节末尾"
-            )
-        ])
-
-        section.content = section_content.content
-        return {"completed_sections": [section]}
+        completed_report_sections = self.store.context(
+            state["research_sections"])
+
+        # Rewritten only when the researched sections it draws on changed
+        key = fingerprint("final_section", llm.model_name, state["topic"],
+                          section.name, section.description,
+                          completed_report_sections)
+        content = self._cached_content(
+            key, lambda: llm.invoke([
+                SystemMessage(content=final_section_writer_instructions),
+                HumanMessage(content=final_section_writer_input.format(
+                    section_topic=section.description,
+                    context=completed_report_sections))
+            ]).content)
+        self.store.put(state["section_id"], section, content)
+        return {"completed_sections": [state["section_id"]]}
 
     def initiate_section_writing(self, state: ReportState):
         """ This is the "map" step when we kick off web research for some sections of the report """
         return [
-            Send("build_section_with_web_research", {"section": s})
-            for s in state["sections"] if s.research
+            Send("build_section_with_web_research", {
+                "topic": state["topic"],
+                "number_of_queries": state["number_of_queries"],
+                "section_id": i,
+                "section": s
+            }) for i, s in enumerate(state["sections"]) if s.research
         ]
 
     def gather_completed_sections(self, state: ReportState):
         """ Gather completed sections from research and format them as context for writing the final sections """
-        completed_sections = state["completed_sections"]
-        completed_report_sections = format_sections(completed_sections)
-        return {"report_sections_from_research": completed_report_sections}
+        # Plan order, so the context (and final section cache keys) do not
+        # depend on which section finished first
+        research_sections = sorted(state["completed_sections"])
+        # Formatted once here; the final sections get the same string
+        self.store.context(research_sections)
+        return {"research_sections": research_sections}
 
     def initiate_final_section_writing(self, state: ReportState):
         """ Write any final sections using the Send API to parallelize the process """
+        # Payloads carry section IDs; the context itself stays in the store
         return [
             Send(
                 "write_final_sections", {
-                    "section":
-                    s,
-                    "report_sections_from_research":
-                    state["report_sections_from_research"]
-                }) for s in state["sections"] if not s.research
+                    "topic": state["topic"],
+                    "section_id": i,
+                    "section": s,
+                    "research_sections": state["research_sections"]
+                }) for i, s in enumerate(state["sections"]) if not s.research
         ]
 
     def compile_final_report(self, state: ReportState):
         """ Compile the final report """
         sections = state["sections"]
-        completed_sections = {
-            s.name: s.content
-            for s in state["completed_sections"]
-        }
-
-        for section in sections:
-            section.content = completed_sections[section.name]
-
-        all_sections = "\n\n".join([s.content for s in sections])
+        all_sections = "\n\n".join(
+            self.store.content(i) for i in range(len(sections)))
+        stats = self.retrieval.stats()
+        print(f"---RETRIEVAL: {stats['searches']} SEARCHES FOR "
+              f"{stats['queries']} QUERIES, {stats['searches_saved']} SAVED, "
+              f"{stats['unique_chunks']} UNIQUE CHUNKS---")
+        if query_config["mode"] == "adaptive":
+            print(f"---FOLLOW-UP QUERIES: {self.query_budget.used} OF "
+                  f"{self.query_budget.total}---")
         return {"final_report": all_sections}
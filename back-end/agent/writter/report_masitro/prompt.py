@@ -1,14 +1,13 @@
-report_planner_query_writer_instructions = """You are an expert technical writer, helping to plan a report in Chinese. 
-
-The report will be focused on the following topic:
-
-{topic}
+# Prompts are split into static system instructions and a human message
+# template holding every variable, so requests share the longest possible
+# prefix and vLLM can reuse its KV cache (automatic prefix caching) across
+# topics and sections.
 
-The report structure will follow these guidelines:
+report_planner_query_writer_instructions = """You are an expert technical writer, helping to plan a report in Chinese. 
 
-{report_organization}
+You will be given the topic of the report and the guidelines its structure will follow.
 
-Your goal is to generate {number_of_queries} search queries that will help gather comprehensive information for planning the report sections. 
+Your goal is to generate search queries that will help gather comprehensive information for planning the report sections. 
 
 The query should:
 
@@ -17,12 +16,33 @@ The query should:
 
 Make the query specific enough to find high-quality, relevant sources while covering the breadth needed for the report structure."""
 
+report_planner_query_writer_input = """The report will be focused on the following topic:
+
+{topic}
+
+The report structure will follow these guidelines:
+
+{report_organization}
+
+Generate {number_of_queries} search queries that will help with planning the sections of the report in Chinese."""
+
 # Prompt generating the report outline
 report_planner_instructions = """You are an expert technical writer, helping to plan a report in Chinese.
 
 Your goal is to generate the outline of the sections of the report. 
 
-The overall topic of the report is:
+You will be given the overall topic of the report, the organization it should follow and information to reflect on when planning the sections.
+
+Generate the sections of the report. Each section should have the following fields:
+
+- Name - Name for this section of the report.
+- Description - Brief overview of the main topics and concepts to be covered in this section.
+- Research - Whether to perform web research for this section of the report.
+- Content - The content of the section, which you will leave blank for now.
+
+Consider which sections require web research. For example, introduction and conclusion will not require research because they will distill information from other parts of the report."""
+
+report_planner_input = """The overall topic of the report is:
 
 {topic}
 
@@ -34,22 +54,12 @@ You should reflect on this information to plan the sections of the report:
 
 {context}
 
-Now, generate the sections of the report. Each section should have the following fields:
-
-- Name - Name for this section of the report.
-- Description - Brief overview of the main topics and concepts to be covered in this section.
-- Research - Whether to perform web research for this section of the report.
-- Content - The content of the section, which you will leave blank for now.
-
-Consider which sections require web research. For example, introduction and conclusion will not require research because they will distill information from other parts of the report."""
+Now, generate the sections of the report. Your response must include a 'sections' field containing a list of sections. Each section must have: name, description, plan, research, and content fields."""
 
 # Query writer instructions
 query_writer_instructions = """Your goal is to generate targeted web search queries that will gather comprehensive information for writing a technical report section.
 
-Topic for this section:
-{section_topic}
-
-When generating {number_of_queries} search queries, ensure they:
+You will be given the topic for the section and the number of queries to generate. Ensure the queries:
 1. Cover different aspects of the topic (e.g., core features, real-world applications, technical architecture)
 2. Include specific technical terms related to the topic
 3. Target recent information by including year markers where relevant (e.g., "2024")
@@ -62,11 +72,15 @@ Your queries should be:
 - Diverse enough to cover all aspects of the section plan
 - Focused on authoritative sources (documentation, technical blogs, academic papers)"""
 
+query_writer_input = """Topic for this section:
+{section_topic}
+
+Generate {number_of_queries} search queries on the provided topic."""
+
 # Section writer instructions
 section_writer_instructions = """You are an expert technical writer crafting one section of a technical report in Chinese.
 
-Topic for this section:
-{section_topic}
+You will be given the topic for the section and the source material to write it from.
 
 Guidelines for writing:
 
@@ -90,8 +104,7 @@ Guidelines for writing:
 - No sources section needed
 - Write in a clear and easy-to-understand style
 - Avoid using transition words like 'however', 'but', 'therefore', 'thus', 'moreover', 'in conclusion', 'not only', 'for example', 'especially',"例如"，"但是"，"因此"，"所以"，"此外"，"总之"，"不仅"，"例如"，"特别是" in both Chinese and English
-4. Use this source material to help write the section:
-{context}
+4. Use the provided source material to help write the section
 
 5. Quality Checks:
 - Exactly 150-200 words (excluding title and sources)
@@ -102,14 +115,18 @@ Guidelines for writing:
 - No preamble prior to creating the section content
 - Sources cited at end"""
 
-final_section_writer_instructions = """You are an expert technical writer crafting a section that synthesizes information from the rest of the report in Chinese.
-
-Section to write: 
+section_writer_input = """Topic for this section:
 {section_topic}
 
-Available report content:
+Source material:
 {context}
 
+Generate a report section based on the provided sources in Chinese."""
+
+final_section_writer_instructions = """You are an expert technical writer crafting a section that synthesizes information from the rest of the report in Chinese.
+
+You will be given the section to write and the available report content.
+
 1. Section-Specific Approach:
 
 For Introduction:
@@ -149,3 +166,11 @@ For Conclusion/Summary:
 - For conclusion: 100-150 word limit, ## for section title, only ONE structural element at most, no sources section
 - Markdown format
 - Do not include word count or any preamble in your response"""
+
+final_section_writer_input = """Section to write: 
+{section_topic}
+
+Available report content:
+{context}
+
+根据提供的资料生成报告章节。禁止使用过渡词，如'然而'、'但是'、'因此'、'所以'、'此外'、'总之'、'不仅'、'例如'，'特别是'等中英文过渡词。不要夸大其词。忠实原文内容，使内容简洁、清晰、流畅。不要将总结放到每个章节末尾"""
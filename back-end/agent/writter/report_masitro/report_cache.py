@@ -0,0 +1,96 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+
+def fingerprint(*parts: Any) -> str:
+    """Stable hash of JSON-serializable parts, used as a cache key."""
+    return hashlib.sha256(
+        json.dumps(parts, ensure_ascii=False,
+                   sort_keys=True).encode("utf-8")).hexdigest()
+
+
+def source_fingerprint(search_docs) -> str:
+    """
+    Hash of the distinct retrieved chunks, independent of query order.
+
+    Args:
+        search_docs: VectorStore.search_list result, a list of
+            (Document, score) lists
+    """
+    contents = {doc.page_content for results in search_docs for doc, _ in results}
+    return fingerprint(sorted(contents))
+
+
+class ReportCache:
+    """
+    Report plans and written sections from earlier runs, in a SQLite file.
+
+    Entries are keyed by what produced them (topic, structure, model and
+    a fingerprint of the sources the LLM saw), so regenerating a report
+    reuses the plan and every section whose sources did not change, and
+    only rewrites the rest.
+    """
+
+    def __init__(self, path: str, ttl: Optional[float] = None) -> None:
+        """
+        Args:
+            path: SQLite database file, created if missing
+            ttl: Seconds an entry stays valid; None keeps entries forever
+        """
+        self.path = path
+        self.ttl = ttl
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("CREATE TABLE IF NOT EXISTS entries ("
+                               "kind TEXT NOT NULL, key TEXT NOT NULL, "
+                               "value TEXT NOT NULL, "
+                               "created_at REAL NOT NULL, "
+                               "PRIMARY KEY (kind, key))")
+
+    def _get(self, kind: str, key: str) -> Optional[Any]:
+        with self._lock, self._conn:
+            row = self._conn.execute(
+                "SELECT value, created_at FROM entries "
+                "WHERE kind = ? AND key = ?", (kind, key)).fetchone()
+            if row is None:
+                return None
+            if self.ttl is not None and time.time() - row[1] > self.ttl:
+                self._conn.execute(
+                    "DELETE FROM entries WHERE kind = ? AND key = ?",
+                    (kind, key))
+                return None
+        return json.loads(row[0])
+
+    def _put(self, kind: str, key: str, value: Any) -> None:
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?)",
+                (kind, key, json.dumps(value, ensure_ascii=False), now))
+            if self.ttl is not None:
+                self._conn.execute("DELETE FROM entries WHERE created_at < ?",
+                                   (now - self.ttl, ))
+
+    def get_plan(self, key: str) -> Optional[List[Dict[str, Any]]]:
+        """Sections of a cached plan, as dicts of Section fields."""
+        return self._get("plan", key)
+
+    def put_plan(self, key: str, sections: List[Dict[str, Any]]) -> None:
+        self._put("plan", key, sections)
+
+    def get_section(self, key: str) -> Optional[str]:
+        """Content of a cached section."""
+        return self._get("section", key)
+
+    def put_section(self, key: str, content: str) -> None:
+        self._put("section", key, content)
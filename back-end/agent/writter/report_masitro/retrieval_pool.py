@@ -0,0 +1,117 @@
+import threading
+from concurrent.futures import Future
+from typing import Any, Dict, List, Tuple
+from tracing import REPORT_RETRIEVAL_LOOKUPS
+
+
+def normalize_query(query: str) -> str:
+    """Query with whitespace collapsed, so trivially different copies match"""
+    return " ".join(query.split())
+
+
+def count_relevant(search_docs, max_distance: float) -> int:
+    """Distinct chunks among `search_docs` within `max_distance` of their query"""
+    return len({
+        doc.page_content
+        for results in search_docs for doc, distance in results
+        if distance <= max_distance
+    })
+
+
+class QueryBudget:
+    """Follow-up queries left for a report, shared by its sections."""
+
+    def __init__(self, total: int) -> None:
+        self.total = total
+        self.used = 0
+        self._lock = threading.Lock()
+
+    def take(self) -> bool:
+        """Use one query from the budget; False once it is spent"""
+        with self._lock:
+            if self.used >= self.total:
+                return False
+            self.used += 1
+            return True
+
+
+class RetrievalPool:
+    """
+    Retrieval results shared by everything that researches one report.
+
+    The planner and the section subgraphs (run in parallel by the Send
+    fan-out) often search for the same queries. Each distinct query is sent
+    to the vector store once per report; later and concurrent requests for
+    it wait for and reuse that result. Retrieved chunks are kept in a pool
+    keyed by content, so a chunk returned for several queries is a single
+    Document.
+    """
+
+    def __init__(self, vectorDB) -> None:
+        """
+        Args:
+            vectorDB: Vector store with `search_list(query_list)`
+        """
+        self.vectorDB = vectorDB
+        self._lock = threading.Lock()
+        self._results: Dict[str, Future] = {}
+        self._chunks: Dict[str, Any] = {}
+        self._queries = 0
+        self._searches = 0
+        self._search_calls = 0
+        self._chunks_retrieved = 0
+
+    def _intern(self, results: List[Tuple[Any, float]]) -> List[Tuple[Any, float]]:
+        pooled = []
+        with self._lock:
+            for doc, score in results:
+                self._chunks_retrieved += 1
+                pooled.append((self._chunks.setdefault(doc.page_content,
+                                                       doc), score))
+        return pooled
+
+    def search_list(self, query_list: List[str]) -> List[List[Tuple[Any, float]]]:
+        """
+        Drop-in for `VectorStore.search_list`: (Document, score) lists, one
+        per query, searching only for queries this report has not seen.
+        """
+        keys = [normalize_query(query) for query in query_list]
+        owned = {}
+        with self._lock:
+            self._queries += len(keys)
+            for key in keys:
+                if key not in self._results:
+                    owned[key] = self._results[key] = Future()
+            futures = [self._results[key] for key in keys]
+            if owned:
+                self._searches += len(owned)
+                self._search_calls += 1
+        REPORT_RETRIEVAL_LOOKUPS.labels("miss").inc(len(owned))
+        REPORT_RETRIEVAL_LOOKUPS.labels("hit").inc(len(keys) - len(owned))
+
+        if owned:
+            try:
+                search_docs = self.vectorDB.search_list(list(owned))
+            except Exception as e:
+                # Let the next request for these queries try again
+                with self._lock:
+                    for key, future in owned.items():
+                        del self._results[key]
+                        future.set_exception(e)
+                raise
+            for (key, future), results in zip(owned.items(), search_docs):
+                future.set_result(self._intern(results))
+
+        return [future.result() for future in futures]
+
+    def stats(self) -> Dict[str, int]:
+        """Queries requested, vector store searches made and saved, chunks pooled"""
+        with self._lock:
+            return {
+                "queries": self._queries,
+                "searches": self._searches,
+                "searches_saved": self._queries - self._searches,
+                "search_calls": self._search_calls,
+                "chunks_retrieved": self._chunks_retrieved,
+                "unique_chunks": len(self._chunks),
+            }
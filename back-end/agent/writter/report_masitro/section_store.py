@@ -0,0 +1,38 @@
+import threading
+from typing import Dict, Sequence, Tuple
+from .data_model import Section
+from .utilities import format_sections
+
+
+class SectionStore:
+    """
+    Written sections of one report, keyed by their index in the plan.
+
+    Graph state and Send payloads carry these IDs instead of section text,
+    so each section's content is held once however many nodes read it, and
+    the plan's Section objects are never modified. The context handed to
+    the final sections is formatted once and shared by all of them.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._sections: Dict[int, Tuple[Section, str]] = {}
+        self._contexts: Dict[Tuple[int, ...], str] = {}
+
+    def put(self, section_id: int, section: Section, content: str) -> None:
+        with self._lock:
+            self._sections[section_id] = (section, content)
+
+    def content(self, section_id: int) -> str:
+        return self._sections[section_id][1]
+
+    def context(self, section_ids: Sequence[int]) -> str:
+        """Sections `section_ids` formatted for a prompt, built once per set of IDs"""
+        key = tuple(section_ids)
+        with self._lock:
+            if key not in self._contexts:
+                written = [self._sections[i] for i in key]
+                self._contexts[key] = format_sections(
+                    [section for section, _ in written],
+                    [content for _, content in written])
+            return self._contexts[key]
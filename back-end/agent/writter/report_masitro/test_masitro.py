@@ -0,0 +1,81 @@
+import os
+import sys
+import unittest
+from unittest.mock import Mock
+
+# masitro.py uses relative imports, so import it through the package
+sys.path.insert(
+    0,
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", ".."))
+from agent.writter.report_masitro.masitro import SectionStream
+
+
+def named(name, research):
+    # Mock(name=...) names the mock itself, so set the attribute afterwards
+    s = Mock(research=research)
+    s.name = name
+    return s
+
+
+class TestSectionStream(unittest.TestCase):
+
+    def setUp(self):
+        self.contents = {1: "a", 2: "b", 3: "end"}
+        self.store = Mock(content=lambda i: self.contents[i])
+        self.stream = SectionStream(self.store)
+        self.plan = [
+            named("Intro", False),
+            named("A", True),
+            named("B", True),
+            named("Conclusion", False)
+        ]
+
+    def test_plan_event(self):
+        """测试大纲生成后立即发送 plan 事件"""
+        events = self.stream.events(
+            {"generate_report_plan": {
+                "sections": self.plan
+            }})
+        self.assertEqual(events[0][0], "plan")
+        self.assertEqual([s["name"] for s in events[0][1]["sections"]],
+                         ["Intro", "A", "B", "Conclusion"])
+
+    def test_research_sections_in_plan_order(self):
+        """测试乱序完成的研究章节按大纲顺序发送"""
+        self.stream.events({"generate_report_plan": {"sections": self.plan}})
+
+        events = self.stream.events(
+            {"build_section_with_web_research": {
+                "completed_sections": [2]
+            }})
+        self.assertEqual(events, [])
+
+        events = self.stream.events(
+            {"build_section_with_web_research": {
+                "completed_sections": [1]
+            }})
+        self.assertEqual([(e, d["index"], d["content"]) for e, d in events],
+                         [("section", 1, "a"), ("section", 2, "b")])
+
+    def test_final_sections_and_done(self):
+        """测试总结章节完成即发送，最后发送完整报告"""
+        self.stream.events({"generate_report_plan": {"sections": self.plan}})
+        events = self.stream.events(
+            {"write_final_sections": {
+                "completed_sections": [3]
+            }})
+        self.assertEqual(events, [("section", {
+            "index": 3,
+            "name": "Conclusion",
+            "content": "end"
+        })])
+
+        events = self.stream.events(
+            {"compile_final_report": {
+                "final_report": "report"
+            }})
+        self.assertEqual(events, [("done", {"content": "report"})])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,54 @@
+import os
+import tempfile
+import unittest
+from unittest.mock import Mock, patch
+from report_cache import ReportCache, fingerprint, source_fingerprint
+
+
+def doc(text):
+    return Mock(page_content=text)
+
+
+class TestReportCache(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "report_cache.sqlite3")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_source_fingerprint_ignores_order_and_duplicates(self):
+        """测试来源指纹与检索顺序和重复无关"""
+        first = [[(doc("a"), 0.1), (doc("b"), 0.2)], [(doc("a"), 0.3)]]
+        second = [[(doc("b"), 0.5)], [(doc("a"), 0.1)]]
+        self.assertEqual(source_fingerprint(first), source_fingerprint(second))
+        self.assertNotEqual(source_fingerprint(first),
+                            source_fingerprint([[(doc("a"), 0.1)]]))
+
+    def test_plan_and_section_round_trip(self):
+        cache = ReportCache(self.path)
+        key = fingerprint("plan", "model", "主题", None, "sources")
+        self.assertIsNone(cache.get_plan(key))
+        sections = [{"name": "引言", "description": "d", "research": False,
+                     "content": ""}]
+        cache.put_plan(key, sections)
+        cache.put_section(key, "正文")
+        # 新实例从同一文件读取
+        reopened = ReportCache(self.path)
+        self.assertEqual(reopened.get_plan(key), sections)
+        self.assertEqual(reopened.get_section(key), "正文")
+
+    def test_entries_expire_after_ttl(self):
+        """测试超过 TTL 的条目失效"""
+        cache = ReportCache(self.path, ttl=60)
+        with patch('report_cache.time.time', return_value=1000.0):
+            cache.put_section("k", "正文")
+        with patch('report_cache.time.time', return_value=1059.0):
+            self.assertEqual(cache.get_section("k"), "正文")
+        with patch('report_cache.time.time', return_value=1061.0):
+            self.assertIsNone(cache.get_section("k"))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,109 @@
+import threading
+import unittest
+from unittest.mock import Mock
+from retrieval_pool import (QueryBudget, RetrievalPool, count_relevant,
+                            normalize_query)
+
+
+def doc(text):
+    return Mock(page_content=text)
+
+
+class FakeVectorStore:
+    """每个查询返回两个片段，其中 "shared" 片段所有查询都会返回"""
+
+    def __init__(self):
+        self.calls = []
+
+    def search_list(self, query_list):
+        self.calls.append(list(query_list))
+        return [[(doc(f"{query} chunk"), 0.1), (doc("shared"), 0.2)]
+                for query in query_list]
+
+
+class TestRetrievalPool(unittest.TestCase):
+
+    def setUp(self):
+        self.store = FakeVectorStore()
+        self.pool = RetrievalPool(self.store)
+
+    def test_repeated_queries_are_searched_once(self):
+        """测试同一报告中重复的查询只检索一次"""
+        first = self.pool.search_list(["人工智能 应用", "芯片"])
+        second = self.pool.search_list(["芯片", " 人工智能  应用", "政策"])
+
+        self.assertEqual(self.store.calls,
+                         [["人工智能 应用", "芯片"], ["政策"]])
+        self.assertIs(second[0], first[1])
+        self.assertIs(second[1], first[0])
+
+        stats = self.pool.stats()
+        self.assertEqual(stats["queries"], 5)
+        self.assertEqual(stats["searches"], 3)
+        self.assertEqual(stats["searches_saved"], 2)
+
+    def test_chunks_are_pooled(self):
+        """测试不同查询返回的相同片段共用同一个对象"""
+        results = self.pool.search_list(["a", "b"])
+        self.assertIs(results[0][1][0], results[1][1][0])
+        self.assertEqual(self.pool.stats()["unique_chunks"], 3)
+        self.assertEqual(self.pool.stats()["chunks_retrieved"], 4)
+
+    def test_concurrent_requests_share_one_search(self):
+        """测试并发的相同查询等待同一次检索"""
+        started, release = threading.Event(), threading.Event()
+        search_list = self.store.search_list
+
+        def slow_search(query_list):
+            started.set()
+            release.wait(5)
+            return search_list(query_list)
+
+        self.store.search_list = slow_search
+        results = []
+        first = threading.Thread(
+            target=lambda: results.append(self.pool.search_list(["q"])))
+        first.start()
+        started.wait(5)
+        second = threading.Thread(
+            target=lambda: results.append(self.pool.search_list(["q"])))
+        second.start()
+        release.set()
+        first.join(5)
+        second.join(5)
+
+        self.assertEqual(self.store.calls, [["q"]])
+        self.assertIs(results[0][0], results[1][0])
+
+    def test_failed_search_can_be_retried(self):
+        """测试检索失败后同一查询可以重新检索"""
+        self.store.search_list = Mock(side_effect=RuntimeError("down"))
+        with self.assertRaises(RuntimeError):
+            self.pool.search_list(["q"])
+
+        self.store.search_list = FakeVectorStore().search_list
+        self.assertEqual(len(self.pool.search_list(["q"])[0]), 2)
+
+    def test_normalize_query(self):
+        self.assertEqual(normalize_query("  a \n b "), "a b")
+
+
+class TestAdaptiveQueries(unittest.TestCase):
+
+    def test_count_relevant(self):
+        """测试只统计距离在阈值内的不同片段"""
+        search_docs = [[(doc("a"), 0.2), (doc("b"), 1.5)],
+                       [(doc("a"), 0.3), (doc("c"), 0.8)]]
+        self.assertEqual(count_relevant(search_docs, 0.8), 2)
+        self.assertEqual(count_relevant(search_docs, 0.1), 0)
+
+    def test_query_budget(self):
+        """测试预算用完后不再允许追加查询"""
+        budget = QueryBudget(2)
+        self.assertEqual([budget.take() for _ in range(3)],
+                         [True, True, False])
+        self.assertEqual(budget.used, 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,50 @@
+import os
+import sys
+import unittest
+
+# section_store.py uses relative imports, so import it through the package
+sys.path.insert(
+    0,
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", ".."))
+from agent.writter.report_masitro.data_model import Section
+from agent.writter.report_masitro.section_store import SectionStore
+from agent.writter.report_masitro.utilities import format_sections
+
+
+def section(name, research=True):
+    return Section(name=name,
+                   description=f"{name} description",
+                   research=research,
+                   content="")
+
+
+class TestSectionStore(unittest.TestCase):
+
+    def setUp(self):
+        self.store = SectionStore()
+        self.plan = [section("A"), section("B"), section("Summary", False)]
+        self.store.put(1, self.plan[1], "b text")
+        self.store.put(0, self.plan[0], "a text")
+
+    def test_plan_sections_are_not_modified(self):
+        """测试写入内容不会修改大纲中的 Section 对象"""
+        self.assertEqual(self.store.content(0), "a text")
+        self.assertEqual(self.plan[0].content, "")
+
+    def test_context_is_built_once(self):
+        """测试同一组章节的上下文只格式化一次并共享"""
+        context = self.store.context([0, 1])
+        self.assertIs(self.store.context([0, 1]), context)
+        self.assertEqual(
+            context,
+            format_sections(self.plan[:2], ["a text", "b text"]))
+        self.assertIn("Section 2: B\n", context)
+        self.assertIn("Content:\nb text", context)
+
+    def test_format_sections_defaults_to_section_content(self):
+        """测试未提供内容时使用章节自身的内容"""
+        self.assertIn("[Not yet written]", format_sections([self.plan[2]]))
+
+
+if __name__ == '__main__':
+    unittest.main()
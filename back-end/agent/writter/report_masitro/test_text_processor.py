@@ -0,0 +1,60 @@
+import unittest
+from text_processor import TextProcessor
+
+
+def replace_loop(text, words):
+    # 原先的实现：每个过滤词调用一次 str.replace
+    for word in words:
+        text = text.replace(word, '')
+    return text
+
+
+class TestTextProcessor(unittest.TestCase):
+
+    def setUp(self):
+        self.processor = TextProcessor()
+        self.text = ("总的来说，人工智能发展迅速。例如，大模型已经落地；比如:客服、"
+                     "写作。因此，成本下降，所以，应用增多。总而言之，前景广阔。")
+
+    def test_matches_replace_loop(self):
+        """测试默认过滤词的结果与逐词替换一致"""
+        self.assertEqual(
+            self.processor.process_text(self.text),
+            replace_loop(self.text, TextProcessor.DEFAULT_FILTER_WORDS))
+        self.assertEqual(self.processor.process_text("没有过滤词"), "没有过滤词")
+
+    def test_longest_word_wins(self):
+        """测试重叠的过滤词优先匹配较长的一个"""
+        processor = TextProcessor(["总的", "总的来说，"])
+        self.assertEqual(processor.process_text("总的来说，很好"), "很好")
+
+    def test_special_characters_are_literal(self):
+        """测试过滤词中的正则特殊字符按原样匹配"""
+        processor = TextProcessor(["(注)", "a.b"])
+        self.assertEqual(processor.process_text("(注)a.b axb"), " axb")
+
+    def test_large_filter_list(self):
+        """测试大规模自定义过滤词列表"""
+        words = [f"词{i}，" for i in range(5000)]
+        processor = TextProcessor(words)
+        text = "开始词42，中间词4999，结束"
+        self.assertEqual(processor.process_text(text), "开始中间结束")
+
+    def test_stream_matches_process_text(self):
+        """测试任意切分位置的流式处理结果与整体处理一致"""
+        expected = self.processor.process_text(self.text)
+        for size in (1, 2, 3, 7, len(self.text)):
+            chunks = [
+                self.text[i:i + size] for i in range(0, len(self.text), size)
+            ]
+            self.assertEqual(''.join(self.processor.process_stream(chunks)),
+                             expected)
+
+    def test_stream_emits_before_end(self):
+        """测试流式处理不会等到输入结束才输出"""
+        stream = self.processor.process_stream(iter(["第一段内容。", "第二段"]))
+        self.assertEqual(next(stream), "第一")
+
+
+if __name__ == '__main__':
+    unittest.main()
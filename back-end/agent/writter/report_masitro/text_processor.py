@@ -1,3 +1,7 @@
+import re
+from typing import Iterable, Iterator
+
+
 class TextProcessor:
     # 默认的过滤词列表
     DEFAULT_FILTER_WORDS = [
@@ -16,26 +20,68 @@ class TextProcessor:
     def __init__(self, filter_words=None):
         """
         初始化文本处理器
-        
+
+        所有过滤词在构造时编译成一个正则（最长的词优先），处理文本时一次扫描
+        即可移除全部过滤词，耗时与过滤词数量基本无关。
+
         Args:
             filter_words: 可选的自定义过滤词列表，如果不提供则使用默认列表
         """
         self.filter_words = filter_words or self.DEFAULT_FILTER_WORDS
+        words = sorted({word for word in self.filter_words if word},
+                       key=len,
+                       reverse=True)
+        self.pattern = re.compile("|".join(map(re.escape, words))) if words else None
+        # 流式处理时末尾需要保留的字符数，以免切断跨块的过滤词
+        self.holdback = max(map(len, words), default=1) - 1
 
     def process_text(self, text: str) -> str:
         """
         处理文本，移除不需要的词语和字符
-        
+
         Args:
             text: 需要处理的文本
-            
+
         Returns:
             处理后的文本
         """
-        processed_text = text
-        
-        # 移除过滤词
-        for word in self.filter_words:
-            processed_text = processed_text.replace(word, '')
-            
-        return processed_text 
\ No newline at end of file
+        if self.pattern is None:
+            return text
+        return self.pattern.sub('', text)
+
+    def process_stream(self, chunks: Iterable[str]) -> Iterator[str]:
+        """
+        流式处理文本，结果与对拼接后的全文调用 process_text 相同
+
+        每个块处理后立即输出，只保留末尾可能是过滤词开头的几个字符，
+        与下一个块拼接后再判断。
+
+        Args:
+            chunks: 依次到达的文本块
+
+        Yields:
+            处理后的文本片段
+        """
+        buffer = ''
+        for chunk in chunks:
+            buffer += chunk
+            if self.pattern is None:
+                yield buffer
+                buffer = ''
+                continue
+            # 在 cut 之前开始的匹配只取决于已收到的文本
+            cut = max(0, len(buffer) - self.holdback)
+            pieces, pos = [], 0
+            for match in self.pattern.finditer(buffer):
+                if match.start() >= cut:
+                    break
+                pieces.append(buffer[pos:match.start()])
+                pos = match.end()
+            end = max(pos, cut)
+            pieces.append(buffer[pos:end])
+            buffer = buffer[end:]
+            output = ''.join(pieces)
+            if output:
+                yield output
+        if buffer:
+            yield self.process_text(buffer)
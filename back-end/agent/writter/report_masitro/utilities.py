@@ -32,10 +32,10 @@ def deduplicate_and_format_sources(search_response,
             "Input must be either a dict with 'results' or a list of search results"
         )
 
-    # Deduplicate by URL
-    unique_sources = set()
-    for source in sources_list:
-        unique_sources.add(source[0].page_content)
+    # Deduplicate by content, keeping retrieval order so the same results
+    # always format to the same string (and the same cache keys)
+    unique_sources = list(
+        dict.fromkeys(source[0].page_content for source in sources_list))
 
     # Format output
     formatted_text = "Sources:\n\n"
@@ -58,21 +58,20 @@ def deduplicate_and_format_sources(search_response,
     return formatted_text.strip()
 
 
-def format_sections(sections: list[Section]) -> str:
-    """ Format a list of sections into a string """
-    formatted_str = ""
-    for idx, section in enumerate(sections, 1):
-        formatted_str += f"""
-        {'='*60}
-        Section {idx}: {section.name}
-        {'='*60}
-        Description:
-        {section.description}
-        Requires Research: 
-        {section.research}
-
-        Content:
-        {section.content if section.content else '[Not yet written]'}
+def format_sections(sections: list[Section], contents: list[str] = None) -> str:
+    """
+    Format a list of sections into a string
 
-        """
-    return formatted_str
+    Args:
+        sections: Sections to format
+        contents: Their written content, in the same order; defaults to
+            each section's own `content`
+    """
+    if contents is None:
+        contents = [section.content for section in sections]
+    return "\n\n".join(
+        f"Section {idx}: {section.name}\n"
+        f"Description: {section.description}\n"
+        f"Requires Research: {section.research}\n"
+        f"Content:\n{content if content else '[Not yet written]'}"
+        for idx, (section, content) in enumerate(zip(sections, contents), 1))
@@ -1,19 +1,18 @@
+import io
 import os
-import pypandoc
-from flask import Flask, jsonify, request, send_file
+from flask import Flask, Response, g, jsonify, request, send_file
 from flask_cors import CORS
 from datetime import datetime
 from werkzeug.utils import secure_filename
 from urllib.parse import urlparse
-from agent.rag.tools import VectorStore
+from agent.rag.tools import FILTERABLE_KEYS
 from agent.rag.rag import get_rag_answer
-from agent.writter.report_masitro.masitro import get_report_masitro
-from audio.asr import ASRService
-from utilities import extract_text_from_url, allowed_file, create_response, cleanup_temp_file, initialize_chrome_driver
-
-# Constants
-UPLOAD_FOLDER = 'uploads/audio'
-ALLOWED_ORIGINS = ["http://localhost:3000", "http://45.252.106.202:3000"]
+from agent.writter.report_masitro.masitro import get_report_masitro, stream_report_masitro
+from utilities import extract_text_from_url, allowed_file, create_response, sse_event
+from docx_converter import DOCX_MIMETYPE
+from audio.upload import UploadError
+from tracing import traced, metrics_payload
+from services import UPLOAD_FOLDER, ALLOWED_ORIGINS, PUBLIC_ENDPOINTS, asr_service, tts_service, upload_manager, users, docx_converter, index_transcription, index_migrator, issue_token, require_admin, store_for_user, user_for_request
 
 # Flask app configuration
 app = Flask(__name__)
@@ -21,25 +20,52 @@ CORS(app,
      resources={
          r"/api/*": {
              "origins": ALLOWED_ORIGINS,
-             "methods": ["GET", "POST", "OPTIONS"],
-             "allow_headers": ["Content-Type"]
+             "methods": ["GET", "POST", "PUT", "OPTIONS"],
+             "allow_headers": [
+                 "Content-Type", "Authorization", "Upload-Offset",
+                 "Upload-Checksum"
+             ]
          }
      })
 
 app.config['UPLOAD_FOLDER'] = UPLOAD_FOLDER
 
-# Create upload directory
-os.makedirs(UPLOAD_FOLDER, exist_ok=True)
-os.makedirs('temp',
-            exist_ok=True)  # Create temp directory for file conversions
 
-# Initialize services
-vectorstore = VectorStore(path="./chroma_db")
-asr_service = ASRService()
-initialize_chrome_driver()  # Initialize Chrome driver at startup
+def transcribe_and_index(final_filename,
+                         speaker=None,
+                         language=None,
+                         result=None):
+    """Transcribe an uploaded audio file, unless `result` already holds its transcription, and add it to the vector store."""
+    if result is None:
+        filepath = os.path.join(app.config['UPLOAD_FOLDER'], final_filename)
+        result = asr_service.transcribe_segments(filepath)
+
+    index_transcription(g.vectorstore, result, final_filename, speaker,
+                        language)
+
+    return create_response({
+        'message': 'File uploaded successfully',
+        'filename': final_filename,
+        'transcription': result['text'],
+        'segments': result['segments']
+    })
+
+
+@app.before_request
+def resolve_vectorstore():
+    """Identify the caller and use their workspace's vector store for this request."""
+    if request.method == 'OPTIONS' or request.endpoint in PUBLIC_ENDPOINTS:
+        return None
+    try:
+        g.user = user_for_request(request.headers.get('Authorization'))
+    except PermissionError as e:
+        return create_response(error=str(e), status_code=401)
+    g.vectorstore = store_for_user(g.user)
+
 
-# Mock database (TODO: replace with real database in production)
-users = {"admin@example.com": {"password": "admin123", "role": "admin"}}
+def upload_error_response(error):
+    """Response for a rejected upload request, including the offset to resume from."""
+    return jsonify({'error': str(error), **error.details}), error.status_code
 
 
 @app.route('/api/login', methods=['POST'])
@@ -56,7 +82,11 @@ def login():
 
         user = users.get(email)
         if user and user['password'] == password:
-            return create_response({'email': email, 'role': user['role']})
+            return create_response({
+                'email': email,
+                'role': user['role'],
+                'token': issue_token(email)
+            })
 
         return create_response(error='Invalid credentials', status_code=401)
     except Exception as e:
@@ -72,7 +102,15 @@ def health_check():
     })
 
 
+@app.route('/metrics', methods=['GET'])
+def metrics():
+    """Expose pipeline latency and token metrics for Prometheus."""
+    body, content_type = metrics_payload()
+    return Response(body, content_type=content_type)
+
+
 @app.route('/api/upload-audio', methods=['POST'])
+@traced("http", "/api/upload-audio")
 def upload_audio():
     """Handle audio file uploads and transcription."""
     try:
@@ -92,21 +130,106 @@ def upload_audio():
         filepath = os.path.join(app.config['UPLOAD_FOLDER'], final_filename)
 
         audio_file.save(filepath)
-        transcription = asr_service.transcribe(filepath)
+        return transcribe_and_index(final_filename,
+                                    speaker=request.form.get('speaker'),
+                                    language=request.form.get('language'))
+    except Exception as e:
+        return create_response(error=str(e), status_code=500)
 
-        doc = vectorstore.create_document(transcription, "audio")
-        vectorstore.create_index([doc])
 
-        return create_response({
-            'message': 'File uploaded successfully',
-            'filename': final_filename,
-            'transcription': transcription
-        })
+@app.route('/api/upload-audio/sessions', methods=['POST'])
+def create_upload_session():
+    """Start a resumable upload; the client then PUTs ranges at the returned offset."""
+    try:
+        data = request.get_json()
+        filename = data.get('filename')
+        if not filename or not allowed_file(filename):
+            return create_response(error='Invalid file type', status_code=400)
+
+        status = upload_manager.create_session(filename, int(data.get('size', 0)),
+                                               data.get('sha256'),
+                                               owner=g.user)
+        return create_response(status, status_code=201)
+    except UploadError as e:
+        return upload_error_response(e)
+    except Exception as e:
+        return create_response(error=str(e), status_code=500)
+
+
+@app.route('/api/upload-audio/sessions/<session_id>', methods=['GET'])
+def upload_session_status(session_id):
+    """Report the offset to resume from and any early transcription."""
+    try:
+        return create_response(upload_manager.status(session_id, g.user))
+    except UploadError as e:
+        return upload_error_response(e)
+
+
+@app.route('/api/upload-audio/sessions/<session_id>', methods=['PUT'])
+def upload_session_range(session_id):
+    """Stream one byte range, starting at the Upload-Offset header, to disk."""
+    try:
+        offset = int(request.headers.get('Upload-Offset', -1))
+        status = upload_manager.append(session_id,
+                                       offset,
+                                       request.stream,
+                                       request.headers.get('Upload-Checksum'),
+                                       owner=g.user)
+        return create_response(status)
+    except UploadError as e:
+        return upload_error_response(e)
     except Exception as e:
         return create_response(error=str(e), status_code=500)
 
 
+@app.route('/api/upload-audio/sessions/<session_id>/complete',
+           methods=['POST'])
+@traced("http", "/api/upload-audio/complete")
+def complete_upload_session(session_id):
+    """Verify a finished upload, then transcribe and index it."""
+    try:
+        data = request.get_json(silent=True) or {}
+        final_filename, result = upload_manager.complete(session_id, g.user)
+        return transcribe_and_index(final_filename,
+                                    speaker=data.get('speaker'),
+                                    language=data.get('language'),
+                                    result=result)
+    except UploadError as e:
+        return upload_error_response(e)
+    except Exception as e:
+        return create_response(error=str(e), status_code=500)
+
+
+@app.route('/api/index/migrate', methods=['GET'])
+def index_migration_status():
+    """Report progress of the current or last index migration (admins only)."""
+    try:
+        require_admin(request.headers.get('Authorization'))
+    except PermissionError as e:
+        return create_response(error=str(e), status_code=403)
+    return create_response(index_migrator.status())
+
+
+@app.route('/api/index/migrate', methods=['POST'])
+def start_index_migration():
+    """Re-embed the vector store with the embedding model in config.yaml in the background (admins only)."""
+    try:
+        require_admin(request.headers.get('Authorization'))
+    except PermissionError as e:
+        return create_response(error=str(e), status_code=403)
+    try:
+        # The target model always comes from config.yaml: taking endpoints
+        # from the request would let callers send every chunk to any URL
+        status = index_migrator.start()
+        return create_response(status, status_code=202)
+    except RuntimeError as e:
+        return create_response(error=str(e), status_code=409)
+    except ValueError as e:
+        return create_response(error=str(e), status_code=400)
+
+
 @app.route('/api/search', methods=['POST'])
+@traced("http", "/api/search")
 def search():
     """Handle vector search requests."""
     data = request.get_json()
@@ -116,15 +239,28 @@ def search():
         return jsonify({'error': 'Missing query'}), 400
 
     try:
-        docs = vectorstore.search(query)
+        # Optional metadata filters, e.g. {"source": "audio", "since": "2024-12-01"}
+        filters = data.get('filters') or {}
+        search_filter = g.vectorstore.build_filter(
+            **{
+                key: filters.get(key)
+                for key in FILTERABLE_KEYS + ('since', 'until')
+            })
+    except ValueError as e:
+        # A malformed since/until is the caller's mistake, not a server error
+        return jsonify({'error': str(e)}), 400
+
+    try:
+        docs = g.vectorstore.search(query, filter=search_filter)
         results = []
-        rag_answer = get_rag_answer(query, vectorstore)
+        rag_answer = get_rag_answer(query, g.vectorstore, search_filter)
         for i, doc in enumerate(docs):
             results.append({
                 'id': i + 1,
                 'name': 'AI Response',
                 'content': doc.page_content,
                 'type': doc.metadata.get("source"),
+                'metadata': doc.metadata,
                 'status': 'completed',
                 'timestamp': 'just now',
                 'avatar': f'https://picsum.photos/seed/ai{i+1}/200'
@@ -135,6 +271,7 @@ def search():
 
 
 @app.route('/api/parse-url', methods=['POST'])
+@traced("http", "/api/parse-url")
 def parse_url():
     """Handle URL parsing requests."""
     data = request.get_json()
@@ -154,8 +291,11 @@ def parse_url():
         content = extract_text_from_url(url, need_js)
 
         # Create document and add to vector store
-        doc = vectorstore.create_document(content, "text")
-        vectorstore.create_index([doc])
+        doc = g.vectorstore.create_document(content,
+                                          "text",
+                                          origin=url,
+                                          language=data.get('language'))
+        g.vectorstore.create_index([doc])
 
         return jsonify({
             'message': 'URL parsed successfully',
@@ -167,6 +307,7 @@ def parse_url():
 
 
 @app.route('/api/generate', methods=['POST'])
+@traced("http", "/api/generate")
 def generate():
     """Generate markdown content based on title and configuration."""
     data = request.get_json()
@@ -178,7 +319,7 @@ def generate():
 
     try:
         # 将配置信息传递给生成函数
-        report = get_report_masitro(title, vectorstore, config)
+        report = get_report_masitro(title, g.vectorstore, config)
 
         return jsonify({
             'content': report,
@@ -189,10 +330,30 @@ def generate():
         return jsonify({'error': str(e)}), 500
 
 
+@app.route('/api/generate/stream', methods=['POST'])
+@traced("http", "/api/generate/stream")
+def generate_stream():
+    """Stream the report as server-sent events, one per written section."""
+    data = request.get_json()
+    title = data.get('title')
+    config = data.get('config')
+
+    if not title:
+        return jsonify({'error': 'Missing title'}), 400
+
+    events = stream_report_masitro(title, g.vectorstore, config)
+    return Response((sse_event(event, payload) for event, payload in events),
+                    mimetype='text/event-stream',
+                    headers={
+                        'Cache-Control': 'no-cache',
+                        'X-Accel-Buffering': 'no'
+                    })
+
+
 @app.route('/api/convert-to-docx', methods=['POST'])
+@traced("http", "/api/convert-to-docx")
 def convert_to_docx():
     """Convert markdown to DOCX and return the file."""
-    temp_file = None
     try:
         data = request.get_json()
         markdown_content = data.get('markdown')
@@ -202,32 +363,36 @@ def convert_to_docx():
             return create_response(error='No content provided',
                                    status_code=400)
 
-        temp_file = os.path.abspath(os.path.join('temp', f"temp_{title}.docx"))
-        pypandoc.convert_text(markdown_content,
-                              'docx',
-                              format='md',
-                              outputfile=temp_file)
-
-        return send_file(
-            temp_file,
-            as_attachment=True,
-            download_name=f"{title}.docx",
-            mimetype=
-            'application/vnd.openxmlformats-officedocument.wordprocessingml.document'
-        )
+        content = docx_converter.convert(markdown_content)
+
+        return send_file(io.BytesIO(content),
+                         as_attachment=True,
+                         download_name=f"{title}.docx",
+                         mimetype=DOCX_MIMETYPE)
     except Exception as e:
         return create_response(error=str(e), status_code=500)
-    finally:
-        cleanup_temp_file(temp_file)
 
 
 @app.route('/api/convert-to-podcast', methods=['POST'])
+@traced("http", "/api/convert-to-podcast")
 def convert_to_podcast():
-    """Convert text to speech and return as MP3."""
+    """Convert text to speech and stream it back as MP3."""
     try:
         data = request.get_json()
         text = data.get('text')
         title = data.get('title', 'podcast')
+        voice = data.get('voice')
+
+        if not text:
+            return create_response(error='No content provided',
+                                   status_code=400)
+
+        # Chunked transfer: each sentence chunk is sent as soon as it is ready
+        filename = secure_filename(title) or 'podcast'
+        return Response(
+            tts_service.stream(text, voice),
+            mimetype='audio/mpeg',
+            headers={'Content-Disposition': f'inline; filename="{filename}.mp3"'})
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
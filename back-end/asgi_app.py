@@ -0,0 +1,458 @@
+"""
+ASGI serving mode for the back-end API.
+
+Serves the same routes as app.py with Quart, so long LLM, ASR and browser
+calls no longer pin a worker thread each. LLM graphs run through their async
+entry points; blocking work (FunASR, pandoc, page fetches) is offloaded to
+bounded executors.
+
+Run with:
+    hypercorn asgi_app:app --bind 0.0.0.0:5000
+"""
+import asyncio
+import contextvars
+import functools
+import io
+import os
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from urllib.parse import urlparse
+from quart import Quart, Response, g, jsonify, request, send_file
+from quart_cors import cors
+from werkzeug.utils import secure_filename
+from agent.rag.tools import FILTERABLE_KEYS
+from agent.rag.rag import aget_rag_answer
+from agent.writter.report_masitro.masitro import aget_report_masitro, astream_report_masitro
+from utilities import extract_text_from_url, allowed_file, sse_event
+from docx_converter import DOCX_MIMETYPE
+from audio.upload import UploadError
+from tracing import traced, metrics_payload
+from services import UPLOAD_FOLDER, ALLOWED_ORIGINS, PUBLIC_ENDPOINTS, asr_service, tts_service, upload_manager, users, docx_converter, index_transcription, index_migrator, issue_token, require_admin, store_for_user, user_for_request
+
+# Executors for blocking work
+cpu_executor = ThreadPoolExecutor(max_workers=os.cpu_count() or 4,
+                                  thread_name_prefix="cpu")
+# The shared Chrome driver is not thread-safe, so page fetches are serialized
+browser_executor = ThreadPoolExecutor(max_workers=1,
+                                      thread_name_prefix="browser")
+
+# Quart app configuration
+app = Quart(__name__)
+app = cors(app,
+           allow_origin=ALLOWED_ORIGINS,
+           allow_methods=["GET", "POST", "PUT", "OPTIONS"],
+           allow_headers=[
+               "Content-Type", "Authorization", "Upload-Offset",
+               "Upload-Checksum"
+           ])
+
+app.config['UPLOAD_FOLDER'] = UPLOAD_FOLDER
+
+
+def create_response(data=None, error=None, status_code=200):
+    """Helper function to create consistent API responses"""
+    if error:
+        return jsonify({'error': str(error)}), status_code
+    return jsonify(data), status_code
+
+
+async def run_blocking(executor, func, *args):
+    """Run a blocking callable on the given executor without blocking the event loop."""
+    loop = asyncio.get_running_loop()
+    # Carry the current context over so tracing spans keep their parent
+    context = contextvars.copy_context()
+    return await loop.run_in_executor(
+        executor, functools.partial(context.run, func, *args))
+
+
+async def transcribe_and_index(final_filename,
+                               speaker=None,
+                               language=None,
+                               result=None):
+    """Transcribe an uploaded audio file, unless `result` already holds its transcription, and add it to the vector store."""
+    if result is None:
+        filepath = os.path.join(app.config['UPLOAD_FOLDER'], final_filename)
+        result = await run_blocking(cpu_executor,
+                                    asr_service.transcribe_segments, filepath)
+
+    await run_blocking(cpu_executor, index_transcription, g.vectorstore,
+                       result, final_filename, speaker, language)
+
+    return create_response({
+        'message': 'File uploaded successfully',
+        'filename': final_filename,
+        'transcription': result['text'],
+        'segments': result['segments']
+    })
+
+
+@app.before_request
+async def resolve_vectorstore():
+    """Identify the caller and use their workspace's vector store for this request."""
+    if request.method == 'OPTIONS' or request.endpoint in PUBLIC_ENDPOINTS:
+        return None
+    try:
+        g.user = user_for_request(request.headers.get('Authorization'))
+    except PermissionError as e:
+        return create_response(error=str(e), status_code=401)
+    g.vectorstore = store_for_user(g.user)
+
+
+def upload_error_response(error):
+    """Response for a rejected upload request, including the offset to resume from."""
+    return jsonify({'error': str(error), **error.details}), error.status_code
+
+
+@app.route('/api/login', methods=['POST'])
+async def login():
+    """Handle user login requests."""
+    try:
+        data = await request.get_json()
+        email = data.get('email')
+        password = data.get('password')
+
+        if not email or not password:
+            return create_response(error='Missing email or password',
+                                   status_code=400)
+
+        user = users.get(email)
+        if user and user['password'] == password:
+            return create_response({
+                'email': email,
+                'role': user['role'],
+                'token': issue_token(email)
+            })
+
+        return create_response(error='Invalid credentials', status_code=401)
+    except Exception as e:
+        return create_response(error=str(e), status_code=500)
+
+
+@app.route('/api/health', methods=['GET'])
+async def health_check():
+    """Check if the service is running."""
+    return create_response({
+        'status': 'healthy',
+        'message': 'Service is running'
+    })
+
+
+@app.route('/metrics', methods=['GET'])
+async def metrics():
+    """Expose pipeline latency and token metrics for Prometheus."""
+    body, content_type = metrics_payload()
+    return Response(body, content_type=content_type)
+
+
+@app.route('/api/upload-audio', methods=['POST'])
+@traced("http", "/api/upload-audio")
+async def upload_audio():
+    """Handle audio file uploads and transcription."""
+    try:
+        files = await request.files
+        form = await request.form
+        if 'audio' not in files:
+            return create_response(error='No audio file', status_code=400)
+
+        audio_file = files['audio']
+        if audio_file.filename == '':
+            return create_response(error='No selected file', status_code=400)
+
+        if not allowed_file(audio_file.filename):
+            return create_response(error='Invalid file type', status_code=400)
+
+        filename = secure_filename(audio_file.filename)
+        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+        final_filename = f"{timestamp}_{filename}"
+        filepath = os.path.join(app.config['UPLOAD_FOLDER'], final_filename)
+
+        await audio_file.save(filepath)
+        return await transcribe_and_index(final_filename,
+                                          speaker=form.get('speaker'),
+                                          language=form.get('language'))
+    except Exception as e:
+        return create_response(error=str(e), status_code=500)
+
+
+@app.route('/api/upload-audio/sessions', methods=['POST'])
+async def create_upload_session():
+    """Start a resumable upload; the client then PUTs ranges at the returned offset."""
+    try:
+        data = await request.get_json()
+        filename = data.get('filename')
+        if not filename or not allowed_file(filename):
+            return create_response(error='Invalid file type', status_code=400)
+
+        status = upload_manager.create_session(filename, int(data.get('size', 0)),
+                                               data.get('sha256'),
+                                               owner=g.user)
+        return create_response(status, status_code=201)
+    except UploadError as e:
+        return upload_error_response(e)
+    except Exception as e:
+        return create_response(error=str(e), status_code=500)
+
+
+@app.route('/api/upload-audio/sessions/<session_id>', methods=['GET'])
+async def upload_session_status(session_id):
+    """Report the offset to resume from and any early transcription."""
+    try:
+        return create_response(upload_manager.status(session_id, g.user))
+    except UploadError as e:
+        return upload_error_response(e)
+
+
+@app.route('/api/upload-audio/sessions/<session_id>', methods=['PUT'])
+async def upload_session_range(session_id):
+    """Stream one byte range, starting at the Upload-Offset header, to disk."""
+    try:
+        offset = int(request.headers.get('Upload-Offset', -1))
+        writer = upload_manager.begin_range(
+            session_id, offset, request.headers.get('Upload-Checksum'),
+            owner=g.user)
+        with writer:
+            async for block in request.body:
+                writer.write(block)
+        return create_response(upload_manager.status(session_id, g.user))
+    except UploadError as e:
+        return upload_error_response(e)
+    except Exception as e:
+        return create_response(error=str(e), status_code=500)
+
+
+@app.route('/api/upload-audio/sessions/<session_id>/complete',
+           methods=['POST'])
+@traced("http", "/api/upload-audio/complete")
+async def complete_upload_session(session_id):
+    """Verify a finished upload, then transcribe and index it."""
+    try:
+        data = await request.get_json(silent=True) or {}
+        final_filename, result = await run_blocking(cpu_executor,
+                                                    upload_manager.complete,
+                                                    session_id, g.user)
+        return await transcribe_and_index(final_filename,
+                                          speaker=data.get('speaker'),
+                                          language=data.get('language'),
+                                          result=result)
+    except UploadError as e:
+        return upload_error_response(e)
+    except Exception as e:
+        return create_response(error=str(e), status_code=500)
+
+
+@app.route('/api/index/migrate', methods=['GET'])
+async def index_migration_status():
+    """Report progress of the current or last index migration (admins only)."""
+    try:
+        require_admin(request.headers.get('Authorization'))
+    except PermissionError as e:
+        return create_response(error=str(e), status_code=403)
+    return create_response(index_migrator.status())
+
+
+@app.route('/api/index/migrate', methods=['POST'])
+async def start_index_migration():
+    """Re-embed the vector store with the embedding model in config.yaml in the background (admins only)."""
+    try:
+        require_admin(request.headers.get('Authorization'))
+    except PermissionError as e:
+        return create_response(error=str(e), status_code=403)
+    try:
+        # The target model always comes from config.yaml: taking endpoints
+        # from the request would let callers send every chunk to any URL
+        status = index_migrator.start()
+        return create_response(status, status_code=202)
+    except RuntimeError as e:
+        return create_response(error=str(e), status_code=409)
+    except ValueError as e:
+        return create_response(error=str(e), status_code=400)
+
+
+@app.route('/api/search', methods=['POST'])
+@traced("http", "/api/search")
+async def search():
+    """Handle vector search requests."""
+    data = await request.get_json()
+    query = data.get('query')
+
+    if not query:
+        return jsonify({'error': 'Missing query'}), 400
+
+    try:
+        filters = data.get('filters') or {}
+        search_filter = g.vectorstore.build_filter(
+            **{
+                key: filters.get(key)
+                for key in FILTERABLE_KEYS + ('since', 'until')
+            })
+    except ValueError as e:
+        # A malformed since/until is the caller's mistake, not a server error
+        return jsonify({'error': str(e)}), 400
+
+    try:
+        docs, rag_answer = await asyncio.gather(
+            g.vectorstore.asearch(query, filter=search_filter),
+            aget_rag_answer(query, g.vectorstore, search_filter))
+        results = []
+        for i, doc in enumerate(docs):
+            results.append({
+                'id': i + 1,
+                'name': 'AI Response',
+                'content': doc.page_content,
+                'type': doc.metadata.get("source"),
+                'metadata': doc.metadata,
+                'status': 'completed',
+                'timestamp': 'just now',
+                'avatar': f'https://picsum.photos/seed/ai{i+1}/200'
+            })
+        return jsonify({'results': results, 'rag_answer': rag_answer})
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+@app.route('/api/parse-url', methods=['POST'])
+@traced("http", "/api/parse-url")
+async def parse_url():
+    """Handle URL parsing requests."""
+    data = await request.get_json()
+    url = data.get('url')
+    need_js = data.get('need_js', False)
+
+    if not url:
+        return jsonify({'error': 'Missing URL'}), 400
+
+    try:
+        # Validate URL
+        parsed_url = urlparse(url)
+        if not parsed_url.scheme or not parsed_url.netloc:
+            return jsonify({'error': 'Invalid URL format'}), 400
+
+        # Extract text content
+        executor = browser_executor if need_js else cpu_executor
+        content = await run_blocking(executor, extract_text_from_url, url,
+                                     need_js)
+
+        # Create document and add to vector store
+        doc = g.vectorstore.create_document(content,
+                                          "text",
+                                          origin=url,
+                                          language=data.get('language'))
+        await run_blocking(cpu_executor, g.vectorstore.create_index, [doc])
+
+        return jsonify({
+            'message': 'URL parsed successfully',
+            'content': content
+        })
+
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+@app.route('/api/generate', methods=['POST'])
+@traced("http", "/api/generate")
+async def generate():
+    """Generate markdown content based on title and configuration."""
+    data = await request.get_json()
+    title = data.get('title')
+    config = data.get('config')
+
+    if not title:
+        return jsonify({'error': 'Missing title'}), 400
+
+    try:
+        report = await aget_report_masitro(title, g.vectorstore, config)
+
+        return jsonify({
+            'content': report,
+            'message': 'Content generated successfully'
+        })
+
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+@app.route('/api/generate/stream', methods=['POST'])
+@traced("http", "/api/generate/stream")
+async def generate_stream():
+    """Stream the report as server-sent events, one per written section."""
+    data = await request.get_json()
+    title = data.get('title')
+    config = data.get('config')
+
+    if not title:
+        return jsonify({'error': 'Missing title'}), 400
+
+    events = astream_report_masitro(title, g.vectorstore, config)
+
+    async def event_stream():
+        async for event, payload in events:
+            yield sse_event(event, payload)
+
+    return Response(event_stream(),
+                    mimetype='text/event-stream',
+                    headers={
+                        'Cache-Control': 'no-cache',
+                        'X-Accel-Buffering': 'no'
+                    })
+
+
+@app.route('/api/convert-to-docx', methods=['POST'])
+@traced("http", "/api/convert-to-docx")
+async def convert_to_docx():
+    """Convert markdown to DOCX and return the file."""
+    try:
+        data = await request.get_json()
+        markdown_content = data.get('markdown')
+        title = data.get('title', 'document')
+
+        if not markdown_content:
+            return create_response(error='No content provided',
+                                   status_code=400)
+
+        # pandoc runs on the converter's worker pool; await without blocking
+        content = await asyncio.wrap_future(
+            docx_converter.submit(markdown_content))
+
+        return await send_file(io.BytesIO(content),
+                               as_attachment=True,
+                               download_name=f"{title}.docx",
+                               mimetype=DOCX_MIMETYPE)
+    except Exception as e:
+        return create_response(error=str(e), status_code=500)
+
+
+@app.route('/api/convert-to-podcast', methods=['POST'])
+async def convert_to_podcast():
+    """Convert text to speech and stream it back as MP3."""
+    try:
+        data = await request.get_json()
+        text = data.get('text')
+        title = data.get('title', 'podcast')
+        voice = data.get('voice')
+
+        if not text:
+            return create_response(error='No content provided',
+                                   status_code=400)
+
+        chunks = tts_service.stream(text, voice)
+
+        async def audio_stream():
+            # Pull each chunk on the executor so waiting on synthesis does
+            # not block the event loop
+            while True:
+                chunk = await run_blocking(cpu_executor, next, chunks, None)
+                if chunk is None:
+                    break
+                yield chunk
+
+        filename = secure_filename(title) or 'podcast'
+        return Response(
+            audio_stream(),
+            mimetype='audio/mpeg',
+            headers={'Content-Disposition': f'inline; filename="{filename}.mp3"'})
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+if __name__ == '__main__':
+    app.run(host='0.0.0.0', port=5000)
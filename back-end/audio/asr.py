@@ -1,7 +1,10 @@
 from funasr import AutoModel
 import os
 import yaml
+from typing import Any, Dict
 from funasr.utils.postprocess_utils import rich_transcription_postprocess
+from tracing import span
+from audio.preprocess import AudioPreprocessor
 
 
 class ASRService:
@@ -17,6 +20,11 @@ class ASRService:
         with open(config_path, 'r') as f:
             self.config = yaml.safe_load(f)
 
+        self.preprocessor = None
+        if self.config.get('preprocessing', {}).get('enabled'):
+            self.preprocessor = AudioPreprocessor(
+                self.config['preprocessing'])
+
         try:
             self.model = self._initialize_model()
         except Exception as e:
@@ -46,6 +54,28 @@ class ASRService:
         Returns:
             Transcribed text with rich formatting
 
+        Raises:
+            FileNotFoundError: If audio file doesn't exist
+            Exception: If ASR model is not initialized
+        """
+        return self.transcribe_segments(audio_file_path)['text']
+
+    def transcribe_segments(self,
+                            audio_file_path: str,
+                            cache: bool = True) -> Dict[str, Any]:
+        """
+        Transcribe audio file to text and speaker-labelled, timestamped segments.
+
+        Args:
+            audio_file_path: Path to the audio file to transcribe
+            cache: Keep the decoded audio in the preprocessing cache; pass
+                False for files that are transcribed only once
+
+        Returns:
+            dict with 'text' (the full transcription) and 'segments', a list of
+            {'start', 'end', 'speaker', 'text'} with times in seconds from the
+            start of the original file
+
         Raises:
             FileNotFoundError: If audio file doesn't exist
             Exception: If ASR model is not initialized
@@ -55,13 +85,39 @@ class ASRService:
         if self.model is None:
             raise Exception("ASR model not initialized")
 
-        result = self.model.generate(
-            input=audio_file_path,
-            cache={},
-            language=self.config['transcription']['language'],
-            use_itn=self.config['transcription']['use_itn'],
-            batch_size_s=self.config['transcription']['batch_size_s'],
-            merge_vad=True,
-            merge_length_s=self.config['transcription']['merge_length_s'],
-        )
-        return rich_transcription_postprocess(result[0]["text"])
+        audio_input = audio_file_path
+        offset = 0.0
+        generate_kwargs = {}
+        if self.preprocessor is not None:
+            # Decoded once and cached; the model gets a memory-mapped view
+            audio_input, offset = self.preprocessor.load_trimmed(
+                audio_file_path, cache)
+            if len(audio_input) == 0:
+                return {'text': "", 'segments': []}
+            generate_kwargs['fs'] = self.preprocessor.sample_rate
+
+        with span("asr", "generate", file=audio_file_path):
+            result = self.model.generate(
+                input=audio_input,
+                cache={},
+                language=self.config['transcription']['language'],
+                use_itn=self.config['transcription']['use_itn'],
+                batch_size_s=self.config['transcription']['batch_size_s'],
+                merge_vad=True,
+                merge_length_s=self.config['transcription']['merge_length_s'],
+                **generate_kwargs,
+            )
+        with span("asr", "postprocess"):
+            # sentence_info carries per-sentence timestamps (ms) and the
+            # cam++ speaker id
+            segments = [{
+                'start': round(offset + sentence['start'] / 1000, 3),
+                'end': round(offset + sentence['end'] / 1000, 3),
+                'speaker': f"speaker_{sentence.get('spk', 0)}",
+                'text': rich_transcription_postprocess(
+                    sentence.get('text') or sentence.get('sentence', '')),
+            } for sentence in result[0].get('sentence_info', [])]
+            return {
+                'text': rich_transcription_postprocess(result[0]["text"]),
+                'segments': segments
+            }
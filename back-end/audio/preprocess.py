@@ -0,0 +1,208 @@
+import hashlib
+import json
+import os
+import subprocess
+import tempfile
+import threading
+from collections import OrderedDict
+import numpy as np
+from tracing import span
+
+# Bytes hashed per read when fingerprinting an upload
+HASH_BLOCK_SIZE = 1024 * 1024
+# Fingerprints remembered per (path, size, mtime), so a file transcribed
+# again is not hashed again
+FINGERPRINT_MEMO_ENTRIES = 1024
+
+
+class AudioPreprocessor:
+    """
+    Decode-once audio cache feeding the ASR model.
+
+    Each distinct upload (by content hash) is decoded a single time by ffmpeg, streamed straight to disk as 16 kHz
+    mono float32 PCM, and its leading/trailing silence bounds are stored
+    beside it. Later calls memory-map the cached file and return a view of
+    the trimmed region, so workers get the samples without another decode
+    or copy. Once the cache exceeds `max_cache_bytes` the least recently
+    used recordings are deleted; views already handed out stay valid.
+    """
+
+    def __init__(self, config: dict) -> None:
+        """
+        Args:
+            config: The `preprocessing` section of asr_config.yaml
+        """
+        self.sample_rate = config['sample_rate']
+        self.cache_dir = config['cache_dir']
+        self.silence_threshold_db = config['silence_threshold_db']
+        self.frame_ms = config['frame_ms']
+        self.ffmpeg = config.get('ffmpeg', 'ffmpeg')
+        self.max_cache_bytes = config.get('max_cache_bytes')
+        self._evict_lock = threading.Lock()
+        self._fingerprints = OrderedDict()
+        self._fingerprints_lock = threading.Lock()
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    def fingerprint(self, audio_file_path: str) -> str:
+        """
+        Cache key of an upload: the SHA-256 of its whole content.
+
+        The cache is shared by every workspace, so the key must not let two
+        different recordings collide. The digest is remembered for the
+        file's path, size and mtime, so transcribing an unchanged file again
+        does not re-read it.
+        """
+        stat = os.stat(audio_file_path)
+        memo_key = (os.path.realpath(audio_file_path), stat.st_size,
+                    stat.st_mtime_ns)
+        with self._fingerprints_lock:
+            if memo_key in self._fingerprints:
+                self._fingerprints.move_to_end(memo_key)
+                return self._fingerprints[memo_key]
+        digest = hashlib.sha256()
+        with open(audio_file_path, 'rb') as f:
+            for block in iter(lambda: f.read(HASH_BLOCK_SIZE), b''):
+                digest.update(block)
+        with self._fingerprints_lock:
+            self._fingerprints[memo_key] = digest.hexdigest()
+            while len(self._fingerprints) > FINGERPRINT_MEMO_ENTRIES:
+                self._fingerprints.popitem(last=False)
+        return digest.hexdigest()
+
+    def _paths(self, key: str):
+        base = os.path.join(self.cache_dir, key)
+        return f"{base}.f32", f"{base}.json"
+
+    def _decode(self, audio_file_path: str, pcm_path: str) -> None:
+        """Decode to raw float32 mono PCM at the target rate, written atomically."""
+        # Not named *.f32 until complete, so eviction never sees it
+        fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix='.part')
+        os.close(fd)
+        try:
+            subprocess.run([
+                self.ffmpeg, '-nostdin', '-v', 'error', '-y', '-i',
+                audio_file_path, '-ac', '1', '-ar',
+                str(self.sample_rate), '-f', 'f32le', tmp_path
+            ],
+                           check=True)
+            os.replace(tmp_path, pcm_path)
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    def _evict(self, keep: str) -> None:
+        """Delete least recently used recordings until the cache fits `max_cache_bytes`."""
+        if self.max_cache_bytes is None:
+            return
+        with self._evict_lock:
+            entries = []
+            for name in os.listdir(self.cache_dir):
+                if not name.endswith('.f32') or name[:-4] == keep:
+                    continue
+                try:
+                    stat = os.stat(os.path.join(self.cache_dir, name))
+                except FileNotFoundError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, name[:-4]))
+            total = sum(size for _, size, _ in entries) + os.path.getsize(
+                self._paths(keep)[0])
+            for _, size, key in sorted(entries):
+                if total <= self.max_cache_bytes:
+                    break
+                for path in self._paths(key):
+                    try:
+                        os.remove(path)
+                    except FileNotFoundError:
+                        pass
+                total -= size
+
+    def _speech_bounds(self, samples: np.ndarray) -> tuple:
+        """Sample range between the first and last non-silent frames."""
+        frame = max(1, self.sample_rate * self.frame_ms // 1000)
+        threshold = 10**(self.silence_threshold_db / 20)
+        n_frames = len(samples) // frame
+
+        def loud(i):
+            block = samples[i * frame:(i + 1) * frame]
+            return np.sqrt(np.mean(np.square(block, dtype=np.float64))) > threshold
+
+        # Scan inwards from both ends, touching only the silent edges
+        start = next((i for i in range(n_frames) if loud(i)), None)
+        if start is None:
+            return 0, 0
+        end = next(i for i in range(n_frames - 1, start - 1, -1) if loud(i))
+        return start * frame, min(len(samples), (end + 1) * frame)
+
+    def load(self, audio_file_path: str) -> np.ndarray:
+        """
+        Return the trimmed 16 kHz mono samples of an audio file.
+
+        Returns:
+            np.ndarray: Read-only float32 view into the memory-mapped cache
+        """
+        return self.load_trimmed(audio_file_path)[0]
+
+    def load_trimmed(self, audio_file_path: str, cache: bool = True) -> tuple:
+        """
+        Like load, also returning where the trimmed audio starts.
+
+        Args:
+            audio_file_path: Path to the audio file
+            cache: False decodes to a temporary file that is deleted right
+                away, for audio that is transcribed once, such as the prefix
+                of an upload still in progress
+
+        Returns:
+            tuple: (samples view, start offset in seconds within the original audio)
+        """
+        if not cache:
+            return self._load_uncached(audio_file_path)
+        key = self.fingerprint(audio_file_path)
+        pcm_path, meta_path = self._paths(key)
+
+        if not os.path.exists(meta_path):
+            with span("asr", "decode", file=audio_file_path):
+                if not os.path.exists(pcm_path):
+                    self._decode(audio_file_path, pcm_path)
+                if os.path.getsize(pcm_path) == 0:
+                    start, end = 0, 0
+                else:
+                    samples = np.memmap(pcm_path, dtype=np.float32, mode='r')
+                    start, end = self._speech_bounds(samples)
+            with open(meta_path, 'w') as f:
+                json.dump(
+                    {
+                        'source': os.path.basename(audio_file_path),
+                        'sample_rate': self.sample_rate,
+                        'start': start,
+                        'end': end
+                    }, f)
+            self._evict(keep=key)
+        else:
+            # The PCM file's mtime records its last use for eviction
+            os.utime(pcm_path)
+
+        with open(meta_path, 'r') as f:
+            meta = json.load(f)
+        start_seconds = meta['start'] / meta['sample_rate']
+        if meta['end'] <= meta['start']:
+            return np.zeros(0, dtype=np.float32), start_seconds
+        samples = np.memmap(pcm_path, dtype=np.float32, mode='r')
+        return samples[meta['start']:meta['end']], start_seconds
+
+    def _load_uncached(self, audio_file_path: str) -> tuple:
+        # Named *.part, so eviction never sees it
+        fd, pcm_path = tempfile.mkstemp(dir=self.cache_dir, suffix='.part')
+        os.close(fd)
+        try:
+            with span("asr", "decode", file=audio_file_path):
+                self._decode(audio_file_path, pcm_path)
+            if os.path.getsize(pcm_path) == 0:
+                return np.zeros(0, dtype=np.float32), 0.0
+            # The mapping outlives the file, like views of evicted recordings
+            samples = np.memmap(pcm_path, dtype=np.float32, mode='r')
+        finally:
+            os.remove(pcm_path)
+        start, end = self._speech_bounds(samples)
+        return samples[start:end], start / self.sample_rate
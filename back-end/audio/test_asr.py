@@ -1,4 +1,7 @@
 import unittest
+from unittest.mock import Mock, patch
+import numpy as np
+import tempfile
 from asr import ASRService
 import os
 
@@ -44,5 +47,82 @@ class TestASRService(unittest.TestCase):
             ASRService("non_existent_config.yaml")
 
 
+class TestTranscribeSegments(unittest.TestCase):
+    """transcribe_segments with a stubbed model, no FunASR weights needed."""
+
+    def setUp(self):
+        self.tmp = tempfile.NamedTemporaryFile(suffix=".wav", delete=False)
+        self.tmp.close()
+        self.asr = ASRService.__new__(ASRService)
+        self.asr.config = {
+            'transcription': {
+                'language': 'auto',
+                'use_itn': True,
+                'batch_size_s': 60,
+                'merge_length_s': 15
+            }
+        }
+        self.asr.preprocessor = None
+        self.asr.model = Mock()
+        self.asr.model.generate.return_value = [{
+            'text': "hello world",
+            'sentence_info': [{
+                'start': 1000,
+                'end': 2500,
+                'spk': 1,
+                'text': "hello"
+            }, {
+                'start': 2500,
+                'end': 4000,
+                'sentence': "world"
+            }]
+        }]
+        self.patcher = patch('asr.rich_transcription_postprocess',
+                             side_effect=lambda text: text)
+        self.patcher.start()
+
+    def tearDown(self):
+        self.patcher.stop()
+        os.remove(self.tmp.name)
+
+    def test_segments_from_sentence_info(self):
+        """Sentences become segments with times in seconds and speaker labels."""
+        result = self.asr.transcribe_segments(self.tmp.name)
+        self.assertEqual(result['text'], "hello world")
+        self.assertEqual(result['segments'], [{
+            'start': 1.0,
+            'end': 2.5,
+            'speaker': 'speaker_1',
+            'text': 'hello'
+        }, {
+            'start': 2.5,
+            'end': 4.0,
+            'speaker': 'speaker_0',
+            'text': 'world'
+        }])
+        self.assertEqual(self.asr.model.generate.call_args.kwargs['input'],
+                         self.tmp.name)
+
+    def test_trimmed_offset_is_added(self):
+        """Times stay relative to the original file after silence trimming."""
+        self.asr.preprocessor = Mock(sample_rate=16000)
+        self.asr.preprocessor.load_trimmed.return_value = (np.zeros(16000),
+                                                           2.0)
+        result = self.asr.transcribe_segments(self.tmp.name)
+        self.assertEqual([(s['start'], s['end']) for s in result['segments']],
+                         [(3.0, 4.5), (4.5, 6.0)])
+        self.assertEqual(self.asr.model.generate.call_args.kwargs['fs'], 16000)
+
+    def test_silent_audio(self):
+        """Audio trimmed to nothing returns no segments without calling the model."""
+        self.asr.preprocessor = Mock(sample_rate=16000)
+        self.asr.preprocessor.load_trimmed.return_value = (np.zeros(0), 0.0)
+        self.assertEqual(self.asr.transcribe_segments(self.tmp.name), {
+            'text': "",
+            'segments': []
+        })
+        self.asr.model.generate.assert_not_called()
+
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,124 @@
+import os
+import shutil
+import tempfile
+import time
+import unittest
+import numpy as np
+from preprocess import AudioPreprocessor
+
+
+class TestAudioPreprocessor(unittest.TestCase):
+
+    def setUp(self):
+        """Set up test fixtures before each test method."""
+        self.cache_dir = tempfile.mkdtemp()
+        self.preprocessor = AudioPreprocessor({
+            'sample_rate': 16000,
+            'cache_dir': self.cache_dir,
+            'silence_threshold_db': -40,
+            'frame_ms': 20,
+        })
+        # 0.5 s silence, 1 s tone, 0.5 s silence
+        tone = 0.5 * np.sin(np.arange(16000) * 2 * np.pi * 440 / 16000)
+        silence = np.zeros(8000)
+        self.samples = np.concatenate([silence, tone,
+                                       silence]).astype(np.float32)
+
+    def tearDown(self):
+        """Clean up after each test method."""
+        shutil.rmtree(self.cache_dir)
+
+    def _cached_upload(self, samples, name='upload.wav'):
+        """Write an upload whose decoded PCM is already in the cache."""
+        upload = os.path.join(self.cache_dir, name)
+        with open(upload, 'wb') as f:
+            f.write(samples.tobytes())
+        key = self.preprocessor.fingerprint(upload)
+        samples.tofile(os.path.join(self.cache_dir, f"{key}.f32"))
+        return upload
+
+    def test_speech_bounds(self):
+        """Leading and trailing silence is trimmed to frame boundaries."""
+        start, end = self.preprocessor._speech_bounds(self.samples)
+        self.assertEqual(start, 8000)
+        self.assertEqual(end, 24000)
+
+    def test_speech_bounds_all_silence(self):
+        """Silent audio has an empty speech range."""
+        start, end = self.preprocessor._speech_bounds(np.zeros(16000))
+        self.assertEqual(start, end)
+
+    def test_load_returns_memory_mapped_view(self):
+        """Cached audio is returned as a trimmed view without re-decoding."""
+        upload = self._cached_upload(self.samples)
+
+        audio = self.preprocessor.load(upload)
+
+        self.assertEqual(audio.dtype, np.float32)
+        self.assertEqual(len(audio), 16000)
+        self.assertIsInstance(audio, np.memmap)
+        np.testing.assert_array_equal(audio, self.samples[8000:24000])
+
+    def test_uncached_load_leaves_no_files(self):
+        """Audio loaded with cache=False is trimmed but not kept in the cache."""
+        upload = os.path.join(self.cache_dir, 'prefix.wav')
+        open(upload, 'wb').close()
+        self.preprocessor._decode = lambda path, pcm_path: self.samples.tofile(
+            pcm_path)
+
+        audio, start = self.preprocessor.load_trimmed(upload, cache=False)
+
+        np.testing.assert_array_equal(audio, self.samples[8000:24000])
+        self.assertEqual(start, 0.5)
+        self.assertEqual(os.listdir(self.cache_dir), ['prefix.wav'])
+
+    def test_fingerprint_covers_whole_file(self):
+        """Recordings of the same length differing anywhere get different keys."""
+        data = bytearray(os.urandom(4 * 1024 * 1024))
+        first = os.path.join(self.cache_dir, 'first.wav')
+        second = os.path.join(self.cache_dir, 'second.wav')
+        with open(first, 'wb') as f:
+            f.write(data)
+        data[len(data) // 2 + 12345] ^= 0xff
+        with open(second, 'wb') as f:
+            f.write(data)
+        self.assertNotEqual(self.preprocessor.fingerprint(first),
+                            self.preprocessor.fingerprint(second))
+
+    def test_fingerprint_follows_file_changes(self):
+        """A remembered fingerprint is not reused once the file changes."""
+        path = os.path.join(self.cache_dir, 'upload.wav')
+        with open(path, 'wb') as f:
+            f.write(b'a' * 1000)
+        before = self.preprocessor.fingerprint(path)
+        self.assertEqual(self.preprocessor.fingerprint(path), before)
+        with open(path, 'wb') as f:
+            f.write(b'b' * 1000)
+        os.utime(path, ns=(0, 0))
+        self.assertNotEqual(self.preprocessor.fingerprint(path), before)
+
+    def test_least_recently_used_recordings_are_evicted(self):
+        """The cache stays under max_cache_bytes, dropping the oldest recording."""
+        self.preprocessor.max_cache_bytes = 2 * self.samples.nbytes
+        uploads, keys = [], []
+        for i, scale in enumerate((0.5, 0.6)):
+            uploads.append(
+                self._cached_upload(self.samples * scale, f"upload{i}.wav"))
+            keys.append(self.preprocessor.fingerprint(uploads[-1]))
+            self.preprocessor.load(uploads[-1])
+        # The first recording is older, but is used again afterwards
+        past = time.time() - 60
+        os.utime(self.preprocessor._paths(keys[0])[0], (past - 60, past - 60))
+        os.utime(self.preprocessor._paths(keys[1])[0], (past, past))
+        self.preprocessor.load(uploads[0])
+
+        uploads.append(self._cached_upload(self.samples * 0.7, "upload2.wav"))
+        keys.append(self.preprocessor.fingerprint(uploads[-1]))
+        self.preprocessor.load(uploads[-1])
+
+        cached = [os.path.exists(self.preprocessor._paths(k)[0]) for k in keys]
+        self.assertEqual(cached, [True, False, True])
+
+
+if __name__ == '__main__':
+    unittest.main()
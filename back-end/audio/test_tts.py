@@ -0,0 +1,95 @@
+import sys
+import unittest
+import wave
+from unittest.mock import Mock, patch
+import tts
+from tts import TTSService
+
+
+class TestTTSService(unittest.TestCase):
+
+    def setUp(self):
+        """Set up test fixtures before each test method."""
+        self.tts = TTSService()
+        self.max_chars = self.tts.config['synthesis']['max_chunk_chars']
+
+    def tearDown(self):
+        """Clean up after each test method."""
+        self.tts.executor.shutdown()
+        self.tts = None
+
+    def test_split_text_sentences(self):
+        """Short sentences are merged and every chunk respects the limit."""
+        text = "第一句话。第二句话！Third sentence. 第四句？"
+        chunks = self.tts.split_text(text)
+
+        self.assertGreater(len(chunks), 0)
+        for chunk in chunks:
+            self.assertLessEqual(len(chunk), self.max_chars)
+        self.assertEqual("".join(chunks).replace(" ", ""),
+                         text.replace(" ", ""))
+
+    def test_split_text_long_sentence(self):
+        """Sentences longer than the limit are hard-wrapped."""
+        text = "长" * (self.max_chars * 2 + 5) + "。"
+        chunks = self.tts.split_text(text)
+
+        self.assertEqual(len(chunks), 3)
+        self.assertEqual("".join(chunks), text)
+
+    def test_split_text_strips_markdown(self):
+        """Markdown markup is not read aloud."""
+        chunks = self.tts.split_text("## 标题\n**重点**内容。[链接](http://a.b)")
+
+        joined = "".join(chunks)
+        self.assertNotIn("#", joined)
+        self.assertNotIn("*", joined)
+        self.assertIn("链接", joined)
+        self.assertNotIn("http", joined)
+
+    def test_tts_initialization(self):
+        """Test TTS service initialization."""
+        with self.assertRaises(FileNotFoundError):
+            TTSService("non_existent_config.yaml")
+
+
+
+class TestSynthesizeChunk(unittest.TestCase):
+
+    def setUp(self):
+        """A fake engine that records the voice each chunk is spoken in."""
+        self.spoken_voices = []
+        properties = {'voice': 'default-voice'}
+        engine = Mock()
+        engine.setProperty.side_effect = properties.__setitem__
+
+        def save_to_file(text, path):
+            self.spoken_voices.append(properties['voice'])
+            with wave.open(path, 'wb') as wav:
+                wav.setnchannels(1)
+                wav.setsampwidth(2)
+                wav.setframerate(16000)
+                wav.writeframes(b'\0\0' * 160)
+
+        engine.save_to_file.side_effect = save_to_file
+        encoder = Mock()
+        encoder.encode.return_value = b'mp3'
+        encoder.flush.return_value = b''
+        lameenc = Mock()
+        lameenc.Encoder.return_value = encoder
+        for patcher in (patch.object(tts, '_engine', engine),
+                        patch.object(tts, '_default_voice', 'default-voice'),
+                        patch.dict(sys.modules, {'lameenc': lameenc})):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def test_voice_does_not_leak_into_later_requests(self):
+        """A request without a voice after one with a voice uses the default voice."""
+        tts._synthesize_chunk("first", "other-voice", 64, 2)
+        tts._synthesize_chunk("second", None, 64, 2)
+
+        self.assertEqual(self.spoken_voices, ['other-voice', 'default-voice'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,163 @@
+import hashlib
+import io
+import os
+import shutil
+import tempfile
+import unittest
+from upload import UploadManager, UploadError
+
+
+class TestUploadManager(unittest.TestCase):
+
+    def setUp(self):
+        """Set up test fixtures before each test method."""
+        self.folder = tempfile.mkdtemp()
+        self.data = os.urandom(300000)
+        self.manager = UploadManager(self.folder,
+                                     lambda path: {
+                                         'text': "preview",
+                                         'segments': []
+                                     },
+                                     early_transcription_bytes=100000)
+        self.session = self.manager.create_session(
+            "recording.wav", len(self.data),
+            hashlib.sha256(self.data).hexdigest())
+        self.session_id = self.session['session_id']
+
+    def tearDown(self):
+        """Clean up after each test method."""
+        self.manager.executor.shutdown()
+        shutil.rmtree(self.folder)
+
+    def test_resumable_upload(self):
+        """Ranges are appended at the server offset and the file is moved on completion."""
+        first = self.data[:150000]
+        status = self.manager.append(self.session_id, 0, io.BytesIO(first),
+                                     hashlib.sha256(first).hexdigest())
+        self.assertEqual(status['offset'], 150000)
+        self.assertFalse(status['complete'])
+
+        status = self.manager.append(self.session_id, 150000,
+                                     io.BytesIO(self.data[150000:]))
+        self.assertTrue(status['complete'])
+
+        final_filename, _ = self.manager.complete(self.session_id)
+        with open(os.path.join(self.folder, final_filename), 'rb') as f:
+            self.assertEqual(f.read(), self.data)
+
+    def test_offset_mismatch(self):
+        """Writes at the wrong offset are rejected with the current offset."""
+        with self.assertRaises(UploadError) as context:
+            self.manager.append(self.session_id, 10, io.BytesIO(b"abc"))
+        self.assertEqual(context.exception.status_code, 409)
+        self.assertEqual(context.exception.details['offset'], 0)
+
+    def test_chunk_checksum_mismatch(self):
+        """A range failing its checksum is discarded."""
+        with self.assertRaises(UploadError):
+            self.manager.append(self.session_id, 0,
+                                io.BytesIO(self.data[:1000]), "0" * 64)
+        self.assertEqual(self.manager.status(self.session_id)['offset'], 0)
+
+    def test_incomplete_upload(self):
+        """Completing before every byte has arrived is rejected."""
+        self.manager.append(self.session_id, 0, io.BytesIO(self.data[:10]))
+        with self.assertRaises(UploadError):
+            self.manager.complete(self.session_id)
+
+    def test_transcription_follows_upload(self):
+        """Passes run each time the received size doubles, and once the upload is complete."""
+        transcribed = []
+
+        def transcribe(path):
+            transcribed.append(os.path.getsize(path))
+            return {'text': f"{len(transcribed)} passes", 'segments': []}
+
+        self.manager.transcribe = transcribe
+        self.manager.early_transcription_bytes = 25000
+        for offset in range(0, 300000, 25000):
+            self.manager.append(self.session_id, offset,
+                                io.BytesIO(self.data[offset:offset + 25000]))
+            # Let the pass finish before the next range
+            self.manager._previews[self.session_id][1].result()
+
+        self.assertEqual(transcribed, [25000, 50000, 100000, 200000, 300000])
+        status = self.manager.status(self.session_id)
+        self.assertEqual(status['partial_transcription'], "5 passes")
+        self.assertEqual(status['transcribed_bytes'], 300000)
+
+    def test_complete_reuses_final_pass(self):
+        """Completing returns the final pass instead of transcribing again."""
+        transcribed = []
+
+        def transcribe(path):
+            transcribed.append(os.path.getsize(path))
+            return {'text': "whole file", 'segments': []}
+
+        self.manager.transcribe = transcribe
+        self.manager.append(self.session_id, 0, io.BytesIO(self.data))
+
+        _, transcription = self.manager.complete(self.session_id)
+
+        self.assertEqual(transcription['text'], "whole file")
+        self.assertEqual(transcribed, [300000])
+
+    def test_complete_without_final_pass(self):
+        """A failed final pass leaves the transcription to the caller."""
+
+        def transcribe(path):
+            raise RuntimeError("model unavailable")
+
+        self.manager.transcribe = transcribe
+        self.manager.append(self.session_id, 0, io.BytesIO(self.data))
+
+        final_filename, transcription = self.manager.complete(self.session_id)
+
+        self.assertIsNone(transcription)
+        self.assertTrue(
+            os.path.exists(os.path.join(self.folder, final_filename)))
+
+    def test_dropped_range_does_not_count_as_received(self):
+        """A range dropped after an error does not trigger a transcription."""
+        chunk = self.data[:150000]
+        with self.assertRaises(ConnectionError):
+            with self.manager.begin_range(
+                    self.session_id, 0,
+                    hashlib.sha256(chunk).hexdigest()) as writer:
+                writer.write(chunk)
+                raise ConnectionError("client went away")
+
+        self.manager.executor.submit(lambda: None).result()
+        status = self.manager.status(self.session_id)
+        self.assertEqual(status['offset'], 0)
+        self.assertIsNone(status['partial_transcription'])
+        self.assertNotIn(self.session_id, self.manager._previews)
+
+    def test_sessions_belong_to_their_owner(self):
+        """Other users cannot see, write to or complete a session."""
+        session_id = self.manager.create_session("recording.wav",
+                                                 len(self.data),
+                                                 owner="alice")['session_id']
+        for call in (lambda: self.manager.status(session_id, "bob"),
+                     lambda: self.manager.append(session_id, 0,
+                                                 io.BytesIO(self.data),
+                                                 owner="bob"),
+                     lambda: self.manager.complete(session_id, "bob")):
+            with self.assertRaises(UploadError) as context:
+                call()
+            self.assertEqual(context.exception.status_code, 404)
+
+        status = self.manager.append(session_id, 0, io.BytesIO(self.data),
+                                     owner="alice")
+        self.assertTrue(status['complete'])
+        self.manager.complete(session_id, "alice")
+
+    def test_unknown_session(self):
+        """Unknown session ids are reported as not found."""
+        with self.assertRaises(UploadError) as context:
+            self.manager.status("missing")
+        self.assertEqual(context.exception.status_code, 404)
+
+
+if __name__ == '__main__':
+    unittest.main()
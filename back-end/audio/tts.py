@@ -0,0 +1,164 @@
+import hashlib
+import os
+import re
+import tempfile
+import wave
+from concurrent.futures import ProcessPoolExecutor
+from typing import Iterator, List, Optional
+import yaml
+from tracing import span
+
+# Sentence boundaries for Chinese and English text
+SENTENCE_END = re.compile(r'(?<=[。！？!?；;])|(?<=\.)\s+|\n+')
+# Markdown markup that should not be read aloud
+MARKDOWN_MARKUP = re.compile(r'[#*`>|_~]+|\[([^\]]*)\]\([^)]*\)')
+
+# Per-process engine, created by _init_worker in each pool process
+_engine = None
+# Voice the engine was configured with, restored for requests without a voice
+_default_voice = None
+
+
+def _init_worker(engine_config: dict) -> None:
+    """Create the TTS engine owned by this worker process."""
+    global _engine, _default_voice
+    import pyttsx3
+    _engine = pyttsx3.init()
+    _engine.setProperty('rate', engine_config['rate'])
+    wanted = str(engine_config.get('voice') or '').lower()
+    for voice in _engine.getProperty('voices'):
+        labels = [voice.id, voice.name] + [
+            lang.decode() if isinstance(lang, bytes) else str(lang)
+            for lang in (voice.languages or [])
+        ]
+        if wanted and any(wanted in str(label).lower() for label in labels):
+            _engine.setProperty('voice', voice.id)
+            break
+    _default_voice = _engine.getProperty('voice')
+
+
+def _synthesize_chunk(text: str, voice: Optional[str], bit_rate: int,
+                      quality: int) -> bytes:
+    """Synthesize one chunk to MP3 bytes inside a worker process."""
+    import lameenc
+    # The engine outlives the request, so always set the voice: a voice
+    # left over from an earlier request would also end up in the cache
+    # under the configured voice's key
+    _engine.setProperty('voice', voice or _default_voice)
+    fd, wav_path = tempfile.mkstemp(suffix='.wav')
+    os.close(fd)
+    try:
+        _engine.save_to_file(text, wav_path)
+        _engine.runAndWait()
+        with wave.open(wav_path, 'rb') as wav:
+            encoder = lameenc.Encoder()
+            encoder.set_bit_rate(bit_rate)
+            encoder.set_in_sample_rate(wav.getframerate())
+            encoder.set_channels(wav.getnchannels())
+            encoder.set_quality(quality)
+            frames = wav.readframes(wav.getnframes())
+        return bytes(encoder.encode(frames) + encoder.flush())
+    finally:
+        os.remove(wav_path)
+
+
+class TTSService:
+    """Service for chunked, pipelined text-to-speech with a local engine."""
+
+    def __init__(self, config_name: str = "tts_config.yaml") -> None:
+        config_path = os.path.join(os.path.dirname(__file__), 'config',
+                                   config_name)
+        if not os.path.exists(config_path):
+            raise FileNotFoundError(
+                f"Configuration file not found: {config_path}")
+
+        with open(config_path, 'r') as f:
+            self.config = yaml.safe_load(f)
+
+        self.cache_dir = self.config['cache']['directory']
+        os.makedirs(self.cache_dir, exist_ok=True)
+        self.executor = ProcessPoolExecutor(
+            max_workers=self.config['synthesis']['workers'],
+            initializer=_init_worker,
+            initargs=(self.config['engine'], ))
+
+    def split_text(self, text: str) -> List[str]:
+        """
+        Split text into sentence-level chunks for synthesis.
+
+        Markdown markup is stripped, and consecutive sentences are merged up
+        to `max_chunk_chars` so very short sentences do not each cost a
+        synthesis call. Overlong sentences are hard-wrapped.
+        """
+        max_chars = self.config['synthesis']['max_chunk_chars']
+        text = MARKDOWN_MARKUP.sub(r'\1', text)
+        sentences = [s.strip() for s in SENTENCE_END.split(text) if s.strip()]
+
+        chunks = []
+        current = ''
+        for sentence in sentences:
+            while len(sentence) > max_chars:
+                if current:
+                    chunks.append(current)
+                    current = ''
+                chunks.append(sentence[:max_chars])
+                sentence = sentence[max_chars:]
+            if current and len(current) + len(sentence) + 1 > max_chars:
+                chunks.append(current)
+                current = ''
+            current = f"{current} {sentence}" if current else sentence
+        if current:
+            chunks.append(current)
+        return chunks
+
+    def _cache_path(self, text: str, voice: Optional[str]) -> str:
+        key = hashlib.sha256(
+            f"{voice or self.config['engine']['voice']}\0{text}".encode(
+                'utf-8')).hexdigest()
+        return os.path.join(self.cache_dir, f"{key}.mp3")
+
+    def stream(self, text: str, voice: Optional[str] = None) -> Iterator[bytes]:
+        """
+        Synthesize text and yield MP3 data chunk by chunk, in order.
+
+        All uncached chunks are submitted to the worker pool up front, so
+        later chunks are synthesized while earlier ones are being sent and
+        playback can start after the first sentence.
+
+        Args:
+            text: Text (or markdown report) to read
+            voice: Optional engine voice id overriding the configured voice
+
+        Yields:
+            bytes: MP3 frames for each chunk
+        """
+        encoding = self.config['encoding']
+        pending = []
+        for chunk in self.split_text(text):
+            cache_path = self._cache_path(chunk, voice)
+            if os.path.exists(cache_path):
+                pending.append((cache_path, None))
+            else:
+                pending.append((cache_path,
+                                self.executor.submit(_synthesize_chunk, chunk,
+                                                     voice,
+                                                     encoding['bit_rate'],
+                                                     encoding['quality'])))
+
+        for cache_path, future in pending:
+            if future is None:
+                with open(cache_path, 'rb') as f:
+                    yield f.read()
+                continue
+            with span("tts", "synthesize_chunk"):
+                audio = future.result()
+            # Write atomically so concurrent streams never read partial files
+            fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir)
+            with os.fdopen(fd, 'wb') as f:
+                f.write(audio)
+            os.replace(tmp_path, cache_path)
+            yield audio
+
+    def synthesize(self, text: str, voice: Optional[str] = None) -> bytes:
+        """Synthesize text to a single MP3 byte string."""
+        return b''.join(self.stream(text, voice))
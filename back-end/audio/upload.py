@@ -0,0 +1,322 @@
+import hashlib
+import json
+import os
+import threading
+import uuid
+from concurrent.futures import Future, ThreadPoolExecutor
+from datetime import datetime
+from typing import BinaryIO, Callable, Dict, Optional, Tuple
+from werkzeug.utils import secure_filename
+
+# Bytes read from the request stream per write
+STREAM_BLOCK_SIZE = 64 * 1024
+
+
+class UploadError(Exception):
+    """Raised when an upload request cannot be applied to its session."""
+
+    def __init__(self, message: str, status_code: int = 400, **details):
+        super().__init__(message)
+        self.status_code = status_code
+        self.details = details
+
+
+class UploadManager:
+    """
+    Resumable, chunked audio uploads streamed straight to disk.
+
+    A client creates a session, then PUTs byte ranges at the offset the
+    server reports. Each range is written to `<session>.part.<ext>` as it
+    arrives, so nothing is buffered in memory and a dropped connection only
+    loses the range in flight. The offset is the size of the part file, so
+    sessions survive server restarts. A session belongs to the user who
+    created it; every other caller is told it does not exist. Once `early_transcription_bytes` have
+    arrived the received audio is transcribed in the background, so the
+    partial transcription keeps up with the upload. Compressed formats
+    cannot be decoded from an arbitrary byte offset, so each pass
+    transcribes the whole received prefix; the next pass waits until the
+    received size has doubled, which keeps the total work linear in the
+    file size. At most one pass per session is queued or running, so the
+    workers take sessions in turn. When the last byte arrives a final pass
+    over the whole file starts right away, and `complete` returns its
+    result instead of transcribing the file again.
+    """
+
+    def __init__(self,
+                 upload_folder: str,
+                 transcribe: Callable[[str], dict],
+                 max_size: int = 2 * 1024**3,
+                 early_transcription_bytes: int = 4 * 1024**2,
+                 transcription_workers: int = 2) -> None:
+        """
+        Args:
+            upload_folder: Folder receiving completed uploads
+            transcribe: Callable transcribing an audio file path to a dict
+                with 'text' and 'segments'; it should not cache the decoded
+                audio, as each prefix is transcribed only once
+            max_size: Largest accepted upload in bytes
+            early_transcription_bytes: Received bytes that trigger the first
+                transcription pass
+            transcription_workers: Passes run at the same time
+        """
+        self.upload_folder = upload_folder
+        self.session_folder = os.path.join(upload_folder, 'sessions')
+        os.makedirs(self.session_folder, exist_ok=True)
+        self.transcribe = transcribe
+        self.max_size = max_size
+        self.early_transcription_bytes = early_transcription_bytes
+        self.executor = ThreadPoolExecutor(
+            max_workers=transcription_workers, thread_name_prefix="early-asr")
+        self._locks: Dict[str, threading.Lock] = {}
+        self._locks_guard = threading.Lock()
+        # Latest pass started per session, with the bytes it covers
+        self._previews: Dict[str, Tuple[int, Future]] = {}
+        # Latest finished pass per session: bytes covered and transcription
+        self._transcripts: Dict[str, Tuple[int, dict]] = {}
+
+    def _lock(self, session_id: str) -> threading.Lock:
+        with self._locks_guard:
+            return self._locks.setdefault(session_id, threading.Lock())
+
+    def _meta_path(self, session_id: str) -> str:
+        return os.path.join(self.session_folder, f"{session_id}.json")
+
+    def _part_path(self, meta: dict) -> str:
+        extension = meta['filename'].rsplit('.', 1)[-1]
+        return os.path.join(self.session_folder,
+                            f"{meta['session_id']}.part.{extension}")
+
+    def _load(self, session_id: str, owner: Optional[str]) -> dict:
+        # Session ids are generated hex strings; reject anything else
+        if not session_id.isalnum():
+            raise UploadError('Unknown upload session', status_code=404)
+        try:
+            with open(self._meta_path(session_id), 'r') as f:
+                meta = json.load(f)
+        except FileNotFoundError:
+            raise UploadError('Unknown upload session', status_code=404)
+        # Not 403, so session ids of other users cannot be probed
+        if meta.get('owner') != owner:
+            raise UploadError('Unknown upload session', status_code=404)
+        return meta
+
+    def create_session(self,
+                       filename: str,
+                       size: int,
+                       sha256: Optional[str] = None,
+                       owner: Optional[str] = None) -> dict:
+        """
+        Start an upload session.
+
+        Args:
+            filename: Original file name (an allowed audio extension)
+            size: Total size of the file in bytes
+            sha256: Optional hex digest of the whole file, verified on completion
+            owner: User the session belongs to; the other methods take the
+                same value and reject anyone else
+
+        Returns:
+            dict: Session status
+        """
+        if size <= 0 or size > self.max_size:
+            raise UploadError('Invalid upload size')
+        meta = {
+            'session_id': uuid.uuid4().hex,
+            'filename': secure_filename(filename),
+            'size': size,
+            'sha256': sha256.lower() if sha256 else None,
+            'owner': owner,
+        }
+        with open(self._meta_path(meta['session_id']), 'w') as f:
+            json.dump(meta, f)
+        open(self._part_path(meta), 'wb').close()
+        return self.status(meta['session_id'], owner)
+
+    def status(self, session_id: str, owner: Optional[str] = None) -> dict:
+        """Current offset and partial transcription of a session."""
+        meta = self._load(session_id, owner)
+        offset = os.path.getsize(self._part_path(meta))
+        transcribed, transcript = self._transcripts.get(session_id, (0, None))
+        return {
+            'session_id': session_id,
+            'filename': meta['filename'],
+            'size': meta['size'],
+            'offset': offset,
+            'complete': offset == meta['size'],
+            'partial_transcription': transcript and transcript['text'],
+            'transcribed_bytes': transcribed,
+        }
+
+    def begin_range(self,
+                    session_id: str,
+                    offset: int,
+                    chunk_sha256: Optional[str] = None,
+                    owner: Optional[str] = None) -> "RangeWriter":
+        """
+        Open a writer appending a byte range to a session file.
+
+        Args:
+            session_id: Upload session
+            offset: Offset the client is writing at; must equal the server offset
+            chunk_sha256: Optional hex digest of the range; on mismatch the
+                range is discarded
+            owner: Caller, who must have created the session
+
+        Returns:
+            RangeWriter: Context manager accepting the range's blocks
+        """
+        lock = self._lock(session_id)
+        # Never wait here: a blocked event loop would stall the other writer
+        if not lock.acquire(blocking=False):
+            raise UploadError('Upload in progress for this session',
+                              status_code=409)
+        try:
+            meta = self._load(session_id, owner)
+            current = os.path.getsize(self._part_path(meta))
+            if offset != current:
+                raise UploadError('Offset mismatch',
+                                  status_code=409,
+                                  offset=current)
+            return RangeWriter(self, meta, offset, lock, chunk_sha256)
+        except Exception:
+            lock.release()
+            raise
+
+    def append(self,
+               session_id: str,
+               offset: int,
+               stream: BinaryIO,
+               chunk_sha256: Optional[str] = None,
+               owner: Optional[str] = None) -> dict:
+        """Stream a byte range from a readable binary stream into a session."""
+        writer = self.begin_range(session_id, offset, chunk_sha256, owner)
+        with writer:
+            for block in iter(lambda: stream.read(STREAM_BLOCK_SIZE), b''):
+                writer.write(block)
+        return self.status(session_id, owner)
+
+    def _range_written(self, session_id: str, part_path: str, received: int,
+                       size: int) -> None:
+        """Start the next transcription pass once enough new audio has arrived."""
+        with self._locks_guard:
+            covered, pending = self._previews.get(session_id, (0, None))
+            # The final pass is queued even behind a running one
+            if received < size:
+                if pending is not None and not pending.done():
+                    return
+                if received < covered + max(covered,
+                                            self.early_transcription_bytes):
+                    return
+            elif covered == size:
+                return
+            future = self.executor.submit(self._transcribe_prefix, session_id,
+                                          part_path, received)
+            self._previews[session_id] = (received, future)
+
+    def _transcribe_prefix(self, session_id: str, part_path: str,
+                           received: int) -> dict:
+        result = self.transcribe(part_path)
+        with self._locks_guard:
+            # Ignore passes finishing after the session completed or after
+            # a later pass
+            latest, _ = self._transcripts.get(session_id, (0, None))
+            if session_id in self._previews and received > latest:
+                self._transcripts[session_id] = (received, result)
+        return result
+
+    def complete(self,
+                 session_id: str,
+                 owner: Optional[str] = None) -> Tuple[str, Optional[dict]]:
+        """
+        Verify a fully received upload and move it into the upload folder.
+
+        Returns:
+            tuple: (final file name inside the upload folder, transcription
+            of the whole file by the final pass, or None if there is none,
+            e.g. after a server restart, and the caller must transcribe it)
+        """
+        with self._lock(session_id):
+            meta = self._load(session_id, owner)
+            part_path = self._part_path(meta)
+            received = os.path.getsize(part_path)
+            if received != meta['size']:
+                raise UploadError('Upload incomplete',
+                                  status_code=409,
+                                  offset=received)
+
+            if meta['sha256']:
+                digest = hashlib.sha256()
+                with open(part_path, 'rb') as f:
+                    for block in iter(lambda: f.read(STREAM_BLOCK_SIZE), b''):
+                        digest.update(block)
+                if digest.hexdigest() != meta['sha256']:
+                    raise UploadError('File checksum mismatch')
+
+            transcription = None
+            with self._locks_guard:
+                covered, pending = self._previews.get(session_id, (0, None))
+            if pending is not None and covered == meta['size']:
+                # Wait while the part file is still in place
+                try:
+                    transcription = pending.result()
+                except Exception as e:
+                    print(f"---Early transcription failed: {e}---")
+
+            timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+            final_filename = f"{timestamp}_{meta['filename']}"
+            os.replace(part_path,
+                       os.path.join(self.upload_folder, final_filename))
+            os.remove(self._meta_path(session_id))
+        with self._locks_guard:
+            self._previews.pop(session_id, None)
+            self._transcripts.pop(session_id, None)
+            self._locks.pop(session_id, None)
+        return final_filename, transcription
+
+
+class RangeWriter:
+    """Appends one byte range to a session file; see UploadManager.begin_range."""
+
+    def __init__(self, manager: UploadManager, meta: dict, offset: int,
+                 lock: threading.Lock, chunk_sha256: Optional[str]) -> None:
+        self.manager = manager
+        self.meta = meta
+        self.offset = offset
+        self.lock = lock
+        self.chunk_sha256 = chunk_sha256.lower() if chunk_sha256 else None
+        self.part_path = manager._part_path(meta)
+        self.digest = hashlib.sha256()
+        self.file = open(self.part_path, 'ab')
+
+    def write(self, block: bytes) -> None:
+        if self.file.tell() + len(block) > self.meta['size']:
+            raise UploadError('Upload exceeds declared size',
+                              offset=self.file.tell())
+        self.digest.update(block)
+        self.file.write(block)
+
+    def __enter__(self) -> "RangeWriter":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> bool:
+        try:
+            if (exc_type is None and self.chunk_sha256
+                    and self.digest.hexdigest() != self.chunk_sha256):
+                self.file.truncate(self.offset)
+                raise UploadError('Chunk checksum mismatch',
+                                  offset=self.offset)
+            if exc_type is not None and self.chunk_sha256:
+                # A partial range cannot be verified, so drop it
+                self.file.truncate(self.offset)
+            # tell() still points past a truncated range in append mode
+            self.file.flush()
+            received = os.fstat(self.file.fileno()).st_size
+            self.file.close()
+            # Still holding the lock, so complete() sees the final pass
+            self.manager._range_written(self.meta['session_id'],
+                                        self.part_path, received,
+                                        self.meta['size'])
+        finally:
+            self.file.close()
+            self.lock.release()
+        return False
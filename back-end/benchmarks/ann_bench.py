@@ -0,0 +1,275 @@
+"""
+Compare vector search backends on a synthetic corpus.
+
+Builds the same clustered, normalized corpus (one million chunks by
+default) into Chroma and into FaissVectorStore with HNSW and IVF indexes,
+with float32, int8 or PQ vector storage, then, in a fresh process per
+backend, loads the persisted index and reports query latency (p50/p99),
+throughput, recall@k against exact search, index size and resident
+memory. Quantized backends are queried with and without full-precision
+re-scoring, to show its recall gain and latency cost. Vectors are
+generated directly, so no embedding server is involved.
+
+Example:
+    python benchmarks/ann_bench.py --n 1000000 --dim 256 --k 10 \\
+        --backends chroma hnsw hnsw-int8 ivf-pq --workdir /data/ann_bench
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import resource
+import shutil
+import time
+import numpy as np
+from common import percentile
+
+BLOCK_SIZE = 50000
+
+
+def rss_mb() -> float:
+    """Current resident set size, falling back to the peak where /proc is missing."""
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except FileNotFoundError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def corpus(args):
+    """Memory-mapped corpus, query and ground-truth arrays, generated once per workdir."""
+    os.makedirs(args.workdir, exist_ok=True)
+    vectors_path = os.path.join(args.workdir, f"corpus_{args.n}_{args.dim}.f32")
+    queries_path = os.path.join(args.workdir,
+                                f"queries_{args.n}_{args.dim}.npy")
+    truth_path = os.path.join(args.workdir,
+                              f"truth_{args.n}_{args.dim}_{args.k}.npy")
+    rng = np.random.default_rng(args.seed)
+    centers = rng.standard_normal((args.clusters, args.dim)).astype(np.float32)
+
+    if not os.path.exists(vectors_path):
+        vectors = np.memmap(vectors_path, dtype=np.float32, mode="w+",
+                            shape=(args.n, args.dim))
+        for start in range(0, args.n, BLOCK_SIZE):
+            size = min(BLOCK_SIZE, args.n - start)
+            block = centers[rng.integers(0, args.clusters, size)] + \
+                0.5 * rng.standard_normal((size, args.dim)).astype(np.float32)
+            vectors[start:start + size] = block / np.linalg.norm(
+                block, axis=1, keepdims=True)
+        vectors.flush()
+        for path in (queries_path, truth_path):
+            if os.path.exists(path):
+                os.remove(path)
+    vectors = np.memmap(vectors_path, dtype=np.float32, mode="r",
+                        shape=(args.n, args.dim))
+
+    if not os.path.exists(queries_path):
+        picks = rng.integers(0, args.n, args.queries)
+        queries = vectors[picks] + 0.1 * rng.standard_normal(
+            (args.queries, args.dim)).astype(np.float32)
+        np.save(queries_path,
+                queries / np.linalg.norm(queries, axis=1, keepdims=True))
+    queries = np.load(queries_path)
+
+    if not os.path.exists(truth_path):
+        # Exact top-k by inner product, streamed over the corpus
+        best_scores = np.full((len(queries), args.k), -np.inf, dtype=np.float32)
+        best_ids = np.zeros((len(queries), args.k), dtype=np.int64)
+        for start in range(0, args.n, BLOCK_SIZE):
+            scores = queries @ vectors[start:start + BLOCK_SIZE].T
+            ids = np.arange(start, start + scores.shape[1])
+            merged_scores = np.concatenate([best_scores, scores], axis=1)
+            merged_ids = np.concatenate(
+                [best_ids, np.broadcast_to(ids, scores.shape)], axis=1)
+            top = np.argsort(-merged_scores, axis=1)[:, :args.k]
+            best_scores = np.take_along_axis(merged_scores, top, axis=1)
+            best_ids = np.take_along_axis(merged_ids, top, axis=1)
+        np.save(truth_path, best_ids)
+    return vectors, queries, np.load(truth_path)
+
+
+# Backend name: (index structure, quantization)
+FAISS_BACKENDS = {
+    "hnsw": ("hnsw", "none"),
+    "hnsw-int8": ("hnsw", "int8"),
+    "hnsw-pq": ("hnsw", "pq"),
+    "ivf": ("ivf", "none"),
+    "ivf-int8": ("ivf", "int8"),
+    "ivf-pq": ("ivf", "pq"),
+}
+
+
+def faiss_settings(backend, args, rescore=0):
+    structure, quantization = FAISS_BACKENDS[backend]
+    if structure == "hnsw":
+        settings = {
+            "index_factory": f"HNSW{args.hnsw_m},Flat",
+            "search_params": {"efSearch": args.ef_search},
+        }
+    else:
+        settings = {
+            "index_factory": f"IVF{args.nlist},Flat",
+            "search_params": {"nprobe": args.nprobe},
+        }
+    return {
+        **settings,
+        "train_size": min(args.n, args.train_size),
+        "quantization": quantization,
+        "pq_m": args.pq_m,
+        "rescore": rescore,
+    }
+
+
+def build(backend, args, path):
+    vectors, _, _ = corpus(args)
+    start = time.perf_counter()
+    if backend == "chroma":
+        import chromadb
+        collection = chromadb.PersistentClient(path=path).get_or_create_collection(
+            "bench")
+        # Chroma caps the batch size of a single add
+        for block in range(0, args.n, 5000):
+            ids = [str(i) for i in range(block, min(block + 5000, args.n))]
+            collection.add(ids=ids,
+                           embeddings=vectors[block:block + 5000].tolist(),
+                           documents=[f"chunk {i}" for i in ids])
+    else:
+        from agent.rag.ann import FaissVectorStore
+        store = FaissVectorStore(path, None, **faiss_settings(backend, args))
+        for block in range(0, args.n, BLOCK_SIZE):
+            rows = vectors[block:block + BLOCK_SIZE]
+            store.add_embeddings(
+                [f"chunk {i}" for i in range(block, block + len(rows))],
+                rows,
+                persist=False)
+        store.save()
+    return time.perf_counter() - start
+
+
+def run_queries(name, search, queries, truth, k):
+    search(queries[0])  # warm up
+    latencies, hits = [], 0
+    start = time.perf_counter()
+    for q, expected in zip(queries, truth):
+        call_start = time.perf_counter()
+        found = search(q)
+        latencies.append(time.perf_counter() - call_start)
+        hits += len(set(found) & set(expected.tolist()))
+    elapsed = time.perf_counter() - start
+    return {
+        "backend": name,
+        "p50_ms": percentile(latencies, 50) * 1000,
+        "p99_ms": percentile(latencies, 99) * 1000,
+        "qps": len(queries) / elapsed,
+        "recall": hits / (len(queries) * k),
+    }
+
+
+def directory_mb(path):
+    return sum(
+        os.path.getsize(os.path.join(root, name))
+        for root, _, names in os.walk(path) for name in names) / 1024**2
+
+
+def query(backend, args, path, results):
+    _, queries, truth = corpus(args)
+    base_rss = rss_mb()
+    if backend == "chroma":
+        import chromadb
+        collection = chromadb.PersistentClient(path=path).get_collection("bench")
+
+        def search(q):
+            found = collection.query(query_embeddings=[q.tolist()],
+                                     n_results=args.k)
+            return [int(i) for i in found["ids"][0]]
+
+        runs = [run_queries(backend, search, queries, truth, args.k)]
+        index_mb = directory_mb(path)
+    else:
+        from agent.rag.ann import FaissVectorStore
+        store = FaissVectorStore(path, None,
+                                 **faiss_settings(backend, args, args.rescore))
+
+        def search(q):
+            found = store.similarity_search_by_vector_with_score(q, args.k)
+            return [int(doc.page_content.split()[1]) for doc, _ in found]
+
+        runs = []
+        if FAISS_BACKENDS[backend][1] != "none" and args.rescore:
+            runs.append(
+                run_queries(f"{backend}+rescore", search, queries, truth,
+                            args.k))
+        store.rescore = 0
+        runs.append(run_queries(backend, search, queries, truth, args.k))
+        index_mb = store.memory_stats()["index_bytes"] / 1024**2
+    for run in runs:
+        run["index_mb"] = index_mb
+        run["rss_mb"] = rss_mb() - base_rss
+    results.put(runs)
+
+
+def main(args):
+    corpus(args)
+    # Fresh processes, so memory use of one backend does not leak into another
+    context = multiprocessing.get_context("spawn")
+    results = []
+    for backend in args.backends:
+        path = os.path.join(args.workdir, f"index_{backend}")
+        if args.rebuild and os.path.exists(path):
+            shutil.rmtree(path)
+        build_seconds = None
+        if not os.path.exists(path):
+            with context.Pool(1) as pool:
+                build_seconds = pool.apply(build, (backend, args, path))
+        queue = context.Queue()
+        worker = context.Process(target=query, args=(backend, args, path, queue))
+        worker.start()
+        runs = queue.get()
+        worker.join()
+        for run in runs:
+            run["build_s"] = build_seconds
+        results.extend(runs)
+
+    print(f"{'backend':<18}{'build s':>9}{'p50 ms':>9}{'p99 ms':>9}"
+          f"{'qps':>9}{f'recall@{args.k}':>11}{'index MB':>10}{'RSS MB':>9}")
+    for r in results:
+        build_s = f"{r['build_s']:.1f}" if r["build_s"] is not None else "cached"
+        print(f"{r['backend']:<18}{build_s:>9}{r['p50_ms']:>9.2f}"
+              f"{r['p99_ms']:>9.2f}{r['qps']:>9.1f}{r['recall']:>11.3f}"
+              f"{r['index_mb']:>10.1f}{r['rss_mb']:>9.1f}")
+    print(f"full-precision vectors: {args.n * args.dim * 4 / 1024**2:.1f} MB "
+          f"(on disk, memory-mapped for re-scoring)")
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--n", type=int, default=1000000, help="Corpus size")
+    parser.add_argument("--dim", type=int, default=256)
+    parser.add_argument("--clusters", type=int, default=1000)
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--backends",
+                        nargs="+",
+                        default=["chroma", "hnsw", "hnsw-int8", "ivf-pq"],
+                        choices=["chroma", *FAISS_BACKENDS])
+    parser.add_argument("--hnsw-m", type=int, default=32)
+    parser.add_argument("--ef-search", type=int, default=64)
+    parser.add_argument("--nlist", type=int, default=4096)
+    parser.add_argument("--pq-m", type=int, default=32)
+    parser.add_argument("--nprobe", type=int, default=16)
+    parser.add_argument("--train-size", type=int, default=200000)
+    parser.add_argument("--rescore",
+                        type=int,
+                        default=4,
+                        help="Candidates per result re-scored at full precision")
+    parser.add_argument("--workdir", default="ann_bench", help="Corpus and index files")
+    parser.add_argument("--rebuild", action="store_true", help="Rebuild existing indexes")
+    parser.add_argument("--output", default=None, help="Write JSON results")
+    main(parser.parse_args())
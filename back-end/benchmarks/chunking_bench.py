@@ -0,0 +1,108 @@
+"""
+Compare chunking strategies on the fixture documents.
+
+For the previous fixed splitter (RecursiveCharacterTextSplitter, 1000
+characters with 200 overlap) and for the per-source profiles of
+agent/rag/chunking.py, reports the number of chunks, the tokens sent to
+the embedding model (and their ratio to the source tokens, i.e. the cost
+of overlap), retrieval hit rate for the `chunking_eval` questions in
+queries.json, and the tokens of context the top-k chunks would hand to
+the LLM.
+
+Chunks are embedded in-process with the stand-in server's hashed bigram
+vectors, so no server or vector database is needed.
+
+Example:
+    python benchmarks/chunking_bench.py --k 2
+"""
+import argparse
+import json
+from common import FIXTURES_DIR
+from mock_servers import hashed_embedding
+from langchain.text_splitter import RecursiveCharacterTextSplitter
+from agent.rag.chunking import ChunkingEngine, TokenCounter
+
+# Source type recorded for each fixture document when it is ingested
+DOCUMENT_SOURCES = {"meeting_transcript.txt": "audio"}
+
+
+def fixed_splitter(text, source):
+    splitter = RecursiveCharacterTextSplitter(chunk_size=1000,
+                                              chunk_overlap=200)
+    return splitter.split_text(text)
+
+
+def evaluate(name, split, documents, questions, count_tokens, k, dim):
+    chunks = []
+    for filename, text in documents.items():
+        chunks.extend(split(text, DOCUMENT_SOURCES.get(filename, "text")))
+    vectors = [hashed_embedding(chunk, dim) for chunk in chunks]
+
+    hits, context_tokens = 0, 0
+    for question in questions:
+        query = hashed_embedding(question["query"], dim)
+        scores = [sum(a * b for a, b in zip(query, v)) for v in vectors]
+        top = sorted(range(len(chunks)), key=lambda i: -scores[i])[:k]
+        hits += any(question["answer"] in chunks[i] for i in top)
+        context_tokens += sum(count_tokens(chunks[i]) for i in top)
+
+    source_tokens = sum(count_tokens(text) for text in documents.values())
+    embedded_tokens = sum(count_tokens(chunk) for chunk in chunks)
+    return {
+        "strategy": name,
+        "chunks": len(chunks),
+        "embedded_tokens": embedded_tokens,
+        "overhead": embedded_tokens / source_tokens,
+        "hit_rate": hits / len(questions),
+        "context_tokens": context_tokens / len(questions),
+    }
+
+
+def main(args):
+    fixtures = json.loads((FIXTURES_DIR / "queries.json").read_text("utf-8"))
+    # Repeat the short fixtures (blank-line separated) to get article-sized inputs
+    documents = {
+        path.name: "\n\n".join([path.read_text("utf-8")] * args.repeat)
+        for path in sorted((FIXTURES_DIR / "documents").glob("*.txt"))
+    }
+    engine = ChunkingEngine()
+    count_tokens = TokenCounter()
+
+    def profiled(text, source):
+        name = engine.source_profiles.get(source, engine.default_profile)
+        return engine.profiles[name].split_text(text)
+
+    strategies = [("fixed 1000/200 chars", fixed_splitter),
+                  ("per-source profiles", profiled)]
+    for name in engine.profiles:
+        strategies.append(
+            (f"profile: {name}",
+             lambda text, source, p=engine.profiles[name]: p.split_text(text)))
+
+    results = [
+        evaluate(name, split, documents, fixtures["chunking_eval"],
+                 count_tokens, args.k, args.embedding_dim)
+        for name, split in strategies
+    ]
+
+    print(f"{'strategy':<24}{'chunks':>8}{'emb tokens':>12}{'overhead':>10}"
+          f"{f'hit@{args.k}':>8}{'ctx tokens':>12}")
+    for r in results:
+        print(f"{r['strategy']:<24}{r['chunks']:>8}{r['embedded_tokens']:>12}"
+              f"{r['overhead']:>10.2f}{r['hit_rate']:>8.2f}"
+              f"{r['context_tokens']:>12.1f}")
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--k", type=int, default=2, help="Chunks retrieved")
+    parser.add_argument("--repeat",
+                        type=int,
+                        default=1,
+                        help="Times each fixture document is repeated")
+    parser.add_argument("--embedding-dim", type=int, default=256)
+    parser.add_argument("--output", default=None, help="Write JSON results")
+    main(parser.parse_args())
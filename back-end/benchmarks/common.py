@@ -0,0 +1,129 @@
+"""
+Shared helpers for the offline benchmarks.
+
+The back-end modules read their model endpoints when first imported, so
+`offline_environment` must be entered before importing anything from
+`agent`.
+"""
+import contextlib
+import io
+import os
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+from mock_servers import MockOpenAIServer
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+FIXTURES_DIR = Path(__file__).resolve().parent / "fixtures"
+
+if str(BACKEND_DIR) not in sys.path:
+    sys.path.insert(0, str(BACKEND_DIR))
+
+
+def add_server_arguments(parser):
+    """Command line options controlling the stand-in servers."""
+    parser.add_argument("--latency-ms",
+                        type=float,
+                        default=20.0,
+                        help="Fixed latency per chat completion")
+    parser.add_argument("--per-token-ms",
+                        type=float,
+                        default=0.5,
+                        help="Extra latency per generated token")
+    parser.add_argument("--embedding-latency-ms",
+                        type=float,
+                        default=5.0,
+                        help="Fixed latency per embeddings call")
+    parser.add_argument("--llm-cache",
+                        action="store_true",
+                        help="Enable the LLM response cache (a fresh one per run)")
+    parser.add_argument("--verbose",
+                        action="store_true",
+                        help="Keep the pipelines' progress prints")
+
+
+@contextlib.contextmanager
+def offline_environment(args, record_requests=False):
+    """Start the stand-in servers and point the model clients at them."""
+    server = MockOpenAIServer(latency_ms=args.latency_ms,
+                              per_token_ms=args.per_token_ms,
+                              embedding_latency_ms=args.embedding_latency_ms,
+                              record_requests=record_requests)
+    with server:
+        previous = {
+            name: os.environ.get(name)
+            for name in ("MODALX_LLM_API_BASE", "MODALX_EMBEDDINGS_BASE_URL",
+                         "MODALX_EMBEDDINGS_CHECK_CTX_LENGTH",
+                         "MODALX_LLM_CACHE", "MODALX_LLM_CACHE_PATH",
+                         "MODALX_REPORT_CACHE")
+        }
+        cache_dir = tempfile.mkdtemp(prefix="llm_cache_")
+        os.environ["MODALX_LLM_API_BASE"] = f"{server.base_url}/v1"
+        os.environ["MODALX_EMBEDDINGS_BASE_URL"] = f"{server.base_url}/v1"
+        # Send raw text so no tokenizer download is needed
+        os.environ["MODALX_EMBEDDINGS_CHECK_CTX_LENGTH"] = "false"
+        # Cached responses would hide the stand-in latency, so the LLM cache
+        # is off unless asked for, and never shares entries with a real one;
+        # reports are always regenerated
+        os.environ["MODALX_LLM_CACHE"] = "true" if args.llm_cache else "false"
+        os.environ["MODALX_LLM_CACHE_PATH"] = os.path.join(
+            cache_dir, "llm_responses.sqlite3")
+        os.environ["MODALX_REPORT_CACHE"] = "false"
+        try:
+            yield server
+        finally:
+            for name, value in previous.items():
+                if value is None:
+                    os.environ.pop(name, None)
+                else:
+                    os.environ[name] = value
+            shutil.rmtree(cache_dir, ignore_errors=True)
+
+
+def percentile(values, pct):
+    """Nearest-rank percentile of a list of floats."""
+    if not values:
+        return float('nan')
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1,
+                       int(round(pct / 100 * len(ordered))) - 1))
+    return ordered[index]
+
+
+def summarize(name, latencies, elapsed):
+    """Throughput and latency percentiles for one benchmark."""
+    return {
+        "name": name,
+        "calls": len(latencies),
+        "throughput_ops": len(latencies) / elapsed if elapsed else float('nan'),
+        "p50_ms": percentile(latencies, 50) * 1000,
+        "p99_ms": percentile(latencies, 99) * 1000,
+        "mean_ms": statistics.fmean(latencies) * 1000 if latencies else float('nan'),
+    }
+
+
+def measure(name, func, inputs, iterations=1, verbose=False):
+    """Call `func(item)` for every input, `iterations` times, and summarize."""
+    latencies = []
+    quiet = contextlib.nullcontext() if verbose else contextlib.redirect_stdout(
+        io.StringIO())
+    with quiet:
+        start = time.perf_counter()
+        for _ in range(iterations):
+            for item in inputs:
+                call_start = time.perf_counter()
+                func(item)
+                latencies.append(time.perf_counter() - call_start)
+        elapsed = time.perf_counter() - start
+    return summarize(name, latencies, elapsed)
+
+
+def print_results(results):
+    print(f"{'benchmark':<28}{'calls':>7}{'ops/s':>10}{'p50 ms':>11}"
+          f"{'p99 ms':>11}{'mean ms':>11}")
+    for r in results:
+        print(f"{r['name']:<28}{r['calls']:>7}{r['throughput_ops']:>10.2f}"
+              f"{r['p50_ms']:>11.1f}{r['p99_ms']:>11.1f}{r['mean_ms']:>11.1f}")
@@ -0,0 +1,118 @@
+"""
+Compare structured-output and single-token yes/no graders.
+
+Builds the retrieval, hallucination and answer graders twice: with
+function-calling structured output, and in fast mode (one token restricted
+to yes/no, parsed directly, see agent/rag/chains.py). Both run over the same
+cases built from the fixtures. Reported per grader: p50/p99 latency of each
+mode, how often the two agree, and how often fast mode fell back to
+structured output.
+
+By default the graders talk to the stand-in server, where every grade is
+"yes", so agreement is trivially 100%. Pass --live to grade against the
+endpoint in agent/rag/config.yaml (or MODALX_LLM_API_BASE) instead.
+
+Example:
+    python benchmarks/grader_bench.py --cases 30 --per-token-ms 20
+"""
+import argparse
+import contextlib
+import json
+import os
+import time
+from common import (FIXTURES_DIR, add_server_arguments, offline_environment,
+                    percentile)
+
+
+def grading_cases(limit):
+    """(retrieval, hallucination, answer) grader inputs from the fixtures."""
+    fixtures = json.loads((FIXTURES_DIR / "queries.json").read_text("utf-8"))
+    paragraphs = [
+        paragraph.strip()
+        for path in sorted((FIXTURES_DIR / "documents").glob("*.txt"))
+        for paragraph in path.read_text("utf-8").split("\n\n")
+        if paragraph.strip()
+    ]
+    retrieval, hallucination, answer = [], [], []
+    for i in range(limit):
+        question = fixtures["queries"][i % len(fixtures["queries"])]
+        document = paragraphs[i % len(paragraphs)]
+        generation = paragraphs[(i * 7 + 1) % len(paragraphs)]
+        retrieval.append({"question": question, "document": document})
+        hallucination.append({"documents": document, "generation": generation})
+        answer.append({"question": question, "generation": generation})
+    return {
+        "retrieval": retrieval,
+        "hallucination": hallucination,
+        "answer": answer
+    }
+
+
+def run(grader, cases):
+    scores, latencies = [], []
+    for inputs in cases:
+        start = time.perf_counter()
+        scores.append(grader.invoke(inputs).binary_score)
+        latencies.append(time.perf_counter() - start)
+    return scores, latencies
+
+
+def main(args):
+    if args.live:
+        # Cached grades would hide the latency being measured
+        os.environ["MODALX_LLM_CACHE"] = "false"
+    environment = (contextlib.nullcontext() if args.live else
+                   offline_environment(args, record_requests=True))
+    with environment as server:
+        # Imported here so the model clients pick up the stand-in endpoints
+        from agent.rag.chains import (build_answer_grader_chain,
+                                      build_hallucination_grader_chain,
+                                      build_retrieval_grader_chain)
+        builders = {
+            "retrieval": build_retrieval_grader_chain,
+            "hallucination": build_hallucination_grader_chain,
+            "answer": build_answer_grader_chain,
+        }
+        results = []
+        for name, cases in grading_cases(args.cases).items():
+            structured_scores, structured_latencies = run(
+                builders[name](fast=False), cases)
+            recorded = len(server.requests) if server else 0
+            fast_scores, fast_latencies = run(builders[name](fast=True), cases)
+            # Fallbacks are the fast-mode requests sent with a tool schema
+            fallbacks = sum(1 for request in server.requests[recorded:]
+                            if request.get("tools")) if server else None
+            results.append({
+                "grader": name,
+                "cases": len(cases),
+                "structured_p50_ms": percentile(structured_latencies, 50) * 1000,
+                "structured_p99_ms": percentile(structured_latencies, 99) * 1000,
+                "fast_p50_ms": percentile(fast_latencies, 50) * 1000,
+                "fast_p99_ms": percentile(fast_latencies, 99) * 1000,
+                "agreement": sum(a == b for a, b in zip(
+                    structured_scores, fast_scores)) / len(cases),
+                "fallbacks": fallbacks,
+            })
+
+    print(f"{'grader':<15}{'cases':>6}{'struct p50':>12}{'struct p99':>12}"
+          f"{'fast p50':>10}{'fast p99':>10}{'agree':>8}{'fallback':>10}")
+    for r in results:
+        fallbacks = "n/a" if r["fallbacks"] is None else r["fallbacks"]
+        print(f"{r['grader']:<15}{r['cases']:>6}"
+              f"{r['structured_p50_ms']:>12.1f}{r['structured_p99_ms']:>12.1f}"
+              f"{r['fast_p50_ms']:>10.1f}{r['fast_p99_ms']:>10.1f}"
+              f"{r['agreement']:>8.1%}{fallbacks:>10}")
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    add_server_arguments(parser)
+    parser.add_argument("--cases", type=int, default=20, help="Cases per grader")
+    parser.add_argument("--live",
+                        action="store_true",
+                        help="Grade against the configured LLM endpoint")
+    parser.add_argument("--output", default=None, help="Write JSON results")
+    main(parser.parse_args())
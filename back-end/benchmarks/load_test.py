@@ -0,0 +1,116 @@
+"""
+Concurrent load test for the back-end API.
+
+Fires a fixed number of requests at one or more servers with increasing
+concurrency and reports throughput, latency percentiles and errors for each,
+so the Flask dev server (app.py) and the ASGI server (asgi_app.py) can be
+compared on the same routes.
+
+Example:
+    python app.py &                                       # port 5000
+    hypercorn asgi_app:app --bind 127.0.0.1:5001 &
+    python benchmarks/load_test.py \\
+        --target flask=http://127.0.0.1:5000 \\
+        --target asgi=http://127.0.0.1:5001 \\
+        --path /api/search --body '{"query": "人工智能"}' \\
+        --concurrency 1 8 32 --requests 64
+"""
+import argparse
+import asyncio
+import json
+import statistics
+import time
+import httpx
+
+
+def percentile(values, pct):
+    """Nearest-rank percentile of a list of floats."""
+    if not values:
+        return float('nan')
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1,
+                       int(round(pct / 100 * len(ordered))) - 1))
+    return ordered[index]
+
+
+async def run_level(base_url, path, body, concurrency, total, timeout):
+    """Send `total` requests with at most `concurrency` in flight."""
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+    errors = 0
+    limits = httpx.Limits(max_connections=concurrency,
+                          max_keepalive_connections=concurrency)
+
+    async with httpx.AsyncClient(base_url=base_url,
+                                 timeout=timeout,
+                                 limits=limits) as client:
+
+        async def one():
+            nonlocal errors
+            async with semaphore:
+                start = time.perf_counter()
+                try:
+                    if body is None:
+                        response = await client.get(path)
+                    else:
+                        response = await client.post(path, json=body)
+                    if response.status_code >= 400:
+                        errors += 1
+                except httpx.HTTPError:
+                    errors += 1
+                latencies.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        await asyncio.gather(*[one() for _ in range(total)])
+        elapsed = time.perf_counter() - start
+
+    return {
+        "concurrency": concurrency,
+        "requests": total,
+        "errors": errors,
+        "throughput_rps": total / elapsed if elapsed else float('nan'),
+        "p50_ms": percentile(latencies, 50) * 1000,
+        "p99_ms": percentile(latencies, 99) * 1000,
+        "mean_ms": statistics.fmean(latencies) * 1000,
+    }
+
+
+async def main(args):
+    body = json.loads(args.body) if args.body else None
+    report = {}
+    for target in args.target:
+        name, _, base_url = target.partition("=")
+        report[name] = []
+        for concurrency in args.concurrency:
+            result = await run_level(base_url, args.path, body, concurrency,
+                                     args.requests, args.timeout)
+            report[name].append(result)
+            print(f"{name:>8} c={concurrency:<4} "
+                  f"rps={result['throughput_rps']:8.2f} "
+                  f"p50={result['p50_ms']:9.1f}ms "
+                  f"p99={result['p99_ms']:9.1f}ms "
+                  f"errors={result['errors']}")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--target",
+                        action="append",
+                        required=True,
+                        help="name=base_url, may be given several times")
+    parser.add_argument("--path", default="/api/health")
+    parser.add_argument("--body",
+                        default=None,
+                        help="JSON body; requests are POSTed when set")
+    parser.add_argument("--concurrency",
+                        type=int,
+                        nargs="+",
+                        default=[1, 8, 32, 64])
+    parser.add_argument("--requests", type=int, default=128)
+    parser.add_argument("--timeout", type=float, default=600.0)
+    parser.add_argument("--output", default=None, help="Write JSON results")
+    asyncio.run(main(parser.parse_args()))
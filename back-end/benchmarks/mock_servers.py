@@ -0,0 +1,260 @@
+"""
+Local stand-in for the vLLM and embedding servers.
+
+Implements the subset of the OpenAI-compatible API the pipelines use:
+
+- POST /v1/chat/completions: plain completions, and tool calls for
+  `with_structured_output`, with arguments filled in from the tool's JSON
+  schema. Honors `max_tokens` and vLLM's `guided_choice`.
+- POST /v1/embeddings: hashed character-bigram vectors, so similar texts get
+  similar vectors and retrieval results mean something.
+- GET /pages/<name>: serves HTML fixtures for the URL extraction benchmark.
+
+Outputs depend only on the request, so runs can be reproduced. Latency is
+configurable per request and per generated token. With `record_requests`,
+chat completion requests are kept in `requests` for later analysis.
+"""
+import hashlib
+import json
+import math
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+FIXTURES_DIR = Path(__file__).parent / "fixtures"
+
+# Sentence repeated to build plain completions of the requested length
+FILLER = "根据提供的资料，人工智能技术正在多个行业中快速落地。"
+
+
+def _digest(payload) -> str:
+    return hashlib.sha256(
+        json.dumps(payload, ensure_ascii=False,
+                   sort_keys=True).encode("utf-8")).hexdigest()
+
+
+def _count_tokens(text: str) -> int:
+    """Rough token estimate used for usage reporting and latency."""
+    return max(1, len(text) // 2)
+
+
+def hashed_embedding(text, dim: int):
+    """Deterministic unit vector from hashed character bigrams (or token id pairs)."""
+    vector = [0.0] * dim
+    items = list(text)
+    grams = [f"{a}{b}" for a, b in zip(items, items[1:])] or [str(items)]
+    for gram in grams:
+        h = int.from_bytes(
+            hashlib.blake2b(str(gram).encode("utf-8"), digest_size=8).digest(),
+            "little")
+        vector[h % dim] += 1.0 if (h >> 32) & 1 else -1.0
+    norm = math.sqrt(sum(v * v for v in vector)) or 1.0
+    return [v / norm for v in vector]
+
+
+def fill_schema(schema, defs, field="value", index=0, digest=""):
+    """Build a deterministic value that satisfies a JSON schema."""
+    if "$ref" in schema:
+        schema = defs[schema["$ref"].split("/")[-1]]
+    if "allOf" in schema:
+        schema = schema["allOf"][0]
+    if "anyOf" in schema:
+        schema = next(s for s in schema["anyOf"] if s.get("type") != "null")
+    kind = schema.get("type", "string")
+
+    if kind == "object":
+        return {
+            name: fill_schema(prop, defs, name, index, digest)
+            for name, prop in schema.get("properties", {}).items()
+        }
+    if kind == "array":
+        return [
+            fill_schema(schema.get("items", {}), defs, field, i, digest)
+            for i in range(MockOpenAIServer.array_items)
+        ]
+    if kind == "boolean":
+        # Alternate so reports get both research and synthesis sections
+        return index % 2 == 1
+    if kind in ("integer", "number"):
+        return index
+    if "'yes' or 'no'" in schema.get("description", ""):
+        return "yes"
+    return f"{field} {index} {digest[:6]}"
+
+
+class _Handler(BaseHTTPRequestHandler):
+    server_version = "MockOpenAI/1.0"
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send_json(self, payload, status=200):
+        body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if self.path.startswith("/pages/"):
+            page = FIXTURES_DIR / "pages" / Path(self.path).name
+            if page.exists():
+                body = page.read_bytes()
+                self.send_response(200)
+                self.send_header("Content-Type", "text/html; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+                return
+        self._send_json({"error": "not found"}, status=404)
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        request = json.loads(self.rfile.read(length) or b"{}")
+        if self.path.endswith("/chat/completions"):
+            self._send_json(self.server.owner.chat_completion(request))
+        elif self.path.endswith("/embeddings"):
+            self._send_json(self.server.owner.embeddings(request))
+        else:
+            self._send_json({"error": "not found"}, status=404)
+
+
+class MockOpenAIServer:
+    """OpenAI-compatible stand-in server running on a background thread."""
+
+    array_items = 3
+
+    def __init__(self,
+                 host: str = "127.0.0.1",
+                 port: int = 0,
+                 latency_ms: float = 0.0,
+                 per_token_ms: float = 0.0,
+                 embedding_latency_ms: float = 0.0,
+                 completion_tokens: int = 64,
+                 embedding_dim: int = 256,
+                 record_requests: bool = False):
+        """
+        Args:
+            host, port: Bind address; port 0 picks a free port
+            latency_ms: Fixed latency added to every chat completion
+            per_token_ms: Extra latency per generated token
+            embedding_latency_ms: Fixed latency added to every embeddings call
+            completion_tokens: Length of plain (non-tool) completions
+            embedding_dim: Dimension of returned embeddings
+            record_requests: Keep every chat completion request body, in
+                arrival order, in `requests`
+        """
+        self.latency_ms = latency_ms
+        self.per_token_ms = per_token_ms
+        self.embedding_latency_ms = embedding_latency_ms
+        self.completion_tokens = completion_tokens
+        self.embedding_dim = embedding_dim
+        self.record_requests = record_requests
+        self.requests = []
+        self._requests_lock = threading.Lock()
+        self.httpd = ThreadingHTTPServer((host, port), _Handler)
+        self.httpd.daemon_threads = True
+        self.httpd.owner = self
+        self._thread = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "MockOpenAIServer":
+        self._thread = threading.Thread(target=self.httpd.serve_forever,
+                                        daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def chat_completion(self, request):
+        if self.record_requests:
+            with self._requests_lock:
+                self.requests.append(request)
+        messages = request.get("messages", [])
+        digest = _digest(messages)
+        prompt_tokens = sum(
+            _count_tokens(str(m.get("content") or "")) for m in messages)
+        message = {"role": "assistant", "content": None}
+        finish_reason = "stop"
+
+        tools = request.get("tools") or []
+        if tools:
+            function = tools[0]["function"]
+            parameters = function.get("parameters", {})
+            arguments = fill_schema(parameters, parameters.get("$defs", {}),
+                                    digest=digest)
+            arguments = json.dumps(arguments, ensure_ascii=False)
+            message["tool_calls"] = [{
+                "id": f"call_{digest[:12]}",
+                "type": "function",
+                "function": {
+                    "name": function["name"],
+                    "arguments": arguments
+                }
+            }]
+            completion_tokens = _count_tokens(arguments)
+            finish_reason = "tool_calls"
+        elif request.get("guided_choice"):
+            message["content"] = request["guided_choice"][0]
+            completion_tokens = 1
+        else:
+            completion_tokens = min(self.completion_tokens,
+                                    request.get("max_tokens")
+                                    or self.completion_tokens)
+            repeats = completion_tokens * 2 // len(FILLER) + 1
+            message["content"] = (FILLER * repeats)[:completion_tokens * 2]
+
+        time.sleep(
+            (self.latency_ms + self.per_token_ms * completion_tokens) / 1000)
+        return {
+            "id": f"chatcmpl-{digest[:12]}",
+            "object": "chat.completion",
+            "created": 0,
+            "model": request.get("model"),
+            "choices": [{
+                "index": 0,
+                "message": message,
+                "finish_reason": finish_reason
+            }],
+            "usage": {
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": completion_tokens,
+                "total_tokens": prompt_tokens + completion_tokens
+            }
+        }
+
+    def embeddings(self, request):
+        inputs = request.get("input", [])
+        if isinstance(inputs, str) or (inputs
+                                       and isinstance(inputs[0], int)):
+            inputs = [inputs]
+        time.sleep(self.embedding_latency_ms / 1000)
+        return {
+            "object":
+            "list",
+            "model":
+            request.get("model"),
+            "data": [{
+                "object": "embedding",
+                "index": i,
+                "embedding": hashed_embedding(item, self.embedding_dim)
+            } for i, item in enumerate(inputs)],
+            "usage": {
+                "prompt_tokens": sum(len(item) for item in inputs),
+                "total_tokens": sum(len(item) for item in inputs)
+            }
+        }
@@ -0,0 +1,160 @@
+"""
+Measure how much of each chain's prompt vLLM's prefix cache could reuse.
+
+Runs get_rag_answer and get_report_masitro over the fixtures against the
+stand-in servers, recording every chat completion request. Each request is
+rendered the way a Qwen2.5 chat template lays it out (system message, then
+the tool schema, then the other messages) and tokenized approximately. The
+requests are then replayed, in arrival order, through a simulated automatic
+prefix cache: a request can reuse every leading full block of tokens that an
+earlier request already computed. The share of prompt tokens in such blocks
+is reported per chain. vLLM evicts blocks under memory pressure, so this is an
+upper bound on reuse.
+
+Example:
+    python benchmarks/prefix_cache_bench.py --block-tokens 16
+"""
+import argparse
+import json
+import re
+import tempfile
+from collections import defaultdict
+from common import (FIXTURES_DIR, add_server_arguments, measure,
+                    offline_environment)
+
+# CJK characters and punctuation one token each, Latin words in pieces of up
+# to four letters, numbers in up to three digits
+TOKEN_PATTERN = re.compile(r"[\u3000-\u303f\u4e00-\u9fff\uff00-\uffef]"
+                           r"|[A-Za-z]{1,4}|\d{1,3}|\s+|[^\sA-Za-z\d]")
+
+QWEN_DEFAULT_SYSTEM = ("You are Qwen, created by Alibaba Cloud. "
+                       "You are a helpful assistant.")
+
+
+def render(request):
+    """Prompt text of a chat completion request, laid out like a Qwen2.5 template."""
+    messages = list(request.get("messages", []))
+    tools = request.get("tools")
+    system = None
+    if messages and messages[0]["role"] == "system":
+        system = messages.pop(0)["content"]
+    elif tools:
+        system = QWEN_DEFAULT_SYSTEM
+    text = ""
+    if system is not None:
+        text += f"<|im_start|>system\n{system}"
+        if tools:
+            text += "\n\n# Tools\n\n<tools>\n" + "\n".join(
+                json.dumps(tool, ensure_ascii=False) for tool in tools)
+            text += "\n</tools>"
+        text += "<|im_end|>\n"
+    for message in messages:
+        content = message.get("content") or ""
+        text += f"<|im_start|>{message['role']}\n{content}<|im_end|>\n"
+    return text + "<|im_start|>assistant\n"
+
+
+def chain_prefixes():
+    """(chain name, static text its first message starts with) for each prompt."""
+    from agent.rag.chains import config as rag_config
+    from agent.writter.report_masitro import prompt
+    prefixes = [(name, template.split("{")[0])
+                for name, template in rag_config["prompts"].items()]
+    prefixes += [
+        ("report_planner_queries",
+         prompt.report_planner_query_writer_instructions),
+        ("report_planner", prompt.report_planner_instructions),
+        ("section_queries", prompt.query_writer_instructions),
+        ("section_writer", prompt.section_writer_instructions),
+        ("final_section_writer", prompt.final_section_writer_instructions),
+    ]
+    return prefixes
+
+
+def chain_of(request, prefixes):
+    messages = request.get("messages") or [{}]
+    content = messages[0].get("content") or ""
+    for name, prefix in prefixes:
+        if content.startswith(prefix.strip()):
+            return name
+    return "other"
+
+
+def simulate(requests, prefixes, block_tokens):
+    """Per-chain prompt and cacheable token counts under a shared prefix cache."""
+    cached_blocks = set()
+    totals = defaultdict(lambda: {"requests": 0, "tokens": 0, "cacheable": 0})
+    for request in requests:
+        tokens = TOKEN_PATTERN.findall(render(request))
+        block_hash, reusable = None, True
+        cacheable = 0
+        for start in range(0, len(tokens) - block_tokens + 1, block_tokens):
+            # A block's identity is its tokens and everything before them
+            block_hash = hash(
+                (block_hash, tuple(tokens[start:start + block_tokens])))
+            if reusable and block_hash in cached_blocks:
+                cacheable += block_tokens
+            else:
+                reusable = False
+                cached_blocks.add(block_hash)
+        chain = totals[chain_of(request, prefixes)]
+        chain["requests"] += 1
+        chain["tokens"] += len(tokens)
+        chain["cacheable"] += cacheable
+    return totals
+
+
+def main(args):
+    fixtures = json.loads((FIXTURES_DIR / "queries.json").read_text("utf-8"))
+    documents = [
+        path.read_text("utf-8")
+        for path in sorted((FIXTURES_DIR / "documents").glob("*.txt"))
+    ]
+
+    with offline_environment(args, record_requests=True) as server, \
+            tempfile.TemporaryDirectory() as chroma_dir:
+        # Imported here so the model clients pick up the stand-in endpoints
+        from agent.rag.tools import VectorStore
+        from agent.rag.rag import get_rag_answer
+        from agent.writter.report_masitro.masitro import get_report_masitro
+
+        vectorstore = VectorStore(path=chroma_dir)
+        vectorstore.create_index(
+            [vectorstore.create_document(text, "text") for text in documents])
+        measure("get_rag_answer",
+                lambda query: get_rag_answer(query, vectorstore),
+                fixtures["queries"], args.iterations, args.verbose)
+        measure("get_report_masitro",
+                lambda topic: get_report_masitro(topic, vectorstore),
+                fixtures["report_topics"], args.iterations, args.verbose)
+        totals = simulate(server.requests, chain_prefixes(),
+                          args.block_tokens)
+
+    print(f"{'chain':<24}{'requests':>9}{'prompt tokens':>15}"
+          f"{'cacheable':>11}{'share':>8}")
+    overall = {"requests": 0, "tokens": 0, "cacheable": 0}
+    for name, chain in sorted(totals.items()):
+        print(f"{name:<24}{chain['requests']:>9}{chain['tokens']:>15}"
+              f"{chain['cacheable']:>11}"
+              f"{chain['cacheable'] / chain['tokens']:>8.1%}")
+        for key in overall:
+            overall[key] += chain[key]
+    if overall["tokens"]:
+        print(f"{'all':<24}{overall['requests']:>9}{overall['tokens']:>15}"
+              f"{overall['cacheable']:>11}"
+              f"{overall['cacheable'] / overall['tokens']:>8.1%}")
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(totals, f, indent=2)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    add_server_arguments(parser)
+    parser.add_argument("--block-tokens",
+                        type=int,
+                        default=16,
+                        help="vLLM KV cache block size")
+    parser.add_argument("--iterations", type=int, default=1)
+    parser.add_argument("--output", default=None, help="Write JSON results")
+    main(parser.parse_args())
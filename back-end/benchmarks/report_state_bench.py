@@ -0,0 +1,145 @@
+"""
+Measure the memory the report graph's state and Send payloads take.
+
+Simulates the fan-out of a report (20 sections by default: researched
+sections written in parallel, then final sections written from them) in
+two layouts:
+
+- previous: completed Section objects in state, the research context built
+  by `+=` with padded separator rules, and the whole context copied into
+  each final section's Send payload;
+- store: section IDs in state and payloads, contents in a SectionStore,
+  the context built once with a join.
+
+Reported for each: memory allocated while building the context and
+payloads (retained afterwards and peak, from tracemalloc), the size of the research context, and the pickled
+size of the Send payloads, which is what a LangGraph checkpointer would
+store for the final-section step. No LLM or vector store is involved.
+
+Example:
+    python benchmarks/report_state_bench.py --sections 20 --content-chars 8000
+"""
+import argparse
+import json
+import pickle
+import tracemalloc
+from common import FIXTURES_DIR
+from agent.writter.report_masitro.data_model import Section
+from agent.writter.report_masitro.section_store import SectionStore
+
+
+def legacy_format_sections(sections):
+    """format_sections as it was before the SectionStore"""
+    formatted_str = ""
+    for idx, section in enumerate(sections, 1):
+        formatted_str += f"""
+        {'='*60}
+        Section {idx}: {section.name}
+        {'='*60}
+        Description:
+        {section.description}
+        Requires Research:
+        {section.research}
+
+        Content:
+        {section.content if section.content else '[Not yet written]'}
+
+        """
+    return formatted_str
+
+
+def synthetic_plan(count, final_count, content_chars):
+    text = "\n\n".join(
+        path.read_text("utf-8")
+        for path in sorted((FIXTURES_DIR / "documents").glob("*.txt")))
+    plan, contents = [], []
+    for i in range(count):
+        plan.append(
+            Section(name=f"Section {i}",
+                    description=f"Overview of topic {i} of the report.",
+                    # Introduction first and the other final sections last
+                    research=not (i == 0 or i > count - final_count),
+                    content=""))
+        start = (i * 997) % len(text)
+        repeated = text * (content_chars // len(text) + 2)
+        contents.append(repeated[start:start + content_chars])
+    return plan, contents
+
+
+def previous_layout(plan, contents):
+    sections = [section.model_copy() for section in plan]
+    for section, content in zip(sections, contents):
+        if section.research:
+            section.content = content
+    completed = [s for s in sections if s.research]
+    context = legacy_format_sections(completed)
+    payloads = [{
+        "topic": "topic",
+        "section": s,
+        "report_sections_from_research": context
+    } for s in sections if not s.research]
+    return context, payloads
+
+
+def store_layout(plan, contents):
+    store = SectionStore()
+    research = [i for i, s in enumerate(plan) if s.research]
+    for i in research:
+        store.put(i, plan[i], contents[i])
+    context = store.context(research)
+    payloads = [{
+        "topic": "topic",
+        "section_id": i,
+        "section": s,
+        "research_sections": research
+    } for i, s in enumerate(plan) if not s.research]
+    return context, payloads
+
+
+def measure(layout, plan, contents):
+    tracemalloc.start()
+    context, payloads = layout(plan, contents)
+    retained, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {
+        "retained_kib": retained / 1024,
+        "peak_kib": peak / 1024,
+        "context_kib": len(context.encode("utf-8")) / 1024,
+        "payloads": len(payloads),
+        "pickled_payloads_kib": len(pickle.dumps(payloads)) / 1024,
+    }
+
+
+def main(args):
+    plan, contents = synthetic_plan(args.sections, args.final_sections,
+                                    args.content_chars)
+    results = {
+        name: measure(layout, plan, contents)
+        for name, layout in (("previous", previous_layout),
+                             ("store", store_layout))
+    }
+
+    print(f"{'layout':<10}{'retained KiB':>14}{'peak KiB':>10}"
+          f"{'context KiB':>13}{'payloads':>10}{'pickled KiB':>13}")
+    for name, r in results.items():
+        print(f"{name:<10}{r['retained_kib']:>14.1f}{r['peak_kib']:>10.1f}"
+              f"{r['context_kib']:>13.1f}"
+              f"{r['payloads']:>10}{r['pickled_payloads_kib']:>13.1f}")
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--sections", type=int, default=20)
+    parser.add_argument("--final-sections",
+                        type=int,
+                        default=4,
+                        help="Sections written from the researched ones")
+    parser.add_argument("--content-chars",
+                        type=int,
+                        default=6000,
+                        help="Length of each written section")
+    parser.add_argument("--output", default=None, help="Write JSON results")
+    main(parser.parse_args())
@@ -0,0 +1,85 @@
+"""
+Offline benchmark suite for the back-end pipelines.
+
+Runs get_rag_answer, get_report_masitro, VectorStore.create_index/search and
+extract_text_from_url over the fixtures in benchmarks/fixtures, against
+local stand-in LLM and embedding servers (see mock_servers.py). No GPU or
+external network is needed. Throughput and p50/p99 latency are reported for
+each stage.
+
+Example:
+    python benchmarks/run_benchmarks.py --latency-ms 50 --iterations 3 \\
+        --output bench.json
+"""
+import argparse
+import json
+import tempfile
+from common import (FIXTURES_DIR, add_server_arguments, measure,
+                    offline_environment, print_results)
+
+
+def main(args):
+    fixtures = json.loads((FIXTURES_DIR / "queries.json").read_text("utf-8"))
+    documents = {
+        path.name: path.read_text("utf-8")
+        for path in sorted((FIXTURES_DIR / "documents").glob("*.txt"))
+    }
+
+    with offline_environment(args) as server, tempfile.TemporaryDirectory(
+    ) as chroma_dir:
+        # Imported here so the model clients pick up the stand-in endpoints
+        from agent.rag.tools import VectorStore
+        from agent.rag.rag import get_rag_answer
+        from agent.writter.report_masitro.masitro import get_report_masitro
+        from utilities import extract_text_from_url
+
+        vectorstore = VectorStore(path=chroma_dir)
+        results = []
+
+        def index(name):
+            doc = vectorstore.create_document(documents[name],
+                                              "text",
+                                              origin=name)
+            vectorstore.create_index([doc])
+
+        # Index once before the query benchmarks so they have data to hit
+        results.append(
+            measure("VectorStore.create_index", index, list(documents),
+                    args.iterations, args.verbose))
+        results.append(
+            measure("VectorStore.search", vectorstore.search,
+                    fixtures["queries"], args.iterations, args.verbose))
+        results.append(
+            measure("extract_text_from_url",
+                    extract_text_from_url,
+                    [f"{server.base_url}/pages/{page}"
+                     for page in fixtures["pages"]],
+                    args.iterations, args.verbose))
+        results.append(
+            measure("get_rag_answer",
+                    lambda query: get_rag_answer(query, vectorstore),
+                    fixtures["queries"], args.iterations, args.verbose))
+        results.append(
+            measure("get_report_masitro",
+                    lambda topic: get_report_masitro(topic, vectorstore),
+                    fixtures["report_topics"], args.iterations, args.verbose))
+
+        if args.llm_cache:
+            from agent.clients import registry
+            stats = registry.llm_cache().stats()
+            print(f"LLM cache: {stats['hits']} hits, {stats['misses']} misses "
+                  f"(hit rate {stats['hit_rate']:.1%}), "
+                  f"{stats['entries']} entries")
+
+    print_results(results)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    add_server_arguments(parser)
+    parser.add_argument("--iterations", type=int, default=3)
+    parser.add_argument("--output", default=None, help="Write JSON results")
+    main(parser.parse_args())
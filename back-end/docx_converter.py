@@ -0,0 +1,98 @@
+import hashlib
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+import pypandoc
+from tracing import span
+from utilities import cleanup_temp_file
+
+DOCX_MIMETYPE = 'application/vnd.openxmlformats-officedocument.wordprocessingml.document'
+
+
+class DocxConverter:
+    """
+    Markdown to DOCX conversion service.
+
+    pandoc runs in a bounded worker pool and writes to a unique temp path
+    whose bytes are returned in memory, so concurrent conversions never share
+    a file. Output is cached by markdown content hash, and identical
+    conversions already in flight are shared rather than repeated.
+    """
+
+    def __init__(self,
+                 max_workers: int = 2,
+                 max_cache_entries: int = 64,
+                 temp_dir: str = 'temp') -> None:
+        """
+        Args:
+            max_workers: Maximum number of concurrent pandoc processes
+            max_cache_entries: Number of converted documents kept in memory
+            temp_dir: Directory for pandoc's intermediate output files
+        """
+        self.executor = ThreadPoolExecutor(max_workers=max_workers,
+                                           thread_name_prefix="pandoc")
+        self.max_cache_entries = max_cache_entries
+        self.temp_dir = temp_dir
+        os.makedirs(temp_dir, exist_ok=True)
+        self._cache = OrderedDict()
+        self._in_flight = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def content_key(markdown: str) -> str:
+        return hashlib.sha256(markdown.encode('utf-8')).hexdigest()
+
+    def _render(self, markdown: str) -> bytes:
+        """Run pandoc into a unique temp file and return its bytes."""
+        fd, path = tempfile.mkstemp(suffix='.docx', dir=self.temp_dir)
+        os.close(fd)
+        try:
+            with span("convert", "pandoc.docx", chars=len(markdown)):
+                pypandoc.convert_text(markdown,
+                                      'docx',
+                                      format='md',
+                                      outputfile=path)
+            with open(path, 'rb') as f:
+                return f.read()
+        finally:
+            cleanup_temp_file(path)
+
+    def _store(self, key: str, future: Future) -> None:
+        with self._lock:
+            self._in_flight.pop(key, None)
+            if future.exception() is None:
+                self._cache[key] = future.result()
+                while len(self._cache) > self.max_cache_entries:
+                    self._cache.popitem(last=False)
+
+    def submit(self, markdown: str) -> Future:
+        """
+        Schedule a conversion.
+
+        Returns:
+            Future: Resolves to the DOCX bytes; already resolved on a cache hit
+        """
+        key = self.content_key(markdown)
+        with self._lock:
+            if key in self._cache:
+                self._cache.move_to_end(key)
+                self.hits += 1
+                future = Future()
+                future.set_result(self._cache[key])
+                return future
+            if key in self._in_flight:
+                self.hits += 1
+                return self._in_flight[key]
+            self.misses += 1
+            future = self.executor.submit(self._render, markdown)
+            self._in_flight[key] = future
+        future.add_done_callback(lambda f: self._store(key, f))
+        return future
+
+    def convert(self, markdown: str, timeout: float = None) -> bytes:
+        """Convert markdown to DOCX bytes, waiting for the worker pool."""
+        return self.submit(markdown).result(timeout)
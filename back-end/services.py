@@ -0,0 +1,127 @@
+import functools
+import os
+import secrets
+from agent.rag.migration import IndexMigrator
+from agent.rag.tenancy import TenantRouter
+from agent.rag.tools import VectorStore
+from audio.asr import ASRService
+from audio.tts import TTSService
+from audio.upload import UploadManager
+from docx_converter import DocxConverter
+from utilities import initialize_chrome_driver
+
+# Constants shared by the Flask (app.py) and ASGI (asgi_app.py) servers
+UPLOAD_FOLDER = 'uploads/audio'
+ALLOWED_ORIGINS = ["http://localhost:3000", "http://45.252.106.202:3000"]
+# Workspace served by the shared `./chroma_db` store, which holds everything
+# indexed before per-workspace stores existed
+SHARED_WORKSPACE = 'shared'
+# Routes served without a login; every other route reads or writes a
+# workspace's documents and needs a token. The index migration routes check
+# for an admin themselves.
+PUBLIC_ENDPOINTS = {
+    'login', 'health_check', 'metrics', 'convert_to_docx',
+    'convert_to_podcast', 'index_migration_status', 'start_index_migration'
+}
+
+# Create upload directory
+os.makedirs(UPLOAD_FOLDER, exist_ok=True)
+os.makedirs('temp',
+            exist_ok=True)  # Create temp directory for file conversions
+
+# Initialize services
+vectorstore = VectorStore(path="./chroma_db")
+# Per-workspace stores; SHARED_WORKSPACE uses `vectorstore`
+tenant_router = TenantRouter("./chroma_db/tenants", vectorstore)
+index_migrator = IndexMigrator(vectorstore,
+                               tenant_stores=tenant_router.tenant_stores)
+asr_service = ASRService()
+tts_service = TTSService()
+# Upload previews transcribe each prefix once, so keep them out of the PCM cache
+upload_manager = UploadManager(
+    UPLOAD_FOLDER, functools.partial(asr_service.transcribe_segments,
+                                     cache=False))
+initialize_chrome_driver()  # Initialize Chrome driver at startup
+docx_converter = DocxConverter()
+
+# Mock database (TODO: replace with real database in production)
+users = {
+    "admin@example.com": {
+        "password": "admin123",
+        "role": "admin",
+        "workspace": SHARED_WORKSPACE
+    }
+}
+# Login tokens -> email (in memory, so a restart logs everyone out)
+sessions = {}
+
+
+def issue_token(email):
+    """Create a bearer token for a logged-in user."""
+    token = secrets.token_urlsafe(32)
+    sessions[token] = email
+    return token
+
+
+def user_for_request(authorization):
+    """
+    Email of the user a request's Authorization header was issued to.
+
+    Args:
+        authorization: "Bearer <token>" header value, or None
+
+    Raises:
+        PermissionError: If the header is missing or the token unknown
+    """
+    scheme, _, token = (authorization or '').partition(' ')
+    email = sessions.get(token) if scheme.lower() == 'bearer' else None
+    if email is None:
+        raise PermissionError('Invalid or expired token')
+    return email
+
+
+def require_admin(authorization):
+    """
+    Check that a request comes from a logged-in admin.
+
+    Raises:
+        PermissionError: If the caller is not logged in, or not an admin
+    """
+    email = user_for_request(authorization)
+    if users[email].get('role') != 'admin':
+        raise PermissionError('Admin login required')
+    return email
+
+
+def store_for_user(email):
+    """
+    Vector store of a user's workspace.
+
+    Users in SHARED_WORKSPACE get the shared store; every other workspace
+    (the user's email if none is set) gets its own sharded store.
+    """
+    workspace = users[email].get('workspace', email)
+    if workspace == SHARED_WORKSPACE:
+        return vectorstore
+    return tenant_router.store_for(workspace)
+
+
+def index_transcription(store,
+                        result,
+                        final_filename,
+                        speaker=None,
+                        language=None):
+    """Add a transcription to a vector store, one document per speaker span when segments exist."""
+    if result['segments']:
+        docs = store.create_segment_documents(result['segments'],
+                                              origin=final_filename,
+                                              speaker=speaker,
+                                              language=language)
+        store.create_index(docs, split=False)
+    else:
+        doc = store.create_document(result['text'],
+                                    "audio",
+                                    origin=final_filename,
+                                    speaker=speaker,
+                                    language=language)
+        store.create_index([doc])
@@ -0,0 +1,191 @@
+"""
+Structured tracing and latency metrics for the back-end pipelines.
+
+Every traced stage (graph node, LLM call, embedding call, Chroma query, ASR
+stage, URL fetch, HTTP route) becomes a span. Spans feed Prometheus metrics
+served at /metrics and, when MODALX_TRACE_LOG names a file, are appended to it
+as JSON lines with trace/parent ids so a request can be reconstructed.
+"""
+import contextvars
+import functools
+import inspect
+import json
+import os
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from langchain_core.callbacks import BaseCallbackHandler
+from prometheus_client import Counter, Histogram, generate_latest, CONTENT_TYPE_LATEST
+
+STAGE_LATENCY = Histogram(
+    "modalx_stage_latency_seconds",
+    "Latency of traced pipeline stages",
+    ["kind", "stage"],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60,
+             120, 300, 600))
+STAGE_ERRORS = Counter("modalx_stage_errors_total",
+                       "Traced pipeline stages that raised", ["kind", "stage"])
+LLM_TOKENS = Counter("modalx_llm_tokens_total",
+                     "LLM tokens by calling stage and direction",
+                     ["stage", "direction"])
+LLM_CACHE_LOOKUPS = Counter("modalx_llm_cache_lookups_total",
+                            "LLM response cache lookups by calling stage and result",
+                            ["stage", "result"])
+REPORT_RETRIEVAL_LOOKUPS = Counter(
+    "modalx_report_retrieval_lookups_total",
+    "Report retrieval queries answered by the report's retrieval pool (hit) "
+    "or the vector store (miss)", ["result"])
+
+# Optional JSON-lines trace log
+TRACE_LOG_PATH = os.environ.get("MODALX_TRACE_LOG")
+
+_current_span = contextvars.ContextVar("modalx_current_span", default=None)
+_log_lock = threading.Lock()
+
+
+class Span:
+    """A timed pipeline stage with attributes, linked to its parent span."""
+
+    def __init__(self, kind: str, name: str, parent: "Span" = None,
+                 **attributes):
+        self.kind = kind
+        self.name = name
+        self.trace_id = parent.trace_id if parent else uuid.uuid4().hex
+        self.span_id = uuid.uuid4().hex[:16]
+        self.parent_id = parent.span_id if parent else None
+        self.attributes = attributes
+        self.start = time.time()
+        self._start_counter = time.perf_counter()
+        self.duration = None
+        self.error = None
+
+    def set(self, **attributes):
+        """Attach attributes to the span."""
+        self.attributes.update(attributes)
+
+    def finish(self, error: BaseException = None):
+        """Record the span's latency and export it."""
+        self.duration = time.perf_counter() - self._start_counter
+        STAGE_LATENCY.labels(self.kind, self.name).observe(self.duration)
+        if error is not None:
+            self.error = repr(error)
+            STAGE_ERRORS.labels(self.kind, self.name).inc()
+        _export(self)
+
+
+def _export(s: Span):
+    if not TRACE_LOG_PATH:
+        return
+    record = {
+        "trace_id": s.trace_id,
+        "span_id": s.span_id,
+        "parent_id": s.parent_id,
+        "kind": s.kind,
+        "name": s.name,
+        "start": s.start,
+        "duration_ms": round(s.duration * 1000, 3),
+        "attributes": s.attributes,
+        "error": s.error,
+    }
+    line = json.dumps(record, ensure_ascii=False, default=str)
+    with _log_lock:
+        with open(TRACE_LOG_PATH, "a", encoding="utf-8") as f:
+            f.write(line + "\n")
+
+
+def current_span() -> Span:
+    """The innermost active span in this context, if any."""
+    return _current_span.get()
+
+
+@contextmanager
+def span(kind: str, name: str, **attributes):
+    """
+    Trace a block of code as a span.
+
+    Args:
+        kind: Stage category, e.g. "node", "llm", "embedding", "vectorstore"
+        name: Stage name used as the metric label
+        **attributes: Extra attributes written to the JSON trace log
+    """
+    s = Span(kind, name, _current_span.get(), **attributes)
+    token = _current_span.set(s)
+    error = None
+    try:
+        yield s
+    except BaseException as e:
+        error = e
+        raise
+    finally:
+        _current_span.reset(token)
+        s.finish(error)
+
+
+def traced(kind: str, name: str = None):
+    """Decorator tracing each call of a sync or async function as a span."""
+
+    def decorator(func):
+        stage = name or func.__qualname__
+
+        if inspect.iscoroutinefunction(func):
+
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                with span(kind, stage):
+                    return await func(*args, **kwargs)
+
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with span(kind, stage):
+                return func(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+class TracingCallbackHandler(BaseCallbackHandler):
+    """LangChain callback recording each chat model call as an "llm" span.
+
+    The span is labelled with the calling stage (e.g. the graph node), so
+    LLM latency and token counts can be attributed per node.
+    """
+
+    def __init__(self):
+        self._spans = {}
+
+    def on_chat_model_start(self, serialized, messages, *, run_id, **kwargs):
+        parent = _current_span.get()
+        stage = parent.name if parent else "chat"
+        params = kwargs.get("invocation_params") or {}
+        self._spans[run_id] = Span("llm",
+                                   stage,
+                                   parent,
+                                   model=params.get("model") or
+                                   params.get("model_name"))
+
+    def on_llm_end(self, response, *, run_id, **kwargs):
+        s = self._spans.pop(run_id, None)
+        if s is None:
+            return
+        usage = (response.llm_output or {}).get("token_usage") or {}
+        prompt_tokens = usage.get("prompt_tokens", 0)
+        completion_tokens = usage.get("completion_tokens", 0)
+        s.set(prompt_tokens=prompt_tokens,
+              completion_tokens=completion_tokens)
+        LLM_TOKENS.labels(s.name, "in").inc(prompt_tokens)
+        LLM_TOKENS.labels(s.name, "out").inc(completion_tokens)
+        s.finish()
+
+    def on_llm_error(self, error, *, run_id, **kwargs):
+        s = self._spans.pop(run_id, None)
+        if s is not None:
+            s.finish(error)
+
+
+def metrics_payload():
+    """Prometheus exposition body and content type for a /metrics route."""
+    return generate_latest(), CONTENT_TYPE_LATEST
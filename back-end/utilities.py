@@ -1,3 +1,4 @@
+import json
 import requests
 import time
 import os
@@ -9,6 +10,7 @@ from bs4 import BeautifulSoup
 from selenium.common.exceptions import WebDriverException
 import platform
 from flask import jsonify
+from tracing import span, traced
 
 ALLOWED_EXTENSIONS = {'wav', 'mp3', 'ogg'}
 
@@ -65,6 +67,7 @@ def get_chrome_options():
     return chrome_options
 
 
+@traced("fetch", "extract_text_from_url")
 def extract_text_from_url(url: str, need_js: bool = False) -> str:
     """
     Extract main content from a webpage URL.
@@ -84,9 +87,10 @@ def extract_text_from_url(url: str, need_js: bool = False) -> str:
                     if not initialize_chrome_driver():
                         return extract_text_from_url(url, need_js=False)
 
-                chrome_driver.get(url)
-                time.sleep(5)
-                page_source = chrome_driver.page_source
+                with span("fetch", "browser", url=url):
+                    chrome_driver.get(url)
+                    time.sleep(5)
+                    page_source = chrome_driver.page_source
 
             except WebDriverException as e:
                 print(
@@ -96,14 +100,15 @@ def extract_text_from_url(url: str, need_js: bool = False) -> str:
 
         else:
             # For static pages, use requests
-            response = requests.get(
-                url,
-                headers={
-                    'User-Agent':
-                    'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
-                })
-            response.raise_for_status()
-            page_source = response.text
+            with span("fetch", "http", url=url):
+                response = requests.get(
+                    url,
+                    headers={
+                        'User-Agent':
+                        'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
+                    })
+                response.raise_for_status()
+                page_source = response.text
 
         # Parse the HTML
         soup = BeautifulSoup(page_source, 'html.parser')
@@ -142,6 +147,11 @@ def extract_text_from_url(url: str, need_js: bool = False) -> str:
         raise Exception(f"Failed to parse URL: {str(e)}")
 
 
+def sse_event(event: str, data) -> str:
+    """One server-sent event with a JSON payload."""
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
 def create_response(data=None, error=None, status_code=200):
     """Helper function to create consistent API responses"""
     if error:
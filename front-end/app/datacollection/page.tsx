@@ -1,6 +1,7 @@
 'use client';
 
 import { useState, useEffect, useRef } from 'react';
+import { authHeaders } from '@/lib/utils';
 import Image from 'next/image';
 import { Star, Clock, Users, ChevronDown, BarChart2, Mic, Square, Play, Pause, Upload } from 'lucide-react';
 
@@ -123,6 +124,7 @@ export default function CoursesPage() {
       
       const response = await fetch('http://45.252.106.202:5000/api/upload-audio', {
         method: 'POST',
+        headers: authHeaders(),
         body: formData,
       });
       
@@ -187,6 +189,7 @@ export default function CoursesPage() {
         method: 'POST',
         headers: {
           'Content-Type': 'application/json',
+          ...authHeaders(),
         },
         body: JSON.stringify({
           url: urlInput,
@@ -3,6 +3,7 @@
 import React, { useState, useRef } from 'react';
 import ReactMarkdown from 'react-markdown';
 import remarkGfm from 'remark-gfm';
+import { authHeaders } from '@/lib/utils';
 
 interface Section {
     title: string;
@@ -126,10 +127,12 @@ export default function DataCreate() {
             const controller = new AbortController();
             const timeoutId = setTimeout(() => controller.abort(), 600000);
 
-            const response = await fetch('http://45.252.106.202:5000/api/generate', {
+            // Sections arrive as server-sent events as soon as they are written
+            const response = await fetch('http://45.252.106.202:5000/api/generate/stream', {
                 method: 'POST',
                 headers: {
                     'Content-Type': 'application/json',
+                    ...authHeaders(),
                 },
                 body: JSON.stringify({
                     title,
@@ -138,15 +141,42 @@ export default function DataCreate() {
                 signal: controller.signal,
             });
 
-            clearTimeout(timeoutId);
-
-            if (!response.ok) {
+            if (!response.ok || !response.body) {
+                clearTimeout(timeoutId);
                 const errorData = await response.json().catch(() => ({}));
                 throw new Error(errorData.error || 'Generation failed');
             }
 
-            const data = await response.json();
-            setContent(data.content);
+            const reader = response.body.getReader();
+            const decoder = new TextDecoder();
+            const sections: string[] = [];
+            let buffer = '';
+            try {
+                while (true) {
+                    const { done, value } = await reader.read();
+                    if (done) break;
+                    buffer += decoder.decode(value, { stream: true });
+
+                    let boundary;
+                    while ((boundary = buffer.indexOf('\n\n')) !== -1) {
+                        const message = buffer.slice(0, boundary);
+                        buffer = buffer.slice(boundary + 2);
+                        const event = message.match(/^event: (.*)$/m)?.[1];
+                        const data = JSON.parse(message.match(/^data: (.*)$/m)?.[1] || '{}');
+
+                        if (event === 'section') {
+                            sections[data.index] = data.content;
+                            setContent(sections.filter(Boolean).join('\n\n'));
+                        } else if (event === 'done') {
+                            setContent(data.content);
+                        } else if (event === 'error') {
+                            throw new Error(data.error);
+                        }
+                    }
+                }
+            } finally {
+                clearTimeout(timeoutId);
+            }
         } catch (err: unknown) {
             console.error('Generation error:', err);
             const error = err as Error;
@@ -15,6 +15,7 @@ import {
     Legend
 } from 'chart.js';
 import { useState } from 'react';
+import { authHeaders } from '@/lib/utils';
 
 // 注册 Chart.js 组件
 ChartJS.register(
@@ -184,6 +185,7 @@ export default function CoursesPage() {
                 method: 'POST',
                 headers: {
                     'Content-Type': 'application/json',
+                    ...authHeaders(),
                 },
                 body: JSON.stringify({ query: searchQuery }),
             });
@@ -30,7 +30,8 @@ export default function SignInPage() {
 
       // Handle successful login
       const data = await response.json();
-      // You might want to redirect or update auth state here
+      // Searches and uploads are scoped to the user's workspace by this token
+      localStorage.setItem('token', data.token);
       window.location.href = '/datacapsule'; // Or use Next.js router
     } catch (err) {
       setError(err instanceof Error ? err.message : 'An error occurred');